@@ -0,0 +1,287 @@
+# api.py
+"""JSON simulation API for programmatic clients, served by the Dash app's Flask server.
+
+    POST /api/v1/simulate    a scenario object, a list of them, or {"scenarios": [...], options...}
+    GET  /api/v1/simulate    one scenario (and options) from the query string
+
+Scenario fields are batch.py's: x_sp, y_sp, z_sp, distance_km, size_m,
+angle_deg, z_angle_deg and optionally id, type, rubble and time. Options:
+
+- integrator: "kepler" (closed form, the default) or "atlas" (interpolated
+  rk4 outcomes, see atlas.py). Both evaluate a whole batch in one
+  vectorized pass; the step-by-step integrators stay with batch.py.
+- points: when above 0, every trajectory comes back downsampled to at most
+  this many points sampled from the closed-form orbit (for either
+  integrator), with the impact point kept last.
+- format: "json" (the default) or "npz" (also chosen by an Accept header
+  of application/x-npz). NPZ holds one array per result column, plus the
+  trajectories as one (M, 4) float32 array of x, y, z (km) and t (s)
+  rows, with trajectory_offsets (N + 1) marking where each scenario's
+  rows start.
+
+Each result has id, impact, lat, lon and t_impact_s (null for misses),
+energy_j, tnt_tons, impact_radius_km, strategy_code, strategy, the damage
+ring radii (rings_km) and an error string for rejected rows.
+
+Results only depend on the request, so the ETag is a hash of the parsed
+request and API_VERSION (weak, as it holds for every content coding). A
+matching If-None-Match gets 304 without any work, and bodies are kept in
+a result cache of their own. Requests over SIM_API_MAX_SCENARIOS scenarios
+or SIM_API_MAX_TOTAL_POINTS trajectory points in all get 413. JSON bodies are gzipped for clients that accept
+it; NPZ bodies are compressed already.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+
+from trajectory import initial_states, impact_latlon
+from physics import impact_physics, STRATEGIES
+from effects import EFFECTS, effect_radii
+import metrics
+
+API_VERSION = 3
+INTEGRATORS = ("kepler", "atlas")
+MAX_SCENARIOS = int(os.environ.get("SIM_API_MAX_SCENARIOS", 10000))
+MAX_POINTS = int(os.environ.get("SIM_API_MAX_POINTS", 10000))
+#Trajectory rows per request (scenarios x points); each limit alone still allows 10^8
+MAX_TOTAL_POINTS = int(os.environ.get("SIM_API_MAX_TOTAL_POINTS", 10 ** 6))
+GZIP_MIN_BYTES = 1024
+NUMERIC = ("x_sp", "y_sp", "z_sp", "distance_km", "size_m", "angle_deg", "z_angle_deg")
+NPZ_MIMETYPE = "application/x-npz"
+
+class RequestError(ValueError):
+    """A request the API rejects as a whole (HTTP 400)."""
+    status = 400
+
+class RequestTooLarge(RequestError):
+    """A request over the size limits (HTTP 413)."""
+    status = 413
+
+def _flag(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "rubble")
+
+def parse_scenarios(rows):
+    """Column arrays for the valid rows, plus their positions and an error string per row."""
+    columns = {name: [] for name in NUMERIC + ("time", "type", "rubble")}
+    ids, valid, errors = [], [], []
+    for k, row in enumerate(rows):
+        if not isinstance(row, dict):
+            ids.append("")
+            errors.append("scenario must be an object")
+            continue
+        ids.append(str(row.get("id", k)))
+        try:
+            values = [float(row[name]) for name in NUMERIC]
+            time = float(row.get("time") or 0)
+            if not np.all(np.isfinite(values + [time])):
+                raise ValueError("values must be finite")
+        except (KeyError, ValueError, TypeError) as exc:
+            errors.append(f"{type(exc).__name__}: {exc}")
+            continue
+        for name, value in zip(NUMERIC, values):
+            columns[name].append(value)
+        columns["time"].append(time)
+        columns["type"].append(str(row.get("type") or "default").lower())
+        columns["rubble"].append(_flag(row.get("rubble", "")))
+        valid.append(k)
+        errors.append("")
+    dtypes = {"type": str, "rubble": bool}
+    columns = {name: np.array(values, dtype=dtypes.get(name, float)) for name, values in columns.items()}
+    return columns, np.array(valid, dtype=int), ids, errors
+
+def _kepler(c, speed, states, dt):
+    from kepler import kepler_impact, propagate_many
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_max = np.where(speed > 0, 30 * c["distance_km"] / speed, 0.0)
+    found = kepler_impact(states, t_max=t_max)
+    hit = found["impact"]
+    pos = propagate_many(states[hit], found["chi_impact"][hit])
+    lat, lon = np.full(len(hit), np.nan), np.full(len(hit), np.nan)
+    lat[hit], lon[hit] = impact_latlon(pos[:, 0], pos[:, 1], pos[:, 2], dt[hit], c["time"][hit])
+    return hit, lat, (lon + 180) % 360 - 180, found["t_impact"]
+
+def _atlas(c, speed):
+    from atlas import query
+
+    found = query(speed, c["x_sp"], c["y_sp"], c["z_sp"], c["angle_deg"], c["z_angle_deg"], c["distance_km"],
+                  time=c["time"])
+    return found["impact"], found["lat"], found["lon"], found["t_impact"]
+
+def _downsample(xs, ys, zs, ts, points):
+    """At most points rows of (x, y, z, t), evenly spaced by index, first and last kept."""
+    keep = np.unique(np.linspace(0, len(xs) - 1, min(points, len(xs))).round().astype(int))
+    return np.column_stack([xs, ys, zs, ts])[keep].astype(np.float32)
+
+def _trajectory(c, k, speed, points):
+    args = (speed[k], c["x_sp"][k], c["y_sp"][k], c["z_sp"][k], c["angle_deg"][k], c["z_angle_deg"][k],
+            c["distance_km"][k])
+    # The closed form for both integrators: the atlas tabulates the same point-mass orbits, and
+    # the fixed-step path would end on the legacy correction point, far past the Earth
+    from kepler import asteroid_trajectory_kepler
+    xs, ys, zs, ts, _ = asteroid_trajectory_kepler(*args, samples=max(points, 2))
+    return _downsample(xs, ys, zs, ts, points)
+
+def simulate(rows, integrator="kepler", points=0):
+    """Result columns (dict of (N,) arrays, rejected rows NaN) and the trajectories (or None)."""
+    c, valid, ids, errors = parse_scenarios(rows)
+    n, m = len(ids), len(valid)
+    speed = np.sqrt(c["x_sp"] ** 2 + c["y_sp"] ** 2 + c["z_sp"] ** 2)
+    states, dt, _ = initial_states(speed, c["x_sp"], c["y_sp"], c["z_sp"], c["angle_deg"], c["z_angle_deg"],
+                                   c["distance_km"])
+    if m:
+        hit, lat, lon, t_impact = _kepler(c, speed, states, dt) if integrator == "kepler" else _atlas(c, speed)
+    else:
+        hit, lat, lon, t_impact = (np.zeros(0, dtype=bool),) + (np.zeros(0),) * 3
+    phys = impact_physics(c["size_m"], speed, c["distance_km"], c["type"] if m else "default", c["rubble"])
+    rings = effect_radii(phys["energy"]).reshape(m, len(EFFECTS))
+
+    def column(values, fill=np.nan, dtype=float):
+        out = np.full(n, fill, dtype=dtype)
+        out[valid] = values
+        return out
+
+    impact = column(hit, False, bool)
+    result = {
+        "id": np.array(ids, dtype=str),
+        "impact": impact,
+        "lat": column(np.where(hit, lat, np.nan)),
+        "lon": column(np.where(hit, lon, np.nan)),
+        "t_impact_s": column(np.where(hit, t_impact, np.nan)),
+        "energy_j": column(phys["energy"]),
+        "tnt_tons": column(phys["tnt_tons"]),
+        "impact_radius_km": column(phys["impact_radius"]),
+        "strategy_code": column(phys["strategy"], -1, int),
+        **{f"ring_{name}_km": column(rings[:, j]) for j, name in enumerate(EFFECTS)},
+        "error": np.array(errors, dtype=str),
+    }
+    result["strategy"] = np.array([STRATEGIES[s] if s >= 0 else "" for s in result["strategy_code"]], dtype=str)
+    trajectories = None
+    if points > 0:
+        trajectories = [np.zeros((0, 4), dtype=np.float32)] * n
+        for j, k in enumerate(valid):
+            trajectories[k] = _trajectory(c, j, speed, points)
+    metrics.inc("sim_api_scenarios_total", n, integrator=integrator)
+    return result, trajectories
+
+def _column_list(values):
+    """Python values of a column, NaN as None."""
+    if values.dtype.kind == "f":
+        return [None if v != v else v for v in values.tolist()]
+    return values.tolist()
+
+def to_json(result, trajectories=None):
+    """JSON body: {"results": [...]} with NaN as null."""
+    names = [name for name in result if not name.startswith("ring_")]
+    columns = [_column_list(result[name]) for name in names]
+    rings = [_column_list(result[f"ring_{name}_km"]) for name in EFFECTS]
+    rows = []
+    for k, values in enumerate(zip(*columns)):
+        row = dict(zip(names, values))
+        row["rings_km"] = {name: ring[k] for name, ring in zip(EFFECTS, rings)}
+        if trajectories is not None:
+            row["trajectory"] = {axis: np.round(trajectories[k][:, j].astype(float), 3).tolist()
+                                 for j, axis in enumerate("xyzt")}
+        rows.append(row)
+    return json.dumps({"api_version": API_VERSION, "results": rows}, allow_nan=False).encode()
+
+def to_npz(result, trajectories=None):
+    """NPZ body: one array per result column, plus trajectory and trajectory_offsets."""
+    arrays = dict(result)
+    if trajectories is not None:
+        arrays["trajectory"] = np.concatenate(trajectories) if trajectories else np.zeros((0, 4), np.float32)
+        arrays["trajectory_offsets"] = np.cumsum([0] + [len(t) for t in trajectories]).astype(np.int64)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+def parse_request(body, args, accept=""):
+    """(scenarios, integrator, points, fmt) from a JSON body (or None) and query arguments."""
+    options = dict(args)
+    if body is None:
+        scenarios = [{k: v for k, v in options.items() if k not in ("integrator", "points", "format")}]
+    elif isinstance(body, list):
+        scenarios = body
+    elif isinstance(body, dict) and "scenarios" in body:
+        scenarios = body["scenarios"]
+        options.update({k: v for k, v in body.items() if k != "scenarios"})
+    elif isinstance(body, dict):
+        scenarios = [{k: v for k, v in body.items() if k not in ("integrator", "points", "format")}]
+        options.update(body)
+    else:
+        raise RequestError("body must be a scenario object, a list of them, or {\"scenarios\": [...]}")
+    if not isinstance(scenarios, list) or not scenarios:
+        raise RequestError("no scenarios given")
+    if len(scenarios) > MAX_SCENARIOS:
+        raise RequestTooLarge(f"at most {MAX_SCENARIOS} scenarios per request")
+
+    integrator = options.get("integrator") or "kepler"
+    if integrator not in INTEGRATORS:
+        raise RequestError(f"integrator must be one of {', '.join(INTEGRATORS)}")
+    try:
+        points = int(options.get("points") or 0)
+    except (TypeError, ValueError):
+        raise RequestError("points must be an integer")
+    if not 0 <= points <= MAX_POINTS:
+        raise RequestError(f"points must be between 0 and {MAX_POINTS}")
+    if len(scenarios) * points > MAX_TOTAL_POINTS:
+        raise RequestTooLarge(f"at most {MAX_TOTAL_POINTS} trajectory points (scenarios x points) per request")
+    fmt = options.get("format") or ("npz" if NPZ_MIMETYPE in accept else "json")
+    if fmt not in ("json", "npz"):
+        raise RequestError("format must be json or npz")
+    return scenarios, integrator, points, fmt
+
+def etag(scenarios, integrator, points, fmt):
+    """Validator for a request: results are a pure function of it and the code version."""
+    key = {"v": API_VERSION, "scenarios": scenarios, "integrator": integrator, "points": points, "format": fmt}
+    if integrator == "atlas":
+        from atlas import get_atlas
+        atlas = get_atlas()
+        key["atlas"] = None if atlas is None else [atlas.meta["version"], atlas.meta["axes"]]
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+def install(server, cache=None):
+    """Add /api/v1/simulate to a Flask server; cache, if given, is a cache.ResultCache for response bodies.
+
+    Give it a cache of its own: API bodies can be large and numerous, and in
+    a shared cache they would evict the UI's figures.
+    """
+    from flask import request, jsonify
+
+    from cache import MISSING
+
+    @server.route("/api/v1/simulate", methods=["GET", "POST"])
+    def api_simulate():
+        if request.method == "POST":
+            body = request.get_json(silent=True)
+            if body is None:
+                return jsonify(error="body must be JSON"), 400
+        else:
+            body = None
+        try:
+            scenarios, integrator, points, fmt = parse_request(body, request.args, request.headers.get("Accept", ""))
+        except RequestError as exc:
+            return jsonify(error=str(exc)), exc.status
+
+        tag = etag(scenarios, integrator, points, fmt)
+        headers = {"ETag": tag, "Vary": "Accept, Accept-Encoding", "Cache-Control": "no-cache"}
+        if tag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+            return server.response_class(status=304, headers=headers)
+
+        data = cache.get(("api", tag)) if cache is not None else MISSING
+        if data is MISSING:
+            with metrics.stage("api"):
+                result, trajectories = simulate(scenarios, integrator, points)
+                data = to_npz(result, trajectories) if fmt == "npz" else to_json(result, trajectories)
+            if cache is not None:
+                cache.set(("api", tag), data)
+        if fmt == "json" and len(data) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        return server.response_class(data, mimetype=NPZ_MIMETYPE if fmt == "npz" else "application/json",
+                                     headers=headers)
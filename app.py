@@ -1,202 +1,308 @@
 # app.py
-from dash import Dash, html, dcc, Input, Output
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from functools import lru_cache
+
+from dash import Dash, html, dcc, Input, Output, State, no_update
+from dash.exceptions import PreventUpdate
+from flask import jsonify, request
+from plotly.utils import PlotlyJSONEncoder
 import plotly.graph_objects as go
-import numpy as np
 
-from visualization import plot_simulation_video  # make sure this returns fig
-from effects import body_sim
-from mitigation import strategy
+from simulation import compute_simulation, compute_corridor, estimated_steps, LONG_STEPS, RESULT_CONFIG
+from jobs import JobManager
+from sessions import ClickRegistry
+from cache import ResultCache, quantize, MISSING
+from trajectory import SimulationCancelled
+import metrics
+import api
 
 external_stylesheets = [
 	"""https://fonts.googleapis.com/css2?family=Montserrat:wght@400;700&display=swap""",
 	"""https://fonts.cdnfonts.com/css/nasa"""
 ]
 
-app = Dash(__name__, external_stylesheets = external_stylesheets)
+#earth-mesh.js holds the Earth surface every simulation figure is drawn on (see fill_earth below)
+app = Dash(__name__, external_stylesheets = external_stylesheets, external_scripts = ["/earth-mesh.js"])
 server = app.server
 
+#Result cache: memory LRU per process plus a disk tier shared by all workers (SIM_CACHE_DIR="" disables it)
+sim_cache = ResultCache(
+    maxsize = int(os.environ.get("SIM_CACHE_SIZE", 64)),
+    ttl = float(os.environ.get("SIM_CACHE_TTL", 24 * 3600)),
+    directory = os.environ.get("SIM_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sim_cache")) or None
+)
+#Rounding steps for (xspeed, yspeed, zspeed, distance, size, angle, z_angle, type, rtype, time)
+CACHE_STEPS = (0.001, 0.001, 0.001, 1, 0.1, 0.01, 0.01, None, None, 1)
+#Long scenarios run as background jobs; state is kept in a local SQLite file
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKGROUND_STEPS = int(os.environ.get("SIM_BACKGROUND_STEPS", LONG_STEPS))
+JOBS_DB = os.environ.get("SIM_JOBS_DB", os.path.join(BASE_DIR, ".sim_jobs", "jobs.sqlite"))
+jobs = JobManager(JOBS_DB, workers = int(os.environ.get("SIM_JOB_WORKERS", 2)))
+#Latest click per page load, in the same SQLite file so every worker process sees it
+clicks = ClickRegistry(JOBS_DB)
+#Processes for the corridor map: 1 runs it in the request thread, so a click never forks the web worker
+#(with the Numba kernels a whole corridor takes milliseconds); 0 = a fresh pool of one per CPU per click
+CORRIDOR_WORKERS = int(os.environ.get("SIM_CORRIDOR_WORKERS", 1)) or None
+#Stage timings, counters and request latencies at /metrics (SIM_METRICS=0 disables them)
+metrics.install(server)
+metrics.add_gauges(lambda: {f"sim_cache_{name}": value for name, value in sim_cache.stats().items()})
+#Numeric results for programmatic clients at /api/v1/simulate, in a cache of their own so API traffic
+#cannot evict the UI's figures (disk tier in an "api" folder under SIM_CACHE_DIR)
+api_cache = ResultCache(
+    maxsize = int(os.environ.get("SIM_API_CACHE_SIZE", 64)),
+    ttl = sim_cache.ttl,
+    directory = sim_cache.directory and os.path.join(sim_cache.directory, "api")
+)
+metrics.add_gauges(lambda: {f"sim_api_cache_{name}": value for name, value in api_cache.stats().items()})
+api.install(server, cache = api_cache)
+#Number fields that turn red while empty
+INPUT_FIELDS = ("xspeed", "yspeed", "zspeed", "distance", "size", "angle", "z_angle", "time")
+
 # Layout
-app.layout = html.Div(style = {"backgroundColor" : "#FFFFFF","backgroundImage" : 'url("/storage/emulated/0/Download/__pycache__/testsim/testsim2/assets/Earth.jpg")', "backgroundPosition" : "center", "backgroundSize" : "cover", "border" : "solid #333333 3px"}, children = [
-	#Page heading
-    html.H1("Asteroid Impact Simulator", style = {"textAlign" : "center", "fontFamily" : "Montserrat, sans-serif", "fontSize" : "40px", "border" : "solid grey 4px", "backgroundColor" : "#00AABB"}),
+def serve_layout():
+    #Built when a page is served rather than at import, so workers start faster
+    return html.Div(style = {"backgroundColor" : "#FFFFFF","backgroundImage" : 'url("/storage/emulated/0/Download/__pycache__/testsim/testsim2/assets/Earth.jpg")', "backgroundPosition" : "center", "backgroundSize" : "cover", "border" : "solid #333333 3px"}, children = [
+    	#Page heading
+        html.H1("Asteroid Impact Simulator", style = {"textAlign" : "center", "fontFamily" : "Montserrat, sans-serif", "fontSize" : "40px", "border" : "solid grey 4px", "backgroundColor" : "#00AABB"}),
 	
-	#The various page components
-    html.Div([
-        html.Label("Speed (km/s) in x direction", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        dcc.Input(id="xspeed", type="number", value=2, style = {"backgroundColor" : "#00BBBB"}),
+    	#The various page components
+        html.Div([
+            html.Label("Speed (km/s) in x direction", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            dcc.Input(id="xspeed", type="number", value=2, debounce = 0.5, style = {"backgroundColor" : "#00BBBB"}),
         
-        html.Label("Speed (km/s) in y direction", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        dcc.Input(id="yspeed", type="number", value=2, style = {"backgroundColor" : "#00BBBB"}),
+            html.Label("Speed (km/s) in y direction", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            dcc.Input(id="yspeed", type="number", value=2, debounce = 0.5, style = {"backgroundColor" : "#00BBBB"}),
         
-        html.Label("Speed (km/s) in z direction", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        dcc.Input(id="zspeed", type="number", value=2, style = {"backgroundColor" : "#00BBBB"}),
+            html.Label("Speed (km/s) in z direction", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            dcc.Input(id="zspeed", type="number", value=2, debounce = 0.5, style = {"backgroundColor" : "#00BBBB"}),
         
-        html.Label("Distance (km)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        dcc.Input(id="distance", type="number", value=20000, style = {"backgroundColor" : "#00BBBB"}),
+            html.Label("Distance (km)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            dcc.Input(id="distance", type="number", value=20000, debounce = 0.5, style = {"backgroundColor" : "#00BBBB"}),
         
-        html.Label("Diameter (m)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        dcc.Input(id="size", type="number", value=500, style = {"backgroundColor" : "#00BBBB"}),
+            html.Label("Diameter (m)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            dcc.Input(id="size", type="number", value=500, debounce = 0.5, style = {"backgroundColor" : "#00BBBB"}),
         
-        html.Label("XY Angle (deg)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        dcc.Input(id="angle", type="number", value=120, style = {"backgroundColor" : "#00BBBB"}),
+            html.Label("XY Angle (deg)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            dcc.Input(id="angle", type="number", value=120, debounce = 0.5, style = {"backgroundColor" : "#00BBBB"}),
         
-        html.Label("Z Angle (deg)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        dcc.Input(id="z_angle", type="number", value=120, style = {"backgroundColor" : "#00BBBB"}),
+            html.Label("Z Angle (deg)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            dcc.Input(id="z_angle", type="number", value=120, debounce = 0.5, style = {"backgroundColor" : "#00BBBB"}),
         
-        html.Label("Time of measurement in seconds after midnight on that day (GMT)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        dcc.Input(id="time", type="number", value=0, style = {"backgroundColor" : "#00BBBB"}),
+            html.Label("Time of measurement in seconds after midnight on that day (GMT)", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            dcc.Input(id="time", type="number", value=0, debounce = 0.5, style = {"backgroundColor" : "#00BBBB"}),
                 
-        html.Label("Asteroid Type", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        html.Div([dcc.Dropdown(["Rocky", "Metallic", "Icy"], "Rocky",id="type", style = {"fontFamily" : "Montserrat, sans-serif", "backgroundColor" : "#00BBBB"})]),
+            html.Label("Asteroid Type", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            html.Div([dcc.Dropdown(["Rocky", "Metallic", "Icy"], "Rocky",id="type", style = {"fontFamily" : "Montserrat, sans-serif", "backgroundColor" : "#00BBBB"})]),
         
-        html.Label("Rubble Asteroid or Solid Asteroid", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
-        html.Div([dcc.Dropdown(["Solid", "Rubble"], "Solid",id="rtype", style = {"fontFamily" : "Montserrat, sans-serif", "backgroundColor" : "#00BBBB"})]),
+            html.Label("Rubble Asteroid or Solid Asteroid", style = {"fontFamily" : "Montserrat, sans-serif", "textAlign" : "center", "border" : "solid #333333 1.5px"}),
+            html.Div([dcc.Dropdown(["Solid", "Rubble"], "Solid",id="rtype", style = {"fontFamily" : "Montserrat, sans-serif", "backgroundColor" : "#00BBBB"})]),
         
-        html.Div([html.Button("Simulate", id="simulate-btn", style = {"fontFamily" : "Montserrat, sans-serif", "backgroundColor" : "#00BBBB"})], style = {"gridColumn" : "span 2", "textAlign" : "center"}),
+            html.Div([html.Button("Simulate", id="simulate-btn", style = {"fontFamily" : "Montserrat, sans-serif", "backgroundColor" : "#00BBBB"}),
+                      html.Button("Impact Corridor", id="corridor-btn", style = {"fontFamily" : "Montserrat, sans-serif", "backgroundColor" : "#00BBBB", "marginLeft" : "10px"})], style = {"gridColumn" : "span 2", "textAlign" : "center"}),
         
-        html.Div(id="output", style = {"fontFamily" : "Montserrat, sans-serif", "backgroundColor" : "#00BBBB", "gridColumn" : "span 2", "textAlign" : "center"}),
+            html.Div(id="output", style = {"fontFamily" : "Montserrat, sans-serif", "backgroundColor" : "#00BBBB", "gridColumn" : "span 2", "textAlign" : "center"}),
         
-    ], id = "stuff", style={"display":"grid", "gridTemplateColumns":"1fr 1fr", "gap":"10px"}),
+        ], id = "stuff", style={"display":"grid", "gridTemplateColumns":"1fr 1fr", "gap":"10px"}),
 	
-	#Some graph under the page
-    dcc.Loading(dcc.Graph(id="asteroid-graph", style = {"backgroundColor" : "#00AAAA", "color" : "#00CCCC"}), type = "cube")
-], id = "Full_page")
+    	#Some graph under the page
+        #Simulation figures arrive in sim-figure and are copied to the graph once the Earth is filled in
+        dcc.Loading([dcc.Graph(id="asteroid-graph", style = {"backgroundColor" : "#00AAAA", "color" : "#00CCCC"}),
+                     dcc.Store(id="sim-figure")], type = "cube"),
+
+        #Identifies this page load so a newer click can cancel an older simulation
+        dcc.Store(id="session-id", data=uuid.uuid4().hex),
+
+        #Background job being polled for progress
+        dcc.Store(id="job-id"),
+        dcc.Interval(id="job-poll", interval=1000, disabled=True)
+    ], id = "Full_page")
+
+app.layout = serve_layout
+
+def preload_assets():
+    #Load the large read-only assets once, before a pre-fork server starts its workers,
+    #so every worker shares the same pages (the rasters and index are memory-mapped)
+    from visualization import MESH_LEVELS, earth_mesh
+    from population import get_raster
+    from geocode import get_geocoder
+    from trajectory import get_backend
+    for level in MESH_LEVELS:
+        earth_mesh(level)
+    earth_script()
+    go.Figure([go.Scatter3d(), go.Surface(), go.Heatmap()]).to_dict()   #plotly's trace validators load lazily
+    get_raster()
+    get_geocoder()
+    if get_backend() == "numba":
+        from numba_kernels import warm_up
+        warm_up()
 
-# Callback to update simulation
+# Callback to update simulation (only the button triggers it; the fields are read as state)
 @app.callback(
-    Output("asteroid-graph", "figure"),
+    Output("sim-figure", "data"),
     Output("output", "children"),        
+    Output("job-id", "data"),
+    Output("job-poll", "disabled"),
     Input("simulate-btn", "n_clicks"),
-    Input("xspeed", "value"),
-    Input("yspeed", "value"),
-    Input("zspeed", "value"),
-    Input("distance", "value"),
-    Input("size", "value"),
-    Input("angle", "value"),
-    Input("z_angle", "value"),
-    Input("type", "value"),
-    Input("rtype", "value"),
-    Input("time", "value"),
+    State("xspeed", "value"),
+    State("yspeed", "value"),
+    State("zspeed", "value"),
+    State("distance", "value"),
+    State("size", "value"),
+    State("angle", "value"),
+    State("z_angle", "value"),
+    State("type", "value"),
+    State("rtype", "value"),
+    State("time", "value"),
+    State("session-id", "data"),
 )
-def run_simulation(n_clicks, xspeed, yspeed, zspeed, distance, size, angle, z_angle, type, rtype, time): 
+def run_simulation(n_clicks, xspeed, yspeed, zspeed, distance, size, angle, z_angle, type, rtype, time, session_id=None): 
     if (not all([xspeed, yspeed, zspeed, distance, size, angle, z_angle])):
-        return go.Figure(), "Waiting for Input....."  # empty if incomplete input or button not clicked
+        return go.Figure(), "Waiting for Input.....", None, True  # empty if incomplete input or button not clicked
     elif (n_clicks is None) :
-    	return go.Figure(), ""       
-
-#Setting the parameters for the visualization function
-    sped = np.sqrt(xspeed ** 2 + yspeed ** 2 + zspeed ** 2)
-    asteroid = {
-        "speed_km_s": sped,
-        "x_sp": xspeed,
-        "y_sp": yspeed,
-        "z_sp": zspeed,
-        "distance_km": distance
-    }
-    
-    if type == "Rocky":
-        dtype = "rocky"
-    elif type == "Metallic":
-        dtype = "metallic"
-    elif type == "Icy":
-        dtype = "icy"
-    else :
-        dtype = ""                
-      
-    if rtype == "Rubble":
-            rubble = True
-    else:
-            rubble = False        
-            
-    #Generate figure using our function
-    imp_loc, imp_locgen, affected, stat, fig= plot_simulation_video(
-        asteroid, angle_deg=angle, z_angle_deg=z_angle, body_d=size, dtype = dtype, time = time, rubble = rubble
-    )
+    	return go.Figure(), "", None, True
+
+    #Same scenario (after rounding) and settings -> cached figure and text
+    args = quantize((xspeed, yspeed, zspeed, distance, size, angle % 360, z_angle % 360, type, rtype, time or 0), CACHE_STEPS)
+    key = (RESULT_CONFIG, args)
+    result = sim_cache.get(key)
+    if result is MISSING and estimated_steps(*args[:4], *args[5:7]) > BACKGROUND_STEPS:
+        #Too long for the request thread: hand it to the job pool and poll
+        jid = jobs.submit(key, compute_simulation, *args)
+        return no_update, "Long simulation started in the background.....", jid, False
+    if result is MISSING:
+        cancelled = None
+        if session_id:
+            clicks.claim(session_id, n_clicks)
+            cancelled = lambda: clicks.superseded(session_id, n_clicks)
+        try:
+            result = compute_simulation(*args, cancelled = cancelled)
+        except SimulationCancelled:
+            raise PreventUpdate
+        sim_cache.set(key, result)
+    return result[0], result[1], None, True
+
+# Corridor map: every approach angle for the current speed and distance, as one heatmap
+@app.callback(
+    Output("asteroid-graph", "figure", allow_duplicate=True),
+    Output("output", "children", allow_duplicate=True),
+    Input("corridor-btn", "n_clicks"),
+    State("xspeed", "value"),
+    State("yspeed", "value"),
+    State("zspeed", "value"),
+    State("distance", "value"),
+    State("time", "value"),
+    State("session-id", "data"),
+    prevent_initial_call=True,
+)
+def run_corridor(n_clicks, xspeed, yspeed, zspeed, distance, time, session_id=None):
+    if not all([xspeed, yspeed, zspeed, distance]):
+        return go.Figure(), "Waiting for Input....."
+    key = ("corridor", RESULT_CONFIG) + quantize((xspeed, yspeed, zspeed, distance, time or 0), (0.001, 0.001, 0.001, 1, 1))
+    result = sim_cache.get(key)
+    if result is MISSING:
+        cancelled = None
+        if session_id:
+            clicks.claim(session_id + ":corridor", n_clicks)
+            cancelled = lambda: clicks.superseded(session_id + ":corridor", n_clicks)
+        try:
+            result = compute_corridor(*key[2:], workers = CORRIDOR_WORKERS, cancelled = cancelled)
+        except SimulationCancelled:
+            raise PreventUpdate
+        sim_cache.set(key, result)
+    return result[0], result[1]
+
+@app.callback(
+    Output("sim-figure", "data", allow_duplicate=True),
+    Output("output", "children", allow_duplicate=True),
+    Output("job-poll", "disabled", allow_duplicate=True),
+    Input("job-poll", "n_intervals"),
+    State("job-id", "data"),
+    prevent_initial_call=True,
+)
+def poll_job(n_intervals, jid):
+    status = jobs.status(jid) if jid else None
+    if status is None:
+        return no_update, "Background simulation was lost, please simulate again.", True
+    if status["status"] == "done":
+        key, result = jobs.result(jid)
+        sim_cache.set(key, result)
+        return result[0], result[1], True
+    if status["status"] in ("error", "cancelled"):
+        return no_update, f"Background simulation failed : {status['error'] or status['status']}", True
+    return no_update, f"Simulating in the background..... {status['steps']} steps integrated, {status['frames']} frames built", False
+
+@lru_cache(maxsize=1)
+def earth_script():
+    #(script, gzipped script, ETag) for /earth-mesh.js; the mesh never changes while the process runs
+    from visualization import earth_template_js
+    body = earth_template_js().encode()
+    return body, gzip.compress(body, compresslevel=9), '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+@server.route("/earth-mesh.js")
+def earth_mesh_js():
+    body, packed, tag = earth_script()
+    headers = {"ETag": tag, "Vary": "Accept-Encoding", "Cache-Control": "public, max-age=86400"}
+    if request.headers.get("If-None-Match") == tag:
+        return server.response_class(status=304, headers=headers)
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        body = packed
+        headers["Content-Encoding"] = "gzip"
+    return server.response_class(body, mimetype="application/javascript", headers=headers)
+
+@server.route("/cache-stats")
+def cache_stats():
+    return jsonify(sim_cache.stats())
+
+@server.route("/jobs/<jid>")
+def job_status(jid):
+    status = jobs.status(jid)
+    return (jsonify(status), 200) if status else (jsonify(error="unknown job"), 404)
+
+@server.route("/jobs/<jid>/result")
+def job_result(jid):
+    done = jobs.result(jid)
+    if done is None:
+        return jsonify(error="job not finished or unknown"), 404
+    fig, txt = done[1]
+    return server.response_class(json.dumps({"figure": fig, "text": txt}, cls=PlotlyJSONEncoder), mimetype="application/json")
     
-    aster = {
-    "size_m" : size,
-    "speed_km_s" : sped,
-    "distance_km" : distance
+#Red background for empty fields, computed in the browser (no server round trip)
+app.clientside_callback(
+    """
+    function() {
+        return Array.from(arguments).map(function(value) {
+            return {"backgroundColor": (value === null || value === undefined) ? "#AA0000" : "#00BBBB"};
+        });
     }
-    energy, imp_rad = body_sim(aster)
-    tnt = energy // 4184000000
-    
-    ev = {
-    "1000000000000000000000000" : "the Dinosaur Extinction causing asteroid",
-     "40000000000000000" : "the Tunguska event",
-     "10000000000" : "a Magnitude 2 Earthquake",
-     "100000000000000" : "the Hiroshima Atom Bomb"     
-     }
-    if energy > 1000000000000000000000000:
-    	eve = ev["1000000000000000000000000"]
-    elif energy > 40000000000000000:
-    	eve = ev["40000000000000000"]
-    elif energy > 100000000000000:
-    	eve = ev["100000000000000"]
-    elif energy > 10000000000:
-    	eve = ev["10000000000"] 
-    else :
-    	eve = "a well....... firecracker?"
-    		
-    strat = strategy(aster, dtype = dtype, rubble = rubble)    
-    
-    txt = f"Impact Effects :- \n Kinetic Energy of the Asteroid : {energy:.2e} which is equal to {tnt:.2e} tons of tnt. \n This is more energy than {eve}. \n Impact Radius : {imp_rad:.2f}. \n Impact Location : {imp_locgen} {imp_loc}. \n No. of People instantly killed in the blast radius : {affected}. Final State of the Asteroid : {strat}"
-    return fig, txt
-    
-@app.callback(
-	Output("xspeed", "style"),
-	Output("yspeed", "style"),
-	Output("zspeed", "style"),
-	Output("distance", "style"),
-	Output("size", "style"),
-	Output("angle", "style"),
-	Output("z_angle", "style"),
-	Output("time", "style"),
-	Input("xspeed", "value"),
-    Input("yspeed", "value"),
-    Input("zspeed", "value"),
-    Input("distance", "value"),
-    Input("size", "value"),
-    Input("angle", "value"),
-    Input("z_angle", "value"),
-    Input("time", "value"),
+    """,
+    [Output(field, "style") for field in INPUT_FIELDS],
+    [Input(field, "value") for field in INPUT_FIELDS],
+)
+
+#Simulation figure -> graph, filling empty Earth traces from window.earthMeshes (earth-mesh.js)
+app.clientside_callback(
+    """
+    function fill_earth(fig) {
+        var meshes = window.earthMeshes;
+        if (!fig || !fig.data || !meshes) {
+            return fig;
+        }
+        var data = fig.data.map(function(trace) {
+            var mesh = trace.meta && trace.meta.template === "earth" ? meshes[trace.meta.lod] : null;
+            return (mesh && trace.z === undefined) ? Object.assign({}, trace, mesh) : trace;
+        });
+        return Object.assign({}, fig, {data: data});
+    }
+    """,
+    Output("asteroid-graph", "figure", allow_duplicate=True),
+    Input("sim-figure", "data"),
+    prevent_initial_call=True,
 )
 
-def update(xspeed, yspeed, zspeed, distance, size, angle, z_angle, time):
-	if xspeed is None:
-		xstyle = {"backgroundColor" : "#AA0000"}
-	else:
-		xstyle = {"backgroundColor" : "#00BBBB"}
-	if yspeed is None:
-		ystyle = {"backgroundColor" : "#AA0000"}
-	else:
-		ystyle = {"backgroundColor" : "#00BBBB"}
-	if zspeed is None:
-		zstyle = {"backgroundColor" : "#AA0000"}
-	else:
-		zstyle = {"backgroundColor" : "#00BBBB"}
-	if distance is None:
-		dstyle = {"backgroundColor" : "#AA0000"}
-	else:
-		dstyle = {"backgroundColor" : "#00BBBB"}
-	if size is None:
-		sstyle = {"backgroundColor" : "#AA0000"}
-	else:
-		sstyle = {"backgroundColor" : "#00BBBB"}
-	if angle is None:
-		astyle = {"backgroundColor" : "#AA0000"}
-	else:
-		astyle = {"backgroundColor" : "#00BBBB"}
-	if z_angle is None:
-		zastyle = {"backgroundColor" : "#AA0000"}
-	else:
-		zastyle = {"backgroundColor" : "#00BBBB"}
-	if time is None:
-		tstyle = {"backgroundColor" : "#AA0000"}
-	else:
-		tstyle = {"backgroundColor" : "#00BBBB"}
-	return xstyle, ystyle, zstyle, dstyle, sstyle, astyle, zastyle, tstyle
-
-#Some important code to run
+#Development server (SIM_DEBUG=0 turns debug off); production runs wsgi.py under gunicorn
 if __name__ == "__main__":
-    app.run(debug=True, dev_tools_hot_reload = False)
+    app.run(debug=os.environ.get("SIM_DEBUG", "1") != "0", dev_tools_hot_reload = False)
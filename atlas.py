@@ -0,0 +1,380 @@
+# atlas.py
+"""Scenario atlas: precomputed trajectory outcomes, answered by interpolation.
+
+    python atlas.py build --workers 8           # (re)build, resuming a partial build
+    python atlas.py query -2 -2 -2 20000 120 120  # x_sp y_sp z_sp distance angle z_angle
+    python atlas.py check --samples 2000        # atlas against exact integration
+
+Under point-mass gravity the outcome is unchanged by rotating the whole
+scenario, so a scenario only has three free parameters: speed, starting
+distance, and the approach angle between the position and velocity vectors
+(0 = moving straight out, 180 = head-on). The XY and Z angles and the
+velocity direction only decide the plane of the orbit. The atlas tabulates
+the batch RK4 core over (speed, distance, approach) with the start on the
+x axis and the velocity in the x-y plane. For every node it stores the
+impact flag and the VALUES: the transfer angle psi from the start to the
+impact site where the last step crosses the surface (as cos and sin), the
+time of that crossing and the closest approach altitude.
+A query rotates the interpolated transfer angle into the query's own
+orbital plane. Speed and distance are interpolated on log axes.
+
+Cells whose corners disagree on hit or miss, whose impact points spread
+by more than SPREAD_DEG, or that straddle a change in the integrator's
+time step are flagged. Queries that land in a flagged cell, or outside the
+grid, are integrated exactly instead.
+
+On disk (ATLAS_DIR) there are impact.npy, shaped (speed, distance,
+approach), and values.npy with the VALUES stacked on a last axis, both
+memory-mapped on load, plus fallback.npy (per cell) and meta.json. The build writes one speed slice per task straight into the
+mapped files, so tasks run in parallel and an interrupted build resumes
+where it stopped. meta.json records ATLAS_VERSION, and an atlas written
+with another version is ignored until it is rebuilt.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from time import perf_counter
+
+import numpy as np
+
+from trajectory import EARTH_RADIUS_KM, initial_states, asteroid_trajectory_batch, impact_latlon
+from lattice import corner_views
+
+ATLAS_VERSION = 2
+ATLAS_DIR = os.environ.get("SIM_ATLAS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "atlas"))
+VALUES = ("cos_psi", "sin_psi", "t_impact", "min_altitude_km")
+FIELDS = ("impact",) + VALUES
+SPREAD_DEG = 5.0   # impact points of one cell further apart than this fall back to integration
+
+# Default grid: (start, stop, count); speed and distance are spaced geometrically
+SPEEDS = (1.0, 72.0, 48)
+DISTANCES = (500.0, 200000.0, 48)
+APPROACHES = (0.0, 180.0, 91)
+
+def _axes(speeds, distances, approaches):
+    return {"speed_kms": np.geomspace(*speeds[:2], int(speeds[2])),
+            "distance_km": np.geomspace(*distances[:2], int(distances[2])),
+            "approach_deg": np.linspace(*approaches[:2], int(approaches[2]))}
+
+def _exact(speed, vel, distance, pos_dir, approach_dir):
+    """Outcomes of exact integration; helper shared by the build and the query fallback.
+
+    speed (N,), vel (N, 3), distance (N,): as initial_states takes them;
+    pos_dir (N, 3) unit start directions, approach_dir (N, 3) unit vectors
+    perpendicular to them in the orbital plane (towards the velocity).
+    Returns the FIELDS as (N,) arrays plus the impact sites on the surface (N, 3).
+    """
+    n = len(speed)
+    out = {"impact": np.zeros(n, dtype=np.uint8), "cos_psi": np.zeros(n), "sin_psi": np.zeros(n),
+           "t_impact": np.full(n, np.nan), "min_altitude_km": np.zeros(n)}
+    final = np.full((n, 3), np.nan)
+    # Bodies receding past their starting altitude on an open orbit never return, so
+    # the escape distance is per scenario; the batch core takes one value per call
+    for d in np.unique(distance):
+        rows = np.flatnonzero(distance == d)
+        _, dt, steps = initial_states(speed[rows], *vel[rows].T, 0.0, 90.0, d)
+        states = np.column_stack([(d + EARTH_RADIUS_KM) * pos_dir[rows], vel[rows]])
+        _, _, impacted, _, min_r, pos, t_site = asteroid_trajectory_batch(
+            states, dt, steps, record=False, escape_km=float(d), closest=True, crossing=True)
+        out["impact"][rows] = impacted
+        out["min_altitude_km"][rows] = np.maximum(min_r - EARTH_RADIUS_KM, 0)
+        hit = rows[impacted]
+        out["t_impact"][hit] = t_site[impacted]
+        out["cos_psi"][hit] = np.sum(pos[impacted] * pos_dir[hit], axis=1)
+        out["sin_psi"][hit] = np.sum(pos[impacted] * approach_dir[hit], axis=1)
+        norm = np.hypot(out["cos_psi"][hit], out["sin_psi"][hit])
+        out["cos_psi"][hit] /= norm
+        out["sin_psi"][hit] /= norm
+        final[hit] = pos[impacted]
+    return out, final
+
+def _build_slice(atlas_dir, index):
+    """Integrate one speed slice of the grid and write it into the mapped field files."""
+    with open(os.path.join(atlas_dir, "meta.json")) as fh:
+        axes = {k: np.asarray(v) for k, v in json.load(fh)["axes"].items()}
+    distance, approach = np.meshgrid(axes["distance_km"], np.radians(axes["approach_deg"]), indexing="ij")
+    distance, approach = distance.ravel(), approach.ravel()
+    speed = np.full(distance.size, axes["speed_kms"][index])
+    vel = speed[:, None] * np.column_stack([np.cos(approach), np.sin(approach), np.zeros_like(approach)])
+    pos_dir = np.broadcast_to([1.0, 0.0, 0.0], vel.shape)
+    approach_dir = np.broadcast_to([0.0, 1.0, 0.0], vel.shape)
+    values, _ = _exact(speed, vel, distance, pos_dir, approach_dir)
+    impact = np.load(os.path.join(atlas_dir, "impact.npy"), mmap_mode="r+")
+    impact[index] = values["impact"].reshape(impact.shape[1:])
+    impact.flush()
+    table = np.load(os.path.join(atlas_dir, "values.npy"), mmap_mode="r+")
+    table[index] = np.stack([values[f] for f in VALUES], axis=-1).reshape(table.shape[1:])
+    table.flush()
+    return index
+
+def _fallback_cells(atlas_dir, axes):
+    """Cells (uint8, 1 = integrate) whose corners disagree, spread, or change time step."""
+    impact = np.load(os.path.join(atlas_dir, "impact.npy")).astype(bool)
+    table = np.load(os.path.join(atlas_dir, "values.npy"))
+    cos_psi, sin_psi = table[..., 0], table[..., 1]
+    hits = corner_views(impact)
+    mixed = np.logical_or.reduce(hits) & ~np.logical_and.reduce(hits)
+    # Angular spread: how far the corners' impact directions stray from their mean
+    cs, sn = corner_views(cos_psi), corner_views(sin_psi)
+    mc, ms = np.mean(cs, axis=0), np.mean(sn, axis=0)
+    norm = np.maximum(np.hypot(mc, ms), 1e-12)
+    worst = np.min([(c * mc + s * ms) / norm for c, s in zip(cs, sn)], axis=0)
+    spread = np.logical_and.reduce(hits) & (worst < np.cos(np.radians(SPREAD_DEG)))
+    # The fixed time step jumps at set distances, so outcomes do too
+    dt = initial_states(1.0, 1.0, 0.0, 0.0, 0.0, 90.0, axes["distance_km"])[1]
+    step_change = (dt[1:] != dt[:-1])[None, :, None]
+    return (mixed | spread | step_change).astype(np.uint8)
+
+def build(atlas_dir=ATLAS_DIR, speeds=SPEEDS, distances=DISTANCES, approaches=APPROACHES, workers=None,
+          log=None):
+    """Build (or finish building) the atlas in atlas_dir; returns the directory.
+
+    A partial build with the same version and grid resumes; anything else
+    is started over. workers processes integrate one speed slice each.
+    """
+    axes = _axes(speeds, distances, approaches)
+    shape = tuple(len(a) for a in axes.values())
+    meta = {"version": ATLAS_VERSION, "fields": list(FIELDS), "shape": list(shape),
+            "axes": {k: v.tolist() for k, v in axes.items()}, "complete": False}
+    os.makedirs(atlas_dir, exist_ok=True)
+    done_path = os.path.join(atlas_dir, "done.npy")
+    try:
+        with open(os.path.join(atlas_dir, "meta.json")) as fh:
+            old = json.load(fh)
+        resume = all(old.get(k) == meta[k] for k in ("version", "fields", "shape", "axes"))
+    except (OSError, ValueError):
+        resume = False
+    if not resume:
+        np.lib.format.open_memmap(os.path.join(atlas_dir, "impact.npy"), mode="w+", dtype=np.uint8,
+                                  shape=shape).flush()
+        np.lib.format.open_memmap(os.path.join(atlas_dir, "values.npy"), mode="w+", dtype=np.float32,
+                                  shape=shape + (len(VALUES),)).flush()
+        np.save(done_path, np.zeros(shape[0], dtype=bool))
+        _write_meta(atlas_dir, meta)
+    done = np.load(done_path)
+
+    todo = [int(i) for i in np.flatnonzero(~done)]
+    workers = workers or os.cpu_count() or 1
+    start = perf_counter()
+    pool = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    try:
+        finished = (pool.map(_build_slice, [atlas_dir] * len(todo), todo) if pool is not None
+                    else (_build_slice(atlas_dir, i) for i in todo))
+        for count, index in enumerate(finished, 1):
+            done[index] = True
+            np.save(done_path, done)
+            if log is not None:
+                log(f"slice {index + 1}/{shape[0]} ({count}/{len(todo)} this run, {perf_counter() - start:.1f} s)")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    np.save(os.path.join(atlas_dir, "fallback.npy"), _fallback_cells(atlas_dir, axes))
+    _write_meta(atlas_dir, dict(meta, complete=True))
+    return atlas_dir
+
+def _write_meta(atlas_dir, meta):
+    with open(os.path.join(atlas_dir, "meta.json.tmp"), "w") as fh:
+        json.dump(meta, fh)
+    os.replace(os.path.join(atlas_dir, "meta.json.tmp"), os.path.join(atlas_dir, "meta.json"))
+
+def _geometry(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km):
+    """Per scenario: speed, velocity, distance, approach angle and the orbital-plane basis."""
+    states, dt, _ = initial_states(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km)
+    pos, vel = states[:, :3], states[:, 3:]
+    pos_dir = pos / np.sqrt(np.sum(pos ** 2, axis=1))[:, None]
+    speed = np.sqrt(np.sum(vel ** 2, axis=1))
+    radial = np.sum(vel * pos_dir, axis=1)
+    tangent = vel - radial[:, None] * pos_dir
+    size = np.sqrt(np.sum(tangent ** 2, axis=1))
+    # Purely radial motion has no orbital plane; any perpendicular direction will do
+    flat = size <= 1e-12 * np.maximum(speed, 1e-300)
+    if flat.any():
+        other = np.where(np.abs(pos_dir[flat, 2:3]) < 0.9, [[0.0, 0.0, 1.0]], [[1.0, 0.0, 0.0]])
+        tangent[flat] = np.cross(pos_dir[flat], other)
+        size[flat] = np.sqrt(np.sum(tangent[flat] ** 2, axis=1))
+    approach_dir = tangent / size[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        approach = np.degrees(np.arccos(np.clip(radial / speed, -1, 1)))
+    distance = np.sqrt(np.sum(pos ** 2, axis=1)) - EARTH_RADIUS_KM
+    return speed, vel, distance, approach, pos_dir, approach_dir, dt
+
+class Atlas:
+    """Memory-mapped atlas (see the module docstring)."""
+
+    def __init__(self, atlas_dir):
+        with open(os.path.join(atlas_dir, "meta.json")) as fh:
+            self.meta = json.load(fh)
+        if self.meta.get("version") != ATLAS_VERSION or not self.meta.get("complete"):
+            raise ValueError(f"atlas in {atlas_dir} is incomplete or version {self.meta.get('version')}, "
+                             f"expected {ATLAS_VERSION}; rebuild it with 'python atlas.py build'")
+        for name in ("impact", "values", "fallback"):
+            setattr(self, name, np.load(os.path.join(atlas_dir, f"{name}.npy"), mmap_mode="r").view(np.ndarray))
+        self.axes = {k: np.asarray(v) for k, v in self.meta["axes"].items()}
+        # interpolation coordinates: log speed, log distance, approach angle
+        self._coords = (np.log(self.axes["speed_kms"]), np.log(self.axes["distance_km"]), self.axes["approach_deg"])
+        # flat offsets and axis bits of a cell's eight corners
+        self._bits = np.array([[(c >> k) & 1 for k in range(3)] for c in range(8)], dtype=bool)
+        self._corners = np.ravel_multi_index(self._bits.T.astype(int), self.impact.shape)
+
+    def _locate(self, speed, distance, approach):
+        """Cell indices (3, N), fractions (3, N) and an in-grid mask."""
+        index, frac, inside = [], [], np.ones(len(speed), dtype=bool)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = (np.log(speed), np.log(distance), approach)
+        for coord, value in zip(self._coords, values):
+            i = np.clip(np.searchsorted(coord, value, side="right") - 1, 0, len(coord) - 2)
+            f = (value - coord[i]) / (coord[i + 1] - coord[i])
+            inside &= (f >= 0) & (f <= 1)   # false for NaN too; f is only used inside
+            index.append(i)
+            frac.append(f)
+        return np.array(index), np.array(frac), inside
+
+    def query(self, speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km, time=0):
+        """Outcomes for scenarios given as initial_states takes them; arrays welcome.
+
+        Returns a dict of (N,) arrays: impact, lat and lon (NaN for misses),
+        t_impact (s, NaN for misses), min_altitude_km and exact, which marks
+        rows that were integrated rather than interpolated.
+        """
+        speed, vel, distance, approach, pos_dir, approach_dir, dt = _geometry(
+            speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km)
+        index, frac, inside = self._locate(speed, distance, approach)
+        exact = ~inside
+        exact[inside] = self.fallback[tuple(index[:, inside])] != 0
+
+        n = len(speed)
+        values = {"impact": np.zeros(n, dtype=bool), "cos_psi": np.zeros(n), "sin_psi": np.zeros(n),
+                  "t_impact": np.full(n, np.nan), "min_altitude_km": np.zeros(n)}
+        rows = np.flatnonzero(~exact)
+        if rows.size:
+            i, f = index[:, rows], frac[:, rows]
+            # outside flagged cells all eight corners agree on hit or miss
+            values["impact"][rows] = self.impact[tuple(i)] != 0
+            weight = np.prod(np.where(self._bits[:, :, None], f[None], 1 - f[None]), axis=1)   # (8, m)
+            flat = np.ravel_multi_index(tuple(i), self.impact.shape)[:, None] + self._corners
+            found = np.einsum("mc,mcv->mv", weight.T, self.values.reshape(-1, len(VALUES))[flat])
+            for k, name in enumerate(VALUES):
+                values[name][rows] = found[:, k]
+        rows = np.flatnonzero(exact)
+        if rows.size:
+            found, _ = _exact(speed[rows], vel[rows], distance[rows], pos_dir[rows], approach_dir[rows])
+            for name in values:
+                values[name][rows] = found[name]
+
+        hit = values["impact"]
+        norm = np.hypot(values["cos_psi"], values["sin_psi"])[hit]
+        point = (values["cos_psi"][hit, None] * pos_dir[hit]
+                 + values["sin_psi"][hit, None] * approach_dir[hit]) / norm[:, None]
+        lat = np.full(n, np.nan)
+        lon = np.full(n, np.nan)
+        time = np.broadcast_to(np.asarray(time, dtype=float), (n,))
+        lat[hit], lon[hit] = impact_latlon(point[:, 0], point[:, 1], point[:, 2], dt[hit], time[hit])
+        values["t_impact"][~hit] = np.nan
+        return {"impact": hit, "lat": lat, "lon": (lon + 180) % 360 - 180, "t_impact": values["t_impact"],
+                "min_altitude_km": values["min_altitude_km"], "exact": exact}
+
+@lru_cache(maxsize=1)
+def get_atlas(atlas_dir=ATLAS_DIR):
+    """Shared Atlas, or None when none has been built (or it needs a rebuild)."""
+    try:
+        return Atlas(atlas_dir)
+    except (OSError, ValueError):
+        return None
+
+def query(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km, time=0):
+    """Atlas.query, integrating every scenario exactly when there is no atlas."""
+    atlas = get_atlas()
+    if atlas is not None:
+        return atlas.query(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km, time)
+    speed, vel, distance, _, pos_dir, approach_dir, dt = _geometry(
+        speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km)
+    values, final = _exact(speed, vel, distance, pos_dir, approach_dir)
+    hit = values["impact"] != 0
+    lat, lon = impact_latlon(final[:, 0], final[:, 1], final[:, 2], dt, time)
+    return {"impact": hit, "lat": np.where(hit, lat, np.nan), "lon": np.where(hit, (lon + 180) % 360 - 180, np.nan),
+            "t_impact": values["t_impact"], "min_altitude_km": values["min_altitude_km"],
+            "exact": np.ones(len(hit), dtype=bool)}
+
+def check(atlas, samples=1000, seed=0):
+    """Random in-grid scenarios through the atlas and through exact integration; error summary dict."""
+    rng = np.random.default_rng(seed)
+    lo = {k: v[0] for k, v in atlas.axes.items()}
+    hi = {k: v[-1] for k, v in atlas.axes.items()}
+    speed = np.exp(rng.uniform(np.log(lo["speed_kms"]), np.log(hi["speed_kms"]), samples))
+    direction = rng.standard_normal((samples, 3))
+    vel = speed[:, None] * direction / np.sqrt(np.sum(direction ** 2, axis=1))[:, None]
+    # whole kilometres, so scenarios share distances and the exact runs batch well
+    distance = np.round(np.exp(rng.uniform(np.log(lo["distance_km"]), np.log(hi["distance_km"]), samples)), -2)
+    distance = np.clip(distance, lo["distance_km"], hi["distance_km"])
+    angle, z_angle = rng.uniform(0, 360, samples), rng.uniform(0, 180, samples)
+    args = (speed, vel[:, 0], vel[:, 1], vel[:, 2], angle, z_angle, distance)
+
+    start = perf_counter()
+    got = atlas.query(*args)
+    atlas_s = perf_counter() - start
+    interp = ~got["exact"]
+    start = perf_counter()
+    atlas.query(*(np.asarray(a)[interp] for a in args))
+    interp_s = perf_counter() - start
+    speed_, vel_, distance_, _, pos_dir, approach_dir, dt = _geometry(*args)
+    start = perf_counter()
+    ref, final = _exact(speed_, vel_, distance_, pos_dir, approach_dir)
+    exact_s = perf_counter() - start
+    ref_hit = ref["impact"] != 0
+    ref_lat, ref_lon = impact_latlon(final[:, 0], final[:, 1], final[:, 2], dt, 0)
+
+    # errors of the interpolated answers only; fallback rows are exact by construction
+    both = got["impact"] & ref_hit & interp
+    lat1, lon1 = np.radians(got["lat"][both]), np.radians(got["lon"][both])
+    lat2, lon2 = np.radians(ref_lat[both]), np.radians(ref_lon[both])
+    cosd = np.sin(lat1) * np.sin(lat2) + np.cos(lat1) * np.cos(lat2) * np.cos(lon1 - lon2)
+    km = EARTH_RADIUS_KM * np.arccos(np.clip(cosd, -1, 1))
+    t_err = np.abs(got["t_impact"][both] - ref["t_impact"][both]) / ref["t_impact"][both]
+    alt_err = np.abs(got["min_altitude_km"] - ref["min_altitude_km"])[interp & ~ref_hit]
+    pct = lambda a, q: float(np.percentile(a, q)) if a.size else 0.0
+    return {"samples": samples, "interpolated": int(interp.sum()),
+            "flag_mismatches": int((got["impact"] != ref_hit).sum()),
+            "impact_km_median": pct(km, 50), "impact_km_p99": pct(km, 99),
+            "t_impact_rel_median": pct(t_err, 50), "t_impact_rel_p99": pct(t_err, 99),
+            "miss_altitude_km_p99": pct(alt_err, 99),
+            "us_per_query": 1e6 * atlas_s / samples,
+            "us_per_interpolated_query": 1e6 * interp_s / max(int(interp.sum()), 1),
+            "us_per_exact_query": 1e6 * exact_s / samples}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the scenario atlas.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="build or resume the atlas")
+    b.add_argument("--out", default=ATLAS_DIR)
+    b.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    b.add_argument("--speeds", type=float, nargs=3, default=SPEEDS, metavar=("LO", "HI", "N"))
+    b.add_argument("--distances", type=float, nargs=3, default=DISTANCES, metavar=("LO", "HI", "N"))
+    b.add_argument("--approaches", type=int, default=APPROACHES[2], help="approach angle samples over 0..180")
+    q = sub.add_parser("query", help="one scenario")
+    for name in ("x_sp", "y_sp", "z_sp", "distance_km", "angle_deg", "z_angle_deg"):
+        q.add_argument(name, type=float)
+    c = sub.add_parser("check", help="atlas against exact integration")
+    c.add_argument("--samples", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(build(args.out, args.speeds, args.distances, (0.0, 180.0, args.approaches), args.workers,
+                    log=lambda line: print(line, file=sys.stderr)))
+    elif args.command == "query":
+        speed = float(np.sqrt(args.x_sp ** 2 + args.y_sp ** 2 + args.z_sp ** 2))
+        result = query(speed, args.x_sp, args.y_sp, args.z_sp, args.angle_deg, args.z_angle_deg, args.distance_km)
+        print(json.dumps({k: (bool(v[0]) if v.dtype == bool else float(v[0])) for k, v in result.items()}))
+    else:
+        atlas = get_atlas()
+        if atlas is None:
+            print("no atlas; run 'python atlas.py build' first", file=sys.stderr)
+            return 1
+        print(json.dumps(check(atlas, args.samples), indent=1))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# batch.py
+"""Headless scenario runner.
+
+Reads scenarios from CSV or JSON lines, runs the physics without building
+any figure and writes one result row per scenario as soon as it is ready:
+
+    python batch.py scenarios.csv results.csv --workers 4
+    python batch.py scenarios.csv results.csv --integrator atlas   # see atlas.py
+    cat scenarios.jsonl | python batch.py - - --out-format jsonl
+
+Scenario columns: x_sp, y_sp, z_sp, distance_km, size_m, angle_deg,
+z_angle_deg and optionally id, type (rocky/metallic/icy), rubble and time.
+Rows are streamed in and out, so memory stays flat whatever the input size.
+Rows with missing or non-finite values get an error instead of a result;
+values a scenario has no answer for are null (JSON lines) or empty (CSV).
+"""
+import argparse
+import csv
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from trajectory import asteroid_trajectory_batch, asteroid_trajectory_adaptive, impact_latlon, initial_states
+from kepler import asteroid_trajectory_kepler
+from physics import impact_physics, STRATEGIES
+
+FIELDS = ("id", "impact", "lat", "lon", "energy_j", "impact_radius_km", "strategy", "error")
+
+def _flag(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "rubble")
+
+def _number(value, digits=None):
+    """Output float, or None (null in JSON lines, empty in CSV) where there is no finite value."""
+    value = float(value)
+    if not np.isfinite(value):
+        return None
+    return round(value, digits) if digits is not None else value
+
+def run_scenario(row, integrator="rk4", tol=1e-6):
+    """Result dict for one scenario dict (values may be strings, as read from CSV)."""
+    x_sp, y_sp, z_sp = float(row["x_sp"]), float(row["y_sp"]), float(row["z_sp"])
+    distance = float(row["distance_km"])
+    size = float(row["size_m"])
+    speed = np.sqrt(x_sp ** 2 + y_sp ** 2 + z_sp ** 2)
+    dtype = str(row.get("type") or "default").lower()
+    rubble = _flag(row.get("rubble", ""))
+    time = float(row.get("time") or 0)
+
+    args = (speed, x_sp, y_sp, z_sp, float(row["angle_deg"]), float(row["z_angle_deg"]), distance)
+    if not np.all(np.isfinite(args + (size, time))):
+        raise ValueError("values must be finite")
+    if integrator == "atlas":
+        # Interpolated rk4 outcome from the prebuilt atlas (integrated when it can't be trusted)
+        from atlas import query
+        found = query(*args, time=time)
+        impact, lat, lon = bool(found["impact"][0]), found["lat"][0], found["lon"][0]
+    elif integrator == "kepler":
+        xs, ys, zs, ts, _ = asteroid_trajectory_kepler(*args, samples=2)
+        dt = float(initial_states(*args)[1][0])   # the fixed-step dt, for the legacy time shift
+    elif integrator == "adaptive":
+        xs, ys, zs, ts, _ = asteroid_trajectory_adaptive(*args, tol=tol)
+        dt = ts[-1] / max(len(ts) - 1, 1)
+    else:
+        # The integrator's own surface check decides the hit; the site is where the last step crossed the surface
+        states, dts, steps = initial_states(*args)
+        _, final, impacted, _, sites, _ = asteroid_trajectory_batch(states, dts, steps, record=False, crossing=True)
+        impact, dt = bool(impacted[0]), float(dts[0])
+        lat, lon = impact_latlon(*(sites[0] if impact else final[0]), dt, time)
+
+    if integrator in ("kepler", "adaptive"):
+        x, y, z = xs[-1], ys[-1], zs[-1]
+        impact = bool(np.sqrt(x**2 + y**2 + z**2) <= 6371 + 1e-6)
+        lat, lon = impact_latlon(x, y, z, dt, time)
+    phys = impact_physics(size, speed, distance, dtype, rubble)
+
+    return {
+        "id": row.get("id", ""),
+        "impact": impact,
+        # no site (atlas misses, an rk4 body with zero speed or distance) is written empty, not NaN
+        "lat": _number(lat, 6),
+        "lon": _number(lon, 6),
+        "energy_j": _number(phys["energy"]),
+        "impact_radius_km": _number(phys["impact_radius"], 4),
+        "strategy": STRATEGIES[int(phys["strategy"])],
+        "error": "",
+    }
+
+def _run_safe(row, integrator, tol):
+    try:
+        return run_scenario(row, integrator, tol)
+    except (KeyError, ValueError, TypeError, ZeroDivisionError, IndexError) as exc:
+        return {"id": row.get("id", ""), "error": f"{type(exc).__name__}: {exc}"}
+
+def _run_chunk(rows, integrator, tol):
+    return [_run_safe(row, integrator, tol) for row in rows]
+
+def read_scenarios(stream, fmt):
+    """Yield scenario dicts one at a time from a CSV or JSON-lines stream."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+def run_batch(rows, integrator="rk4", tol=1e-6, workers=1, chunk_size=64):
+    """Yield results in input order; with workers > 1 at most 2 * workers chunks are in flight."""
+    if workers <= 1:
+        for row in rows:
+            yield _run_safe(row, integrator, tol)
+        return
+
+    rows = iter(rows)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if chunk:
+                pending.append(pool.submit(_run_chunk, chunk, integrator, tol))
+            if pending and (not chunk or len(pending) >= 2 * workers):
+                yield from pending.popleft().result()
+            elif not chunk:
+                break
+
+def _format(path, fmt):
+    if fmt:
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run asteroid impact scenarios without figures.")
+    parser.add_argument("input", help="scenario file, or - for stdin")
+    parser.add_argument("output", nargs="?", default="-", help="result file, or - for stdout")
+    parser.add_argument("--in-format", choices=("csv", "jsonl"))
+    parser.add_argument("--out-format", choices=("csv", "jsonl"))
+    parser.add_argument("--integrator", choices=("rk4", "adaptive", "kepler", "atlas"), default="rk4")
+    parser.add_argument("--tol", type=float, default=1e-6)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, newline="")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    out_fmt = _format(args.output, args.out_format)
+    try:
+        writer = csv.DictWriter(dst, FIELDS, extrasaction="ignore") if out_fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+        rows = read_scenarios(src, _format(args.input, args.in_format))
+        for result in run_batch(rows, args.integrator, args.tol, args.workers, args.chunk_size):
+            if writer:
+                writer.writerow(result)
+            else:
+                dst.write(json.dumps(result) + "\n")
+            dst.flush()
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# benchmarks.py
+"""Reproducible benchmarks for the trajectory core, figure building and the Dash callback.
+
+    python benchmarks.py                       # run and print a table
+    python benchmarks.py --save bench.json     # store a baseline
+    python benchmarks.py --compare bench.json  # flag regressions against it (exit 1)
+
+Every case runs on fixed reference scenarios; the reported figure is the
+median of --repeat runs. Figure cases also record the serialized JSON size,
+and comparisons flag both slower times and larger payloads.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+from time import perf_counter
+
+import numpy as np
+
+# Fixed reference scenarios: (x_sp, y_sp, z_sp, distance_km, size_m, angle_deg, z_angle_deg)
+SCENARIOS = {
+    "short_head_on": (-5.0, -5.0, -7.071, 4000, 500, 45, 45),
+    "long_head_on": (-1.5, -1.5, -2.121, 200000, 500, 45, 45),
+    "grazing_miss": (-1.325, -4.295, -3.974, 30000, 300, 45, 45),
+    "app_default": (2, 2, 2, 20000, 500, 120, 120),
+}
+BATCH_SIZE = 256
+
+def _asteroid(scenario):
+    x_sp, y_sp, z_sp, distance = scenario[:4]
+    return {"speed_km_s": float(np.sqrt(x_sp ** 2 + y_sp ** 2 + z_sp ** 2)),
+            "x_sp": x_sp, "y_sp": y_sp, "z_sp": z_sp, "distance_km": distance}
+
+def _traj_args(scenario):
+    a = _asteroid(scenario)
+    return (a["speed_km_s"], a["x_sp"], a["y_sp"], a["z_sp"], scenario[5], scenario[6], a["distance_km"])
+
+def _time(func, repeat):
+    """Median wall time of func() in seconds, and its last return value."""
+    times, value = [], None
+    for _ in range(repeat):
+        start = perf_counter()
+        value = func()
+        times.append(perf_counter() - start)
+    return statistics.median(times), value
+
+def bench_integration(repeat):
+    from trajectory import (asteroid_trajectory_gravity, asteroid_trajectory_adaptive,
+                            asteroid_trajectory_batch, initial_states)
+    from kepler import asteroid_trajectory_kepler
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        args = _traj_args(scenario)
+        t, out = _time(lambda: asteroid_trajectory_gravity(*args), repeat)
+        results[f"integrate.rk4.{name}"] = {"seconds": t, "points": len(out[0])}
+        t, out = _time(lambda: asteroid_trajectory_adaptive(*args), repeat)
+        results[f"integrate.adaptive.{name}"] = {"seconds": t, "points": len(out[0])}
+        t, out = _time(lambda: asteroid_trajectory_kepler(*args), repeat)
+        results[f"integrate.kepler.{name}"] = {"seconds": t, "points": len(out[0])}
+
+        rng = np.random.default_rng(0)
+        jitter = [np.asarray(v) + (0.01 * rng.standard_normal(BATCH_SIZE) if i < 4 else 0)
+                  for i, v in enumerate(args)]
+        states, dt, steps = initial_states(*jitter)
+        t, _ = _time(lambda: asteroid_trajectory_batch(states, dt, steps, record=False), repeat)
+        results[f"integrate.batch{BATCH_SIZE}.{name}"] = {"seconds": t}
+    return results
+
+def bench_figures(repeat):
+    from visualization import plot_simulation_video, figure_payload_stats
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        for compact in (False, True):
+            build = lambda: plot_simulation_video(_asteroid(scenario), angle_deg=scenario[5],
+                                                  z_angle_deg=scenario[6], body_d=scenario[4], compact=compact)[4]
+            t, fig = _time(build, repeat)
+            ts, payload = _time(lambda: figure_payload_stats(fig), 1)
+            label = "compact" if compact else "full"
+            results[f"figure.build.{label}.{name}"] = {"seconds": t, "frames": payload["frames"]}
+            results[f"figure.json.{label}.{name}"] = {"seconds": ts, "bytes": payload["bytes"]}
+    return results
+
+def bench_callback(repeat):
+    """Full POST to the simulation callback through the Flask test client, cache cleared each time."""
+    os.environ["SIM_CACHE_DIR"] = ""
+    os.environ["SIM_BACKGROUND_STEPS"] = str(10 ** 9)   # keep every scenario in the request
+    import app as dash_app
+
+    key = next(k for k, v in dash_app.app.callback_map.items()
+               if any(i["id"] == "simulate-btn" for i in v["inputs"]))
+    spec = dash_app.app.callback_map[key]
+    outputs = [dict(zip(("id", "property"), o.split("."))) for o in key.strip(".").split("...")]
+    client = dash_app.server.test_client()
+    client.get("/")
+    results = {}
+    for name, scenario in SCENARIOS.items():
+        x_sp, y_sp, z_sp, distance, size, angle, z_angle = scenario
+        values = {"simulate-btn": 1, "xspeed": x_sp, "yspeed": y_sp, "zspeed": z_sp, "distance": distance,
+                  "size": size, "angle": angle, "z_angle": z_angle, "type": "Rocky", "rtype": "Solid", "time": 0}
+        fill = lambda items: [dict(item, value=values.get(item["id"])) for item in items]
+        payload = {"output": key, "outputs": outputs,
+                   "inputs": fill(spec["inputs"]), "state": fill(spec["state"]),
+                   "changedPropIds": ["simulate-btn.n_clicks"]}
+
+        def call():
+            dash_app.sim_cache.clear()
+            response = client.post("/_dash-update-component", json=payload)
+            assert response.status_code == 200, response.status_code
+            return len(response.data)
+
+        t, size_bytes = _time(call, repeat)
+        results[f"callback.{name}"] = {"seconds": t, "bytes": size_bytes}
+    return results
+
+SUITES = {"integration": bench_integration, "figures": bench_figures, "callback": bench_callback}
+
+def compare(results, baseline, tolerance):
+    """Lines describing regressions beyond tolerance (a fraction) against baseline."""
+    problems = []
+    for name, base in baseline.get("results", {}).items():
+        cur = results.get(name)
+        if cur is None:
+            continue
+        if cur["seconds"] > base["seconds"] * (1 + tolerance):
+            problems.append(f"{name}: {base['seconds'] * 1e3:.2f} ms -> {cur['seconds'] * 1e3:.2f} ms")
+        if "bytes" in base and cur.get("bytes", 0) > base["bytes"] * (1 + tolerance):
+            problems.append(f"{name}: {base['bytes']} B -> {cur['bytes']} B")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the asteroid impact simulator.")
+    parser.add_argument("--suite", choices=sorted(SUITES), action="append",
+                        help="run only these suites (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="FILE", help="write results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare with a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth (fraction)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for suite in args.suite or SUITES:
+        results.update(SUITES[suite](args.repeat))
+
+    for name, r in results.items():
+        extra = "  ".join(f"{k}={v}" for k, v in r.items() if k != "seconds")
+        print(f"{name:<45} {r['seconds'] * 1e3:10.2f} ms  {extra}")
+
+    if args.save:
+        from trajectory import get_backend
+        with open(args.save, "w") as fh:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__, "backend": get_backend(),
+                       "machine": platform.machine(), "repeat": args.repeat, "results": results}, fh, indent=1)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            problems = compare(results, json.load(fh), args.tolerance)
+        for line in problems:
+            print("REGRESSION", line)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
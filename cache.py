@@ -0,0 +1,130 @@
+# cache.py
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+def quantize(values, steps):
+    """Round each value to a multiple of its step so nearby inputs share a key."""
+    key = []
+    for value, step in zip(values, steps):
+        if step and isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = round(round(value / step) * step, 10)
+        key.append(value)
+    return tuple(key)
+
+class ResultCache:
+    """LRU cache with size and TTL eviction and an optional on-disk tier.
+
+    The memory tier is per process. The disk tier is one pickle per key in
+    directory, written atomically, so it survives restarts and is shared by
+    every worker process pointing at the same directory.
+    """
+
+    def __init__(self, maxsize=128, ttl=3600, directory=None, max_disk_entries=1024):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = dict(hits=0, disk_hits=0, misses=0, evictions=0, expired=0)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, digest + ".pkl")
+
+    def get(self, key, default=MISSING):
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                stamp, value = item
+                if now - stamp <= self.ttl:
+                    self._items.move_to_end(key)
+                    self._counts["hits"] += 1
+                    return value
+                del self._items[key]
+                self._counts["expired"] += 1
+
+        if self.directory:
+            path = self._path(key)
+            try:
+                if now - os.path.getmtime(path) <= self.ttl:
+                    with open(path, "rb") as fh:
+                        stored_key, value = pickle.load(fh)
+                    if stored_key == key:
+                        self._remember(key, value, os.path.getmtime(path))
+                        with self._lock:
+                            self._counts["disk_hits"] += 1
+                        return value
+                else:
+                    os.remove(path)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+
+        with self._lock:
+            self._counts["misses"] += 1
+        return default
+
+    def _remember(self, key, value, stamp):
+        with self._lock:
+            self._items[key] = (stamp, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self._counts["evictions"] += 1
+
+    def set(self, key, value):
+        self._remember(key, value, time.time())
+        if not self.directory:
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump((key, value), fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except (OSError, pickle.PicklingError, AttributeError, TypeError):
+            #Unwritable directory or unpicklable value: the memory tier still has it
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        """Drop the oldest disk entries beyond max_disk_entries."""
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith(".pkl")]
+        except OSError:
+            return
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+        if self.directory:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".pkl"):
+                    os.remove(entry.path)
+
+    def stats(self):
+        """Hit/miss counters plus current sizes, for sizing the cache."""
+        with self._lock:
+            stats = dict(self._counts, size=len(self._items), maxsize=self.maxsize, ttl=self.ttl)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,75 @@
+# check_backends.py
+"""Parity check between the NumPy and Numba RK4 backends.
+
+    python check_backends.py        # exits with status 1 on a mismatch
+    python -m pytest tests/test_backends.py
+
+Runs the reference scenarios (and a jittered batch around each) on both
+backends and compares trajectories, impact flags, final positions, closest
+approach distances, elapsed times and impact sites. Exits 0 with a note when Numba is
+missing.
+"""
+import importlib.util
+import sys
+
+import numpy as np
+
+import trajectory
+from benchmarks import SCENARIOS, _traj_args
+
+RTOL = 1e-9    # relative, on positions in km
+BATCH = 64
+
+def _run(backend, args, states, dt, steps):
+    trajectory.set_backend(backend)
+    path = trajectory.asteroid_trajectory_gravity(*args)
+    batch = trajectory.asteroid_trajectory_batch(states, dt, steps, record=False,
+                                                 escape_km=args[-1], closest=True, elapsed=True,
+                                                 crossing=True)
+    return path, batch
+
+def jittered_states(args, seed=0):
+    """initial_states for BATCH bodies scattered around one scenario's trajectory args."""
+    rng = np.random.default_rng(seed)
+    jitter = [np.asarray(v) + (0.05 * rng.standard_normal(BATCH) if i < 4 else 0) for i, v in enumerate(args)]
+    return trajectory.initial_states(*jitter)
+
+def compare(name, ref, out):
+    """Lines describing where out differs from ref beyond RTOL."""
+    problems = []
+    (xs, ys, zs, dt), (_, pos, impacted, escaped, min_r, spent, sites, t_site) = ref
+    (xs2, ys2, zs2, dt2), (_, pos2, impacted2, escaped2, min_r2, spent2, sites2, t_site2) = out
+    if len(xs) != len(xs2) or dt != dt2:
+        problems.append(f"{name}: path length {len(xs)} vs {len(xs2)}, dt {dt} vs {dt2}")
+    else:
+        a, b = np.column_stack([xs, ys, zs]), np.column_stack([xs2, ys2, zs2])
+        err = np.max(np.abs(a - b) / np.maximum(np.abs(a), 1.0), initial=0)
+        if err > RTOL:
+            problems.append(f"{name}: path differs by {err:.2e} (relative)")
+    if not (np.array_equal(impacted, impacted2) and np.array_equal(escaped, escaped2)):
+        problems.append(f"{name}: batch impact/escape flags differ")
+    if not np.array_equal(spent, spent2):
+        problems.append(f"{name}: batch elapsed times differ")
+    for label, a, b in (("final positions", pos, pos2), ("closest approach", min_r, min_r2),
+                            ("impact sites", sites, sites2), ("impact times", t_site, t_site2)):
+        if not np.allclose(a, b, rtol=RTOL, atol=1e-6, equal_nan=True):
+            problems.append(f"{name}: batch {label} differ")
+    return problems
+
+def main():
+    if importlib.util.find_spec("numba") is None:
+        print("numba not installed; only the numpy backend is available")
+        return 0
+    problems = []
+    for name, scenario in SCENARIOS.items():
+        args = _traj_args(scenario)
+        states, dt, steps = jittered_states(args)
+        found = compare(name, _run("numpy", args, states, dt, steps), _run("numba", args, states, dt, steps))
+        print(f"{'ok  ' if not found else 'FAIL'} {name}")
+        problems += found
+    for line in problems:
+        print("MISMATCH", line)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
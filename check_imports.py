@@ -0,0 +1,46 @@
+# check_imports.py
+"""Import-time budget for the compute core.
+
+    python check_imports.py        # exits with status 1 when over budget
+    python -m pytest tests/test_imports.py
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+(best of a few runs) and its cumulative import time is compared with its
+budget. The core modules must also not pull in the plotting, raster or HTTP
+stacks, which are only loaded lazily by the code that needs them.
+"""
+import subprocess
+import sys
+
+# Cumulative import time budgets in milliseconds (NumPy alone is ~100 ms)
+BUDGETS_MS = {"physics": 250, "trajectory": 250, "montecarlo": 300, "batch": 300, "corridor": 300, "kepler": 250, "geocode": 250, "atlas": 300}
+HEAVY = ("plotly", "PIL", "tifffile", "requests", "dash", "flask")
+RUNS = 3
+
+def measure(module):
+    """(best cumulative import time in ms, heavy modules loaded) for one module."""
+    best, loaded = None, []
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    for _ in range(RUNS):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                              capture_output=True, text=True, check=True)
+        loaded = proc.stdout.split()
+        for line in proc.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module:
+                ms = int(parts[1]) / 1000
+                best = ms if best is None else min(best, ms)
+    return best, loaded
+
+def main():
+    failed = False
+    for module, budget in BUDGETS_MS.items():
+        ms, loaded = measure(module)
+        ok = ms <= budget and not loaded
+        failed |= not ok
+        extra = f"  loads {', '.join(loaded)}" if loaded else ""
+        print(f"{'ok  ' if ok else 'FAIL'} {module:<12} {ms:7.1f} ms / {budget} ms{extra}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
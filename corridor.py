@@ -0,0 +1,125 @@
+# corridor.py
+"""Impact corridor: which approach geometries hit, over a whole angle grid.
+
+The starting position is swept over a lattice of (z_angle_deg, angle_deg)
+and optionally speed, with the body's velocity direction held fixed. Every
+lattice point runs through the batch trajectory core; no figures are built.
+Refinement is progressive: the coarse lattice is evaluated first, then each
+level halves the spacing but only evaluates points in cells whose corners
+disagree on hit or miss. All other new points take their values from the
+nearest coarser point, and the evaluated mask records which values are exact.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from trajectory import EARTH_RADIUS_KM, initial_states, asteroid_trajectory_batch, impact_latlon
+from lattice import corner_views
+
+FIELDS = ("impact", "lat", "lon", "min_altitude_km")
+
+def evaluate_points(asteroid, points, time=0):
+    """Impact flag, lat, lon and closest approach altitude (km) for (M, 2|3) lattice points.
+
+    Columns of points are z_angle_deg, angle_deg and optionally speed_kms;
+    lat and lon are NaN for misses.
+    """
+    points = np.asarray(points, dtype=float)
+    v = np.array([asteroid["x_sp"], asteroid["y_sp"], asteroid["z_sp"]], dtype=float)
+    speed = np.sqrt(np.sum(v ** 2))
+    scale = points[:, 2] / speed if points.shape[1] > 2 else np.ones(len(points))
+    states, dt, steps = initial_states(speed * scale, v[0] * scale, v[1] * scale, v[2] * scale,
+                                       points[:, 1], points[:, 0], asteroid["distance_km"])
+    # Unbound bodies receding past the starting altitude never come back, so stop there
+    _, _, impacted, _, min_r, sites, _ = asteroid_trajectory_batch(
+        states, dt, steps, record=False, escape_km=asteroid["distance_km"], closest=True, crossing=True)
+
+    lat = np.full(len(points), np.nan)
+    lon = np.full(len(points), np.nan)
+    hit = sites[impacted]
+    lat[impacted], lon[impacted] = impact_latlon(hit[:, 0], hit[:, 1], hit[:, 2], dt[impacted], time)
+    lon = (lon + 180) % 360 - 180
+    return {"impact": impacted, "lat": lat, "lon": lon,
+            "min_altitude_km": np.maximum(min_r - EARTH_RADIUS_KM, 0)}
+
+def _evaluate_parallel(asteroid, points, time, pool, chunk_size):
+    if pool is None or len(points) <= chunk_size:
+        return evaluate_points(asteroid, points, time)
+    chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+    parts = list(pool.map(evaluate_points, [asteroid] * len(chunks), chunks, [time] * len(chunks)))
+    return {f: np.concatenate([p[f] for p in parts]) for f in FIELDS}
+
+def _upsample(a):
+    """Lattice with every axis refined 2n-1; new points copy their lower neighbour."""
+    for axis in range(a.ndim):
+        a = np.take(a, np.arange(2 * a.shape[axis] - 1) // 2, axis=axis)
+    return a
+
+def _boundary_points(impact):
+    """Mask of the refined lattice's points that lie in cells straddling the hit/miss boundary."""
+    corners = corner_views(impact)
+    mixed = np.logical_or.reduce(corners) & ~np.logical_and.reduce(corners)
+    for axis in range(mixed.ndim):
+        mixed = np.repeat(mixed, 2, axis=axis)
+    return np.logical_or.reduce(corner_views(np.pad(mixed, 1)))
+
+def corridor_stream(asteroid, angles=(0, 360, 25), z_angles=(0, 180, 13), speeds=None, levels=2,
+                    time=0, workers=None, chunk_size=256):
+    """Corridor results after the coarse pass and after every refinement level.
+
+    angles and z_angles are (start, stop, count) for the coarse lattice;
+    speeds, when given, adds a third axis of speeds in km/s. Each yielded
+    dict holds the axis values, the lattice fields impact, lat, lon and
+    min_altitude_km shaped (speed?, z_angle, angle), the evaluated mask,
+    the refinement level and the number of trajectories run so far.
+    """
+    axes = {"z_angle_deg": np.linspace(*z_angles), "angle_deg": np.linspace(*angles)}
+    if speeds is not None:
+        axes = {"speed_kms": np.linspace(*speeds), **axes}
+
+    workers = workers or os.cpu_count() or 1
+    pool = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    try:
+        grid = _lattice(axes)
+        values = _evaluate_parallel(asteroid, grid.reshape(-1, grid.shape[-1]), time, pool, chunk_size)
+        fields = {f: values[f].reshape(grid.shape[:-1]) for f in FIELDS}
+        evaluated = np.ones(grid.shape[:-1], dtype=bool)
+        runs = evaluated.size
+        yield _result(axes, fields, evaluated, 0, runs)
+
+        for level in range(1, levels + 1):
+            axes = {name: np.linspace(a[0], a[-1], 2 * len(a) - 1) for name, a in axes.items()}
+            todo = _boundary_points(fields["impact"])
+            fields = {f: _upsample(a) for f, a in fields.items()}
+            exact = np.zeros(todo.shape, dtype=bool)
+            exact[(slice(None, None, 2),) * exact.ndim] = evaluated
+            evaluated = exact
+            todo &= ~evaluated
+            if todo.any():
+                values = _evaluate_parallel(asteroid, _lattice(axes)[todo], time, pool, chunk_size)
+                for f in FIELDS:
+                    fields[f][todo] = values[f]
+                evaluated |= todo
+                runs += int(todo.sum())
+            yield _result(axes, fields, evaluated, level, runs)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+def _lattice(axes):
+    """Lattice points shaped (*lattice, 2|3) with columns z_angle_deg, angle_deg[, speed_kms]."""
+    grid = np.stack(np.meshgrid(*axes.values(), indexing="ij"), axis=-1)
+    return grid[..., [1, 2, 0]] if "speed_kms" in axes else grid
+
+def _result(axes, fields, evaluated, level, runs):
+    return dict(axes={k: v.copy() for k, v in axes.items()}, **{f: a.copy() for f, a in fields.items()},
+                evaluated=evaluated.copy(), level=level, runs=runs,
+                hit_fraction=float(fields["impact"].mean()))
+
+def corridor(asteroid, **kwargs):
+    """Final (most refined) result of corridor_stream."""
+    result = None
+    for result in corridor_stream(asteroid, **kwargs):
+        pass
+    return result
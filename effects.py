@@ -1,27 +1,109 @@
 import numpy as np
 
+from physics import kinetic_energy, impact_radius, TNT_J_PER_TON
+from population import haversine, affected_population
+from trajectory import EARTH_RADIUS_KM
+
+def impact_energy(size_m, speed_km_s, dtype = "default"):
+    # Kinetic energy in Joules; size_m and speed_km_s may be NumPy arrays
+    return kinetic_energy(size_m, speed_km_s, dtype)
+
 def body_sim(asteroid, dtype = "default"):
-    # Calculate mass (assume density = 3000 kg/m^3, spherical)
-    radius = asteroid["size_m"] / 2
-    volume = (4/3) * np.pi * radius**3
-    if dtype == "default":
-    	rho = 3000
-    elif dtype == "rocky":
-    	rho = 3300
-    elif dtype == "metallic":
-    	rho = 4200
-    elif dtype == "icy":
-    	rho = 1200
-    else :
-    	rho = 3000 
-    mass = rho * volume
-
-    # Kinetic energy in Joules
-    energy = 0.5 * mass * asteroid["speed_km_s"]**2 * 1e6  # km/s -> m/s conversion squared
-
-    # Estimate impact radius in km (simplified)
-    impact_radius = (energy / 1e15)**0.33 * 10  # rough scaling
-    
-    rnd_energy= f"{energy:.2e}"
-
-    return rnd_energy, impact_radius
+    # Kinetic energy in Joules and rough impact radius in km (density from physics.MATERIALS)
+    energy = impact_energy(asteroid["size_m"], asteroid["speed_km_s"], dtype)
+    return float(energy), float(impact_radius(energy))
+
+# Severity rings, least to most severe; a raster cell's severity is the
+# 1-based position of the most severe ring that reaches it (0 = unaffected)
+EFFECTS = ("seismic", "thermal", "overpressure", "crater")
+EFFECT_LABELS = {
+    "seismic": "Damaging shaking (magnitude 5+)",
+    "thermal": "Third-degree burns",
+    "overpressure": "Building collapse (5 psi)",
+    "crater": "Crater",
+}
+
+# Scaling tables: ring radius (km) against log10 of the energy (J), built once
+# and interpolated in log-log space at runtime
+LOG_ENERGY = np.linspace(8, 27, 381)
+
+def _seismic_radius(log_e, threshold=5.0):
+    # Effective magnitude falls off with range as in Collins et al. (2005),
+    # with the far-field term joined continuously at 700 km
+    r = np.logspace(-1, np.log10(np.pi * EARTH_RADIUS_KM), 4000)
+    drop = np.select([r < 60, r < 700],
+                     [0.0238 * r, 0.0048 * r + 1.1644],
+                     0.0048 * 700 + 1.1644 + 1.66 * np.log10(r / 700))
+    magnitude = 0.67 * log_e[:, None] - 5.87
+    reach = magnitude - drop[None, :] >= threshold
+    last = np.where(reach.any(axis=1), reach.shape[1] - 1 - np.argmax(reach[:, ::-1], axis=1), -1)
+    return np.where(last >= 0, r[np.maximum(last, 0)], 0.0)
+
+def _thermal_radius(energy, efficiency=3e-3):
+    # Radiant exposure eta * E / (2 pi r^2) against the third-degree burn threshold
+    threshold = 4.2e5 * (energy / (1e6 * TNT_J_PER_TON)) ** (1 / 6)   # J/m², grows with yield
+    return np.sqrt(efficiency * energy / (2 * np.pi * threshold)) / 1000
+
+def _overpressure_radius(energy):
+    # 5 psi range of a 1 kt surface burst, cube-root scaled with yield
+    return 0.56 * (energy / (1e3 * TNT_J_PER_TON)) ** (1 / 3)
+
+def _crater_radius(energy, speed=20e3, density_i=3000.0, density_t=2500.0, angle_deg=45.0, gravity=9.81):
+    # Pi-group crater scaling (Collins et al. 2005) for a typical stony impactor at speed m/s
+    diameter = (12 * energy / (np.pi * density_i * speed ** 2)) ** (1 / 3)
+    transient = (1.161 * (density_i / density_t) ** (1 / 3) * diameter ** 0.78 * speed ** 0.44
+                 * gravity ** -0.22 * np.sin(np.radians(angle_deg)) ** (1 / 3)) / 1000
+    # Simple craters until 3.2 km, then complex; the complex formula starts below 3.2 km,
+    # so the rim holds at 3.2 km until it catches up and the radius never shrinks with energy
+    final = np.maximum(np.minimum(1.25 * transient, 3.2), 1.17 * transient ** 1.13 / 3.2 ** 0.13)
+    return final / 2
+
+def _build_tables():
+    energy = 10.0 ** LOG_ENERGY
+    radii = np.stack([_seismic_radius(LOG_ENERGY), _thermal_radius(energy),
+                      _overpressure_radius(energy), _crater_radius(energy)])
+    return np.log10(np.clip(radii, 1e-6, np.pi * EARTH_RADIUS_KM))
+
+LOG_RADIUS = _build_tables()   # (len(EFFECTS), len(LOG_ENERGY))
+
+def effect_radii(energy):
+    """Ring radii in km, shape (..., len(EFFECTS)), for energies in Joules (scalar or array)."""
+    log_e = np.log10(np.maximum(np.asarray(energy, dtype=float), 1.0))
+    radii = [10 ** np.interp(log_e, LOG_ENERGY, row) for row in LOG_RADIUS]
+    radii = np.stack(radii, axis=-1)
+    return np.where(log_e[..., None] < LOG_ENERGY[0], 0.0, radii)
+
+def effects_raster(lat, lon, energy, cells=241):
+    """Severity raster on a local lat/lon window around an impact, in one vectorized pass.
+
+    The window just covers the largest ring and always has cells x cells
+    points, so the cost depends on the resolution asked for, not on the
+    body. Returns a dict with lat and lon axes (lon may run past +-180),
+    severity (uint8, indices into EFFECTS plus one) and radii_km per effect.
+    """
+    radii = effect_radii(energy)
+    reach = max(float(radii.max()) * 1.05, 1.0)
+    half_lat = np.degrees(reach / EARTH_RADIUS_KM)
+    lat0, lat1 = max(lat - half_lat, -90.0), min(lat + half_lat, 90.0)
+    widest = np.cos(np.radians(max(abs(lat0), abs(lat1))))
+    half_lon = 180.0 if widest < 1e-6 else min(half_lat / widest, 180.0)
+
+    lats = np.linspace(lat0, lat1, cells)
+    lons = np.linspace(lon - half_lon, lon + half_lon, cells)
+    distance = haversine(lat, lon, lats[:, None], lons[None, :])
+    severity = np.zeros(distance.shape, dtype=np.uint8)
+    for level, radius in enumerate(radii, 1):
+        severity[distance <= radius] = level
+    return {"lat": lats, "lon": lons, "severity": severity,
+            "radii_km": dict(zip(EFFECTS, (float(r) for r in radii)))}
+
+def ring_exposure(lat, lon, energy):
+    """People inside each ring (cumulative discs) from the population raster, or None without one."""
+    radii = effect_radii(energy)
+    counts = {}
+    for name, radius in zip(EFFECTS, radii):
+        people = affected_population(lat, lon, float(radius)) if radius > 0 else 0.0
+        if people is None:
+            return None
+        counts[name] = float(people)
+    return counts
@@ -0,0 +1,262 @@
+# geocode.py
+"""Offline reverse geocoding: region (continent, sea or ocean) and nearest city.
+
+    python geocode.py build              # (re)build the index
+    python geocode.py 48.8 2.3           # label one point
+
+The bundled data lives in geodata/: cities.csv and regions.json, which holds
+coarse outlines listed in lookup priority order. Anything outside every
+outline is the fallback region, the Pacific. The data is only good for
+labelling. The country reported for a point is the country of its nearest
+listed city.
+
+build_index() turns the data into .npy files under geodata/index/<hash>/,
+named after a hash of the data, which are memory-mapped on load:
+
+- a 1-degree grid holding one region id for every cell that lies wholly
+  inside one region, so most lookups are a single array read
+- for boundary cells, a candidate mask of polygons; points there get an
+  exact point-in-polygon test against those candidates only
+- city unit vectors; the nearest city is the largest dot product, taken
+  in chunks so a million points never need a million-by-cities matrix
+
+The index is rebuilt automatically when the data files change. Builds go
+to a private temporary directory that is renamed into place, so processes
+building at the same time never write files another one has mapped.
+"""
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+from trajectory import EARTH_RADIUS_KM
+
+DATA_DIR = os.environ.get("GEODATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "geodata"))
+INDEX_VERSION = 1
+CELL_DEG = 1.0
+CHUNK = 65536
+
+def _source_hash(data_dir):
+    h = hashlib.sha256(str(INDEX_VERSION).encode())
+    for name in ("cities.csv", "regions.json"):
+        with open(os.path.join(data_dir, name), "rb") as fh:
+            h.update(fh.read())
+    return h.hexdigest()[:16]
+
+def _unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+def _inside(lon, lat, vertices):
+    """Even-odd point-in-polygon test for arrays of points against one (V, 2) ring."""
+    x0, y0 = vertices[:, 0], vertices[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    inside = np.zeros(len(lon), dtype=bool)
+    step = max(1, CHUNK // max(len(vertices), 1))
+    with np.errstate(divide="ignore", invalid="ignore"):   # horizontal edges never count as crossings
+        slope = (x1 - x0) / (y1 - y0)
+        for s in range(0, len(lon), step):
+            px, py = lon[s:s + step, None], lat[s:s + step, None]
+            cross = ((y0 > py) != (y1 > py)) & (px < slope * (py - y0) + x0)
+            inside[s:s + step] = np.count_nonzero(cross, axis=1) % 2 == 1
+    return inside
+
+def _index_dir(data_dir):
+    return os.path.join(data_dir, "index", _source_hash(data_dir))
+
+def build_index(data_dir=DATA_DIR, out_dir=None):
+    """Build the grid, polygon and city arrays from the bundled data; returns the index directory.
+
+    Writes in place; ensure_index() is the safe way to (re)build a shared index.
+    """
+    out_dir = out_dir or _index_dir(data_dir)
+    with open(os.path.join(data_dir, "regions.json")) as fh:
+        doc = json.load(fh)
+    with open(os.path.join(data_dir, "cities.csv"), newline="") as fh:
+        cities = list(csv.DictReader(fh))
+
+    regions = doc["regions"] + [doc["fallback"]]
+    fallback = len(regions) - 1
+    rings, ring_region = [], []
+    for rid, region in enumerate(doc["regions"]):
+        for poly in region["polygons"]:
+            rings.append(np.asarray(poly, dtype=float))
+            ring_region.append(rid)
+    ring_region = np.asarray(ring_region, dtype=np.int16)
+    offsets = np.cumsum([0] + [len(r) for r in rings]).astype(np.int64)
+
+    # Region at every cell centre, by priority
+    nlat, nlon = int(180 / CELL_DEG), int(360 / CELL_DEG)
+    clat = 90 - (np.arange(nlat) + 0.5) * CELL_DEG
+    clon = -180 + (np.arange(nlon) + 0.5) * CELL_DEG
+    glat, glon = [a.ravel() for a in np.meshgrid(clat, clon, indexing="ij")]
+    contains = np.stack([_inside(glon, glat, ring) for ring in rings], axis=-1).reshape(nlat, nlon, len(rings))
+    grid = np.full((nlat, nlon), fallback, dtype=np.int16)
+    for k in range(len(rings) - 1, -1, -1):   # highest priority written last
+        grid[contains[..., k]] = ring_region[k]
+
+    # Cells touched by an outline edge (or next to one) need the exact test
+    candidates = np.zeros((nlat, nlon, len(rings)), dtype=bool)
+    for k, ring in enumerate(rings):
+        a, b = ring, np.roll(ring, -1, axis=0)
+        n = np.maximum(np.ceil(np.max(np.abs(b - a), axis=1) / (CELL_DEG / 4)), 1).astype(int)
+        t = np.concatenate([np.linspace(0, 1, m + 1) for m in n])
+        seg = np.repeat(np.arange(len(a)), n + 1)
+        pts = a[seg] + (b[seg] - a[seg]) * t[:, None]
+        rows = np.clip(((90 - pts[:, 1]) // CELL_DEG).astype(int), 0, nlat - 1)
+        cols = np.clip(((pts[:, 0] + 180) // CELL_DEG).astype(int), 0, nlon - 1)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                candidates[np.clip(rows + dr, 0, nlat - 1), (cols + dc) % nlon, k] = True
+    boundary = candidates.any(axis=2)
+    candidates |= contains   # rings enclosing a boundary cell without an edge in it still compete
+    cell_ids = np.full((nlat, nlon), -1, dtype=np.int32)
+    cell_ids[boundary] = np.arange(np.count_nonzero(boundary))
+    grid[boundary] = -1
+
+    os.makedirs(out_dir, exist_ok=True)
+    names = [c["name"] for c in cities]
+    np.save(os.path.join(out_dir, "grid.npy"), grid)
+    np.save(os.path.join(out_dir, "boundary_cells.npy"), cell_ids)
+    np.save(os.path.join(out_dir, "boundary_candidates.npy"), candidates[boundary])
+    np.save(os.path.join(out_dir, "ring_vertices.npy"), np.concatenate(rings))
+    np.save(os.path.join(out_dir, "ring_offsets.npy"), offsets)
+    np.save(os.path.join(out_dir, "ring_region.npy"), ring_region)
+    np.save(os.path.join(out_dir, "city_xyz.npy"),
+            _unit_vectors(np.array([float(c["lat"]) for c in cities]), np.array([float(c["lon"]) for c in cities])))
+    meta = {"version": INDEX_VERSION, "source": _source_hash(data_dir), "cell_deg": CELL_DEG,
+            "regions": [{k: r[k] for k in ("name", "kind", "split_by_hemisphere")} for r in regions],
+            "cities": names, "countries": [c["country"] for c in cities]}
+    with open(os.path.join(out_dir, "meta.json.tmp"), "w") as fh:
+        json.dump(meta, fh)
+    os.replace(os.path.join(out_dir, "meta.json.tmp"), os.path.join(out_dir, "meta.json"))
+    return out_dir
+
+class Geocoder:
+    """Memory-mapped reverse-geocoding index (see the module docstring)."""
+
+    ARRAYS = ("grid", "boundary_cells", "boundary_candidates", "ring_vertices",
+              "ring_offsets", "ring_region", "city_xyz")
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, "meta.json")) as fh:
+            self.meta = json.load(fh)
+        for name in self.ARRAYS:
+            # plain ndarray views of the mapped files: same pages, without np.memmap's per-call overhead
+            setattr(self, name, np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r").view(np.ndarray))
+        self.cell_deg = self.meta["cell_deg"]
+        self.regions = self.meta["regions"]
+
+    def regions_of(self, lat, lon):
+        """Region ids (indices into self.regions) for arrays of points."""
+        # the poles lie on the edge of the polar outlines, which the even-odd test leaves outside
+        lat = np.clip(np.asarray(lat, dtype=float).ravel(), -90 + 1e-9, 90 - 1e-9)
+        lon = (np.asarray(lon, dtype=float).ravel() + 180) % 360 - 180
+        nlat, nlon = self.grid.shape
+        rows = np.clip(((90 - lat) // self.cell_deg).astype(int), 0, nlat - 1)
+        cols = np.clip(((lon + 180) // self.cell_deg).astype(int), 0, nlon - 1)
+        region = np.asarray(self.grid[rows, cols]).astype(np.int16)
+
+        todo = np.flatnonzero(region < 0)
+        if todo.size:
+            cand = self.boundary_candidates[self.boundary_cells[rows[todo], cols[todo]]]
+            found = np.full(todo.size, len(self.regions) - 1, dtype=np.int16)
+            unresolved = np.ones(todo.size, dtype=bool)
+            # rings are stored in priority order, so the first ring that contains a point wins
+            for k in np.flatnonzero(cand.any(axis=0)):
+                sel = np.flatnonzero(unresolved & cand[:, k])
+                if not sel.size:
+                    continue
+                ring = np.asarray(self.ring_vertices[self.ring_offsets[k]:self.ring_offsets[k + 1]])
+                hit = sel[_inside(lon[todo[sel]], lat[todo[sel]], ring)]
+                found[hit] = self.ring_region[k]
+                unresolved[hit] = False
+            region[todo] = found
+        return region
+
+    def nearest_cities(self, lat, lon):
+        """(city index, great-circle distance in km) for arrays of points."""
+        xyz = _unit_vectors(np.asarray(lat, dtype=float).ravel(), np.asarray(lon, dtype=float).ravel())
+        cities = np.asarray(self.city_xyz)
+        index = np.empty(len(xyz), dtype=np.int32)
+        best = np.empty(len(xyz))
+        for s in range(0, len(xyz), CHUNK):
+            dots = xyz[s:s + CHUNK] @ cities.T
+            index[s:s + CHUNK] = np.argmax(dots, axis=1)
+            best[s:s + CHUNK] = dots[np.arange(len(dots)), index[s:s + CHUNK]]
+        return index, EARTH_RADIUS_KM * np.arccos(np.clip(best, -1, 1))
+
+    def lookup(self, lat, lon):
+        """Vectorized labels: dict of region, city (indices) and city_km arrays."""
+        city, km = self.nearest_cities(lat, lon)
+        return {"region": self.regions_of(lat, lon), "city": city, "city_km": km}
+
+    def region_name(self, region, lat):
+        r = self.regions[region]
+        if r["split_by_hemisphere"]:
+            return ("North " if lat >= 0 else "South ") + r["name"]
+        return r["name"]
+
+    def describe(self, lat, lon):
+        """One readable label, e.g. 'North Atlantic Ocean, 820 km from Lisbon, Portugal'."""
+        found = self.lookup([lat], [lon])
+        region, city, km = int(found["region"][0]), int(found["city"][0]), float(found["city_km"][0])
+        name = self.region_name(region, lat)
+        place = f"{self.meta['cities'][city]}, {self.meta['countries'][city]}"
+        if self.regions[region]["kind"] == "land" and km < 50:
+            return f"{place} ({name})"
+        return f"{name}, {km:,.0f} km from {place}"
+
+def ensure_index(data_dir=DATA_DIR):
+    """Index directory for the current data, building it first if there is none."""
+    index_dir = _index_dir(data_dir)
+    if os.path.exists(os.path.join(index_dir, "meta.json")):
+        return index_dir
+    parent = os.path.dirname(index_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".build-", dir=parent)
+    try:
+        build_index(data_dir, tmp)
+        os.chmod(tmp, 0o755)
+        try:
+            os.rename(tmp, index_dir)
+        except OSError:   # another process finished first; its index is the same
+            pass
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    # Indexes of older data (processes that still map them keep their pages)
+    for name in os.listdir(parent):
+        path = os.path.join(parent, name)
+        if name != os.path.basename(index_dir) and not name.startswith(".build-"):
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    return index_dir
+
+@lru_cache(maxsize=1)
+def get_geocoder(data_dir=DATA_DIR):
+    """Shared Geocoder, building the index first if it is missing or stale; None without data."""
+    if not os.path.exists(os.path.join(data_dir, "regions.json")):
+        return None
+    return Geocoder(ensure_index(data_dir))
+
+def describe(lat, lon):
+    """Readable place label for one point, or "" when no geodata is available."""
+    geocoder = get_geocoder()
+    return geocoder.describe(lat, lon) if geocoder is not None else ""
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["build"]:
+        print(ensure_index())
+    else:
+        print(describe(float(sys.argv[1]), float(sys.argv[2])))
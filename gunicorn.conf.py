@@ -0,0 +1,12 @@
+# gunicorn.conf.py
+# Pre-fork settings for wsgi:server; every value can be overridden from the environment
+import multiprocessing
+import os
+
+bind = os.environ.get("SIM_BIND", "0.0.0.0:" + os.environ.get("PORT", "8050"))
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("SIM_THREADS", 1))
+# Load the app (and its memory-mapped assets) in the master, then fork
+preload_app = True
+timeout = int(os.environ.get("SIM_TIMEOUT", 120))
+accesslog = os.environ.get("SIM_ACCESS_LOG") or None
@@ -0,0 +1,209 @@
+# jobs.py
+"""Background simulation jobs in a local process pool.
+
+Job state lives in a SQLite file (no broker), so every web worker process and
+every pool process sees the same jobs. A job's id is derived from its key, so
+submitting an identical scenario again returns the existing job instead of
+starting a new one.
+
+Whoever holds a live job touches its row every HEARTBEAT_INTERVAL: the
+submitting process while it is queued, the pool process while it runs. A
+queued or running row left untouched for HEARTBEAT_TIMEOUT belongs to a
+process that died; it reads as an error and the next submission replaces it.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing, contextmanager
+
+from trajectory import SimulationCancelled
+
+JOB_TTL = 24 * 3600   # finished jobs are kept this long (seconds)
+PROGRESS_INTERVAL = 0.25   # minimum seconds between progress writes
+HEARTBEAT_INTERVAL = 5     # seconds between touches of a live job's row
+HEARTBEAT_TIMEOUT = 30     # a live job untouched this long is dead (seconds)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    steps INTEGER DEFAULT 0,
+    frames INTEGER DEFAULT 0,
+    created REAL,
+    updated REAL,
+    error TEXT,
+    key BLOB,
+    result BLOB
+)
+"""
+
+def job_id(key):
+    return hashlib.sha256(repr(key).encode()).hexdigest()[:20]
+
+class JobStore:
+    """Job rows in a SQLite database file shared between processes."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3's own context manager commits or rolls back but leaves the connection open
+        with closing(sqlite3.connect(self.path, timeout=30)) as db, db:
+            yield db
+
+    def create(self, jid, key):
+        """Insert a queued job; False if a live job with this id already exists."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("DELETE FROM jobs WHERE updated < ? OR (id = ? AND (status IN ('error', 'cancelled') "
+                       "OR (status IN ('queued', 'running') AND updated < ?)))",
+                       (now - JOB_TTL, jid, now - HEARTBEAT_TIMEOUT))
+            cur = db.execute("INSERT OR IGNORE INTO jobs (id, status, created, updated, key) VALUES (?, 'queued', ?, ?, ?)",
+                             (jid, now, now, pickle.dumps(key)))
+            return cur.rowcount == 1
+
+    def update(self, jid, **fields):
+        fields["updated"] = time.time()
+        if "result" in fields:
+            fields["result"] = pickle.dumps(fields["result"], protocol=pickle.HIGHEST_PROTOCOL)
+        names = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as db:
+            db.execute(f"UPDATE jobs SET {names} WHERE id = ?", (*fields.values(), jid))
+
+    def touch(self, jids, status):
+        """Heartbeat: mark the jobs among jids that are still in status as updated now."""
+        with self._connect() as db:
+            db.executemany("UPDATE jobs SET updated = ? WHERE id = ? AND status = ?",
+                           [(time.time(), jid, status) for jid in jids])
+
+    def fail(self, jid, error):
+        """Record error for a job that is still queued or running."""
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status = 'error', error = ?, updated = ? "
+                       "WHERE id = ? AND status IN ('queued', 'running')", (error, time.time(), jid))
+
+    def status(self, jid):
+        """Dict with status, steps, frames, created, updated and error, or None."""
+        with self._connect() as db:
+            row = db.execute("SELECT status, steps, frames, created, updated, error FROM jobs WHERE id = ?",
+                             (jid,)).fetchone()
+        if row is None:
+            return None
+        status = dict(zip(("status", "steps", "frames", "created", "updated", "error"), row), id=jid)
+        if status["status"] in ("queued", "running") and status["updated"] < time.time() - HEARTBEAT_TIMEOUT:
+            status.update(status="error", error="the process running the job stopped")
+        return status
+
+    def result(self, jid):
+        """(key, result) of a finished job, or None."""
+        with self._connect() as db:
+            row = db.execute("SELECT key, result FROM jobs WHERE id = ? AND status = 'done'", (jid,)).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), pickle.loads(row[1])
+
+def _run_job(store_path, jid, func, args):
+    """Pool entry point: run func(*args, progress=...) and record progress and the result."""
+    store = JobStore(store_path)
+    store.update(jid, status="running")
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(store, [jid], "running", stop), daemon=True)
+    beat.start()
+    last = [0.0]
+    counts = {"steps": 0, "frames": 0}
+
+    def progress(steps, frames):
+        counts.update(steps=int(steps), frames=int(frames))
+        now = time.monotonic()
+        if now - last[0] >= PROGRESS_INTERVAL:
+            last[0] = now
+            store.update(jid, **counts)
+
+    try:
+        try:
+            result = func(*args, progress=progress)
+        finally:
+            stop.set()
+            beat.join()
+    except SimulationCancelled:
+        store.update(jid, status="cancelled")
+    except Exception as exc:
+        store.update(jid, status="error", error=f"{type(exc).__name__}: {exc}")
+    else:
+        store.update(jid, status="done", result=result, **counts)
+
+def _heartbeat(store, jids, status, stop):
+    """Touch the jobs in jids while they are in status, until stop is set."""
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        store.touch(list(jids), status)
+
+class JobManager:
+    """Submits deduplicated jobs to a lazily created process pool."""
+
+    def __init__(self, store_path, workers=2):
+        self.store = JobStore(store_path)
+        self.workers = workers
+        self._pool = None
+        self._queued = {}   # job id -> future, for the jobs this process submitted
+        self._beating = False
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            if not self._beating:
+                # queued jobs are this process's to keep alive until a pool process picks them up
+                self._beating = True
+                threading.Thread(target=self._beat_queued, daemon=True).start()
+            return self._pool
+
+    def _beat_queued(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._lock:
+                for jid in [jid for jid, future in self._queued.items() if future.done()]:
+                    del self._queued[jid]
+                jids = list(self._queued)
+            if jids:
+                self.store.touch(jids, "queued")
+
+    def _finished(self, jid, future):
+        # _run_job records its own outcome; an exception here means the pool process died
+        if not future.cancelled() and future.exception() is not None:
+            exc = future.exception()
+            self.store.fail(jid, f"{type(exc).__name__}: {exc}")
+
+    def submit(self, key, func, *args):
+        """Job id for running func(*args); an identical live submission is reused."""
+        jid = job_id(key)
+        if self.store.create(jid, key):
+            try:
+                future = self._executor().submit(_run_job, self.store.path, jid, func, args)
+            except BrokenProcessPool:
+                # a pool process died earlier and took the pool with it; start a fresh one
+                with self._lock:
+                    self._pool = None
+                future = self._executor().submit(_run_job, self.store.path, jid, func, args)
+            with self._lock:
+                self._queued[jid] = future
+            future.add_done_callback(lambda f: self._finished(jid, f))
+        return jid
+
+    def status(self, jid):
+        return self.store.status(jid)
+
+    def result(self, jid):
+        return self.store.result(jid)
@@ -0,0 +1,187 @@
+# kepler.py
+"""Closed-form two-body solution: point-mass Earth gravity has conic orbits.
+
+Everything is written in universal variables (Stumpff functions), so
+ellipses, hyperbolas, parabolas and purely radial (head-on) paths share one
+code path. The impact anomaly comes straight from the conic: r = R on the
+inbound leg. No time stepping is involved, so a prediction takes
+microseconds, and the path is only sampled at the points a figure needs.
+Numerical integration (trajectory.py) is still the tool for anything beyond
+point-mass gravity.
+"""
+import numpy as np
+
+from trajectory import EARTH_RADIUS_KM, MU_EARTH, initial_states
+
+PARABOLIC = 1e-10   # |alpha * r0| below this is treated as a parabola
+
+def _stumpff(z):
+    """Stumpff functions C(z) and S(z), elementwise, with series near zero."""
+    z = np.asarray(z, dtype=float)
+    C = np.full(z.shape, 0.5)
+    S = np.full(z.shape, 1 / 6)
+    pos, neg = z > 1e-8, z < -1e-8
+    sz = np.sqrt(z[pos])
+    C[pos] = (1 - np.cos(sz)) / z[pos]
+    S[pos] = (sz - np.sin(sz)) / sz ** 3
+    sz = np.sqrt(-z[neg])
+    C[neg] = (np.cosh(sz) - 1) / -z[neg]
+    S[neg] = (np.sinh(sz) - sz) / sz ** 3
+    small = ~(pos | neg)
+    C[small] = 0.5 - z[small] / 24
+    S[small] = 1 / 6 - z[small] / 120
+    return C, S
+
+def _time_of_flight(chi, r0, sigma0, alpha, mu):
+    """Time (s) to reach universal anomaly chi, with the Stumpff C and S used for it."""
+    z = alpha * chi ** 2
+    C, S = _stumpff(z)
+    return (chi ** 3 * S + sigma0 * chi ** 2 * C + r0 * chi * (1 - z * S)) / np.sqrt(mu), C, S
+
+def propagate(state, chi, mu=MU_EARTH):
+    """Positions (n, 3) and times (n,) along one orbit at universal anomalies chi (km^0.5)."""
+    return propagate_many(np.asarray(state, dtype=float)[None], chi, mu, times=True)
+
+def propagate_many(states, chi, mu=MU_EARTH, times=False):
+    """Positions (N, 3) of N orbits (N, 6), each at its own universal anomaly chi (N,).
+
+    A single state (1, 6) is taken at every chi. With times=True, returns
+    (positions, times).
+    """
+    states = np.asarray(states, dtype=float).reshape(-1, 6)
+    r0v, v0v = states[:, :3], states[:, 3:]
+    r0 = np.sqrt(np.sum(r0v ** 2, axis=1))
+    alpha = 2 / r0 - np.sum(v0v ** 2, axis=1) / mu
+    sigma0 = np.sum(r0v * v0v, axis=1) / np.sqrt(mu)
+    chi = np.asarray(chi, dtype=float)
+    t, C, S = _time_of_flight(chi, r0, sigma0, alpha, mu)
+    f = 1 - chi ** 2 * C / r0
+    g = t - chi ** 3 * S / np.sqrt(mu)
+    pos = f[:, None] * r0v + g[:, None] * v0v
+    return (pos, t) if times else pos
+
+def _time_of(state, chi, mu):
+    return propagate(state, np.atleast_1d(chi), mu)[1][0]
+
+def chi_at_time(state, t, mu=MU_EARTH):
+    """Universal anomaly reached after time t (s), by safeguarded Newton iteration."""
+    if t <= 0:
+        return 0.0
+    r0 = np.sqrt(state[:3] @ state[:3])
+    lo, hi = 0.0, np.sqrt(mu) * t / r0
+    while _time_of(state, hi, mu) < t:
+        lo, hi = hi, 2 * hi
+    chi = 0.5 * (lo + hi)
+    for _ in range(100):
+        pos, tc = propagate(state, np.array([chi]), mu)
+        tc = tc[0]
+        if abs(tc - t) <= 1e-9 * t:
+            break
+        if tc < t:
+            lo = chi
+        else:
+            hi = chi
+        step = (t - tc) * np.sqrt(mu) / np.sqrt(pos[0] @ pos[0])   # dt/dchi = r / sqrt(mu)
+        chi = chi + step if lo < chi + step < hi else 0.5 * (lo + hi)
+    return chi
+
+def kepler_impact(states, mu=MU_EARTH, radius=EARTH_RADIUS_KM, t_max=np.inf):
+    """Closed-form impact and perigee for (N, 6) starting states.
+
+    Returns a dict of arrays: impact (the orbit reaches r = radius within
+    t_max), t_impact and chi_impact (NaN for misses), perigee_km, t_perigee
+    (time to the next perigee, NaN when it has been passed on an open orbit),
+    chi_perigee, eccentricity and semi_major_axis (negative for hyperbolas,
+    inf for parabolas).
+    """
+    states = np.asarray(states, dtype=float).reshape(-1, 6)
+    r0v, v0v = states[:, :3], states[:, 3:]
+    r0 = np.sqrt(np.sum(r0v ** 2, axis=1))
+    sigma0 = np.sum(r0v * v0v, axis=1) / np.sqrt(mu)
+    alpha = 2 / r0 - np.sum(v0v ** 2, axis=1) / mu
+    ellipse = alpha * r0 > PARABOLIC
+    hyperbola = alpha * r0 < -PARABOLIC
+    parabola = ~(ellipse | hyperbola)
+
+    n = len(states)
+    chi_imp = np.full(n, np.nan)
+    chi_per = np.full(n, np.nan)
+    ecc = np.ones(n)
+    perigee = np.empty(n)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = 1 / alpha
+        # Ellipse: e cos E = 1 - r / a, e sin E = sigma / sqrt(a)
+        k = ellipse
+        if k.any():
+            ec, es = 1 - r0[k] / a[k], sigma0[k] / np.sqrt(a[k])
+            e = np.hypot(ec, es)
+            E0 = np.arctan2(es, ec)
+            E_imp = -np.arccos(np.clip((1 - radius / a[k]) / e, -1, 1))
+            E_imp = np.where(E_imp < E0, E_imp + 2 * np.pi, E_imp)
+            hits = a[k] * (1 - e) < radius
+            chi_imp[k] = np.where(hits, np.sqrt(a[k]) * (E_imp - E0), np.nan)
+            chi_per[k] = np.sqrt(a[k]) * np.where(E0 <= 0, -E0, 2 * np.pi - E0)
+            ecc[k], perigee[k] = e, a[k] * (1 - e)
+        # Hyperbola: e cosh F = 1 - r / a, e sinh F = sigma / sqrt(-a)
+        k = hyperbola
+        if k.any():
+            ah = -a[k]
+            ec, es = 1 + r0[k] / ah, sigma0[k] / np.sqrt(ah)
+            e = np.sqrt(ec ** 2 - es ** 2)
+            F0 = np.arcsinh(es / e)
+            F_imp = -np.arccosh(np.maximum((1 + radius / ah) / e, 1))
+            hits = (ah * (e - 1) < radius) & (F0 < F_imp)
+            chi_imp[k] = np.where(hits, np.sqrt(ah) * (F_imp - F0), np.nan)
+            chi_per[k] = np.where(F0 <= 0, -np.sqrt(ah) * F0, np.nan)
+            ecc[k], perigee[k] = e, ah * (e - 1)
+        # Parabola: r = (p + D^2) / 2 with D = sigma, and chi = D - D0
+        k = parabola
+        if k.any():
+            p = 2 * r0[k] - sigma0[k] ** 2
+            D_imp = -np.sqrt(2 * radius - p)
+            hits = (p / 2 < radius) & (sigma0[k] < D_imp)
+            chi_imp[k] = np.where(hits, D_imp - sigma0[k], np.nan)
+            chi_per[k] = np.where(sigma0[k] <= 0, -sigma0[k], np.nan)
+            perigee[k] = p / 2
+
+    t_imp = _time_of_flight(chi_imp, r0, sigma0, alpha, mu)[0]   # NaN where chi is
+    t_per = _time_of_flight(chi_per, r0, sigma0, alpha, mu)[0]
+
+    impact = np.isfinite(t_imp) & (t_imp <= t_max)
+    return {
+        "impact": impact,
+        "t_impact": np.where(impact, t_imp, np.nan),
+        "chi_impact": np.where(impact, chi_imp, np.nan),
+        "perigee_km": perigee,
+        "t_perigee": t_per,
+        "chi_perigee": chi_per,
+        "eccentricity": ecc,
+        "semi_major_axis": np.where(parabola, np.inf, 1 / alpha),
+    }
+
+def asteroid_trajectory_kepler(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km,
+                               samples=400, t_max=None):
+    """Trajectory under Earth's gravity from the closed-form conic, sampled for display.
+
+    Same starting state and time span (t_max) as asteroid_trajectory_adaptive
+    and the same return value, (xs, ys, zs, ts, t_impact) with t_impact None
+    for a miss. samples points are spaced evenly in universal anomaly, which
+    packs them closer in time near Earth; the last point of an impact lies
+    exactly on the surface.
+    """
+    states, _, _ = initial_states(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km)
+    state = states[0]
+    if t_max is None:
+        t_max = 30 * distance_km / speed_kms if speed_kms else 0.0
+
+    result = kepler_impact(states, t_max=t_max)
+    if result["impact"][0]:
+        chi_end, t_impact = result["chi_impact"][0], float(result["t_impact"][0])
+    else:
+        chi_end, t_impact = chi_at_time(state, t_max), None
+    pos, ts = propagate(state, np.linspace(0, chi_end, max(int(samples), 2)))
+    if t_impact is not None:
+        pos[-1] *= EARTH_RADIUS_KM / np.sqrt(pos[-1] @ pos[-1])   # remove rounding off the surface
+        ts[-1] = t_impact
+    return pos[:, 0], pos[:, 1], pos[:, 2], ts, t_impact
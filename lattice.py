@@ -0,0 +1,9 @@
+# lattice.py
+"""Lattice helpers shared by the corridor sweep and the scenario atlas."""
+
+def corner_views(a):
+    """The 2**ndim corner views of every cell of the lattice array a."""
+    views = [a]
+    for axis in range(a.ndim):
+        views = [v[(slice(None),) * axis + (s,)] for v in views for s in (slice(None, -1), slice(1, None))]
+    return views
@@ -0,0 +1,140 @@
+# loadtest.py
+"""Local load test: simulate-button throughput against the number of gunicorn workers.
+
+    python loadtest.py                          # 1, 2 and 4 workers, 8 clients, 15 s each
+    python loadtest.py --workers 1 2 4 8 --clients 16 --duration 30
+
+For every worker count a gunicorn server (gunicorn.conf.py, wsgi:server) is
+started on a free local port, and --clients threads POST the Simulate
+callback back to back with random angles. The disk cache is disabled
+(SIM_CACHE_DIR="") and the angles vary, so every request runs a simulation.
+The callback spec is read from /_dash-dependencies, so the request body
+matches whatever the layout currently is.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Field values sent with every click; angle and z_angle are replaced by random ones
+FIELDS = {"xspeed": -2, "yspeed": -2, "zspeed": -2, "distance": 20000, "size": 500,
+          "angle": 120, "z_angle": 120, "type": "Rocky", "rtype": "Solid", "time": 0}
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _get(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+def _post(url, body, timeout=120):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+def start_server(workers, port, env_extra=None):
+    """gunicorn process serving wsgi:server with workers workers, once it answers."""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), SIM_BIND=f"127.0.0.1:{port}", SIM_CACHE_DIR="",
+               **(env_extra or {}))
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:server"],
+                            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited: {proc.stderr.read().decode()[-2000:]}")
+        try:
+            _get(f"http://127.0.0.1:{port}/_dash-layout")
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not start in time")
+
+def simulate_body(base_url):
+    """Request body template for the Simulate callback, built from the served callback spec."""
+    spec = next(cb for cb in json.loads(_get(base_url + "/_dash-dependencies"))
+                if any(i["id"] == "simulate-btn" for i in cb["inputs"]))
+    outputs = [dict(zip(("id", "property"), part.split("."))) for part in spec["output"].strip(".").split("...")]
+    return {"output": spec["output"], "outputs": outputs,
+            "inputs": [{"id": "simulate-btn", "property": "n_clicks", "value": 1}],
+            "changedPropIds": ["simulate-btn.n_clicks"],
+            "state": [{"id": s["id"], "property": s["property"],
+                       "value": FIELDS.get(s["id"])} for s in spec["state"]]}
+
+def run_clients(base_url, clients, duration):
+    """Completed requests, errors and latencies (s) from clients threads over duration seconds."""
+    template = simulate_body(base_url)
+    url = base_url + "/_dash-update-component"
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        session = f"loadtest-{seed}"
+        n = 0
+        while time.monotonic() < stop:
+            n += 1
+            body = json.loads(json.dumps(template))
+            body["inputs"][0]["value"] = n
+            for s in body["state"]:
+                if s["id"] in ("angle", "z_angle"):
+                    s["value"] = round(rng.uniform(1, 359), 2)
+                elif s["id"] == "session-id":
+                    s["value"] = session
+            start = time.perf_counter()
+            try:
+                _post(url, body)
+            except OSError:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(client, range(clients)))
+    return len(latencies), errors[0], latencies
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput of the Simulate callback against gunicorn workers.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before each run")
+    args = parser.parse_args(argv)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            port = _free_port()
+            proc = start_server(workers, port, {"SIM_JOBS_DB": os.path.join(tmp, f"jobs{workers}.sqlite")})
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                run_clients(base_url, args.clients, args.warmup)
+                done, errors, latencies = run_clients(base_url, args.clients, args.duration)
+            finally:
+                proc.terminate()
+                proc.wait()
+            rate = done / args.duration
+            q = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else [float("nan")] * 19
+            rows.append((workers, rate, q[9], q[18], errors))
+            print(f"{workers:>3} workers  {rate:8.1f} req/s  p50 {q[9] * 1e3:7.1f} ms  "
+                  f"p95 {q[18] * 1e3:7.1f} ms  errors {errors}  x{rate / (rows[0][1] or 1):.2f}", flush=True)
+    return 0 if all(row[4] == 0 for row in rows) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# metrics.py
+"""Lightweight in-process instrumentation with Prometheus text output.
+
+    with metrics.stage("integrate"):
+        ...
+    metrics.inc("sim_steps_integrated_total", len(xs))
+
+Set SIM_METRICS=0 to disable: stage() then hands back one shared no-op
+context manager and inc()/observe() return immediately. Counters are per
+process; each worker serves its own /metrics.
+
+install(server) adds the /metrics route, request latency and payload size
+tracking, and an opt-in cProfile hook: with SIM_PROFILE=1 set, a request
+carrying the header "X-Profile: 1" is profiled and its stats are written
+to SIM_PROFILE_DIR, named in the X-Profile-File response header.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+ENABLED = os.environ.get("SIM_METRICS", "1") != "0"
+
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6)
+
+_NULL = nullcontext()
+_lock = threading.Lock()
+_counters = {}      # (name, labels) -> value
+_histograms = {}    # (name, labels) -> [bucket counts..., sum, count]
+_buckets = {}       # name -> bucket bounds
+_gauge_sources = []
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+def inc(name, value=1, **labels):
+    """Add value to a counter."""
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe(name, value, buckets=TIME_BUCKETS, **labels):
+    """Record one observation in a histogram."""
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _buckets.setdefault(name, buckets)
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(buckets) + 3)
+        h[bisect.bisect_left(buckets, value)] += 1
+        h[-2] += value
+        h[-1] += 1
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe("sim_stage_seconds", time.perf_counter() - self.start, stage=self.name)
+        return False
+
+def stage(name):
+    """Context manager timing one pipeline stage into sim_stage_seconds{stage=name}."""
+    return _Stage(name) if ENABLED else _NULL
+
+def add_gauges(source):
+    """Register a callable returning {metric name: value}, sampled at scrape time."""
+    _gauge_sources.append(source)
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+    seen = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_fmt_labels(labels)} {value}")
+    for (name, labels), h in sorted(histograms.items()):
+        if name not in seen:
+            lines.append(f"# TYPE {name} histogram")
+            seen.add(name)
+        cumulative = 0
+        for bound, count in zip(list(_buckets[name]) + ["+Inf"], h[:-2]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {h[-2]}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {h[-1]}")
+    for source in _gauge_sources:
+        for name, value in source().items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+def install(server):
+    """Attach /metrics, request timing and the opt-in profiler to a Flask server."""
+    from flask import g, request
+
+    profile_dir = os.environ.get("SIM_PROFILE_DIR", "profiles")
+    profiling_allowed = os.environ.get("SIM_PROFILE") == "1"
+
+    @server.before_request
+    def _start_timer():
+        if ENABLED:
+            g.metrics_start = time.perf_counter()
+        if profiling_allowed and request.headers.get("X-Profile") == "1":
+            import cProfile
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @server.after_request
+    def _record(response):
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(profile_dir, exist_ok=True)
+            path = os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(profiler)}.prof")
+            profiler.dump_stats(path)
+            response.headers["X-Profile-File"] = path
+        start = g.pop("metrics_start", None)
+        if start is not None and request.path != "/metrics":
+            # the matched route, never the raw path, so unknown URLs cannot add series
+            rule = request.url_rule.rule if request.url_rule is not None else ""
+            endpoint = rule if rule.startswith(("/_dash-update", "/api/")) else "other"
+            observe("sim_http_request_seconds", time.perf_counter() - start, path=endpoint)
+            if not response.direct_passthrough and response.content_length:
+                observe("sim_http_response_bytes", response.content_length, BYTE_BUCKETS, path=endpoint)
+                inc("sim_payload_bytes_total", response.content_length, path=endpoint)
+        return response
+
+    @server.route("/metrics")
+    def _metrics():
+        return server.response_class(render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,129 @@
+# montecarlo.py
+"""Monte Carlo impact probability: Gaussian clones of one scenario through the batch core.
+
+Clones are drawn around the nominal starting state, propagated in shards
+(each in a worker process with its own child seed) and reduced to hit
+counts, impact-site and energy histograms, impacts per geocode region and
+a capped sample of impact sites. Shards are merged in submission order, so
+a given seed gives the same result for any number of workers.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from trajectory import initial_states, asteroid_trajectory_batch, impact_latlon
+from physics import kinetic_energy
+from geocode import get_geocoder
+
+# Parameters that can carry uncertainty (standard deviations in the same units)
+PARAMS = ("x_sp", "y_sp", "z_sp", "distance_km", "angle_deg", "z_angle_deg")
+
+LAT_EDGES = np.linspace(-90, 90, 91)
+LON_EDGES = np.linspace(-180, 180, 181)
+ENERGY_EDGES = np.linspace(10, 26, 65)   # log10(J)
+
+def sample_clones(nominal, sigma, n, rng):
+    """n Gaussian clones of the nominal parameters; parameters without a sigma stay fixed."""
+    return {p: nominal[p] + sigma.get(p, 0) * rng.standard_normal(n) for p in PARAMS}
+
+def _run_shard(nominal, sigma, n, seed, size_m, dtype, rubble, time, max_points):
+    """Propagate one shard of clones and reduce it to histograms (runs in a worker process)."""
+    rng = np.random.default_rng(seed)
+    c = sample_clones(nominal, sigma, n, rng)
+    speed = np.sqrt(c["x_sp"] ** 2 + c["y_sp"] ** 2 + c["z_sp"] ** 2)
+
+    states, dt, steps = initial_states(speed, c["x_sp"], c["y_sp"], c["z_sp"],
+                                       c["angle_deg"], c["z_angle_deg"], c["distance_km"])
+    _, _, impacted, _, sites, _ = asteroid_trajectory_batch(states, dt, steps, record=False, crossing=True)
+
+    hit = sites[impacted]
+    lat, lon = impact_latlon(hit[:, 0], hit[:, 1], hit[:, 2], dt[impacted], time)
+    lon = (lon + 180) % 360 - 180
+    energy = kinetic_energy(size_m, speed[impacted], dtype, rubble)
+    geocoder = get_geocoder()
+    regions = len(geocoder.regions) if geocoder else 0
+
+    return {
+        "region_hist": np.bincount(geocoder.regions_of(lat, lon), minlength=regions) if regions else np.zeros(0, int),
+        "n": n,
+        "hits": int(impacted.sum()),
+        "latlon_hist": np.histogram2d(lat, lon, bins=[LAT_EDGES, LON_EDGES])[0],
+        "energy_hist": np.histogram(np.log10(energy), bins=ENERGY_EDGES)[0],
+        "energy_sum": float(energy.sum()),
+        "lat": lat[:max_points],
+        "lon": lon[:max_points],
+    }
+
+def _empty():
+    """Aggregate of no clones."""
+    geocoder = get_geocoder()
+    return {
+        "region_hist": np.zeros(len(geocoder.regions) if geocoder else 0, int),
+        "n": 0,
+        "hits": 0,
+        "latlon_hist": np.zeros((len(LAT_EDGES) - 1, len(LON_EDGES) - 1)),
+        "energy_hist": np.zeros(len(ENERGY_EDGES) - 1, int),
+        "energy_sum": 0.0,
+        "lat": np.zeros(0),
+        "lon": np.zeros(0),
+        "hit_fraction": 0.0,
+        "mean_energy": 0.0,
+    }
+
+def _merge(total, part, max_points):
+    """Fold one shard result into the running aggregate."""
+    if total is None:
+        total = dict(part)
+    else:
+        for key in ("n", "hits", "latlon_hist", "energy_hist", "energy_sum", "region_hist"):
+            total[key] = total[key] + part[key]
+        room = max_points - len(total["lat"])
+        if room > 0:
+            total["lat"] = np.concatenate([total["lat"], part["lat"][:room]])
+            total["lon"] = np.concatenate([total["lon"], part["lon"][:room]])
+    total["hit_fraction"] = total["hits"] / total["n"] if total["n"] else 0.0
+    total["mean_energy"] = total["energy_sum"] / total["hits"] if total["hits"] else 0.0
+    return total
+
+def monte_carlo_stream(asteroid, sigma, angle_deg=45, z_angle_deg=45, n=10000, body_d=500,
+                       dtype="default", rubble=False, time=0, seed=None, workers=None, shard_size=1000, max_points=5000):
+    """Impact statistics over n clones drawn around the nominal state, yielded shard by shard.
+
+    asteroid is the same dict plot_simulation_video takes; sigma maps names in
+    PARAMS to standard deviations. Clones are split into shards of shard_size,
+    each with its own child seed, and merged in order, so results for a given
+    seed do not depend on the number of workers. No figures are built. Each yielded dict is the
+    running aggregate: n, hits, hit_fraction, latlon_hist (on LAT_EDGES x
+    LON_EDGES), energy_hist (log10 J on ENERGY_EDGES), mean_energy,
+    region_hist (impacts per geocode region, in get_geocoder().regions
+    order; empty without geodata) and up to max_points impact lat/lon pairs
+    for a footprint scatter.
+    """
+    nominal = {p: asteroid[p] for p in ("x_sp", "y_sp", "z_sp", "distance_km")}
+    nominal.update(angle_deg=angle_deg, z_angle_deg=z_angle_deg)
+
+    sizes = [shard_size] * (n // shard_size) + ([n % shard_size] if n % shard_size else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(nominal, sigma, k, s, body_d, dtype, rubble, time, max_points) for k, s in zip(sizes, seeds)]
+
+    total = None
+    if workers == 1:
+        for a in args:
+            total = _merge(total, _run_shard(*a), max_points)
+            yield total
+        return
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_run_shard, *a) for a in args]
+        # in submission order: which impacts make the footprint sample must not depend on timing
+        for f in futures:
+            total = _merge(total, f.result(), max_points)
+            yield total
+
+def monte_carlo(asteroid, sigma, **kwargs):
+    """Final aggregate of monte_carlo_stream (all zeros for n=0)."""
+    total = _empty()
+    for total in monte_carlo_stream(asteroid, sigma, **kwargs):
+        pass
+    return total
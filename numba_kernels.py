@@ -0,0 +1,126 @@
+# numba_kernels.py
+"""Numba-compiled RK4 kernels behind trajectory.py's "numba" backend.
+
+Same arithmetic, loop order and surface check as the NumPy code, one body at
+a time in compiled loops. Compiled code is cached on disk (cache=True, in
+__pycache__ or NUMBA_CACHE_DIR), so only the first process ever pays the JIT
+cost. Importing this module raises ImportError when Numba is missing.
+"""
+import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def _acc(s, mu, out):
+    r = np.sqrt(s[0] ** 2 + s[1] ** 2 + s[2] ** 2)
+    out[0], out[1], out[2] = s[3], s[4], s[5]
+    out[3], out[4], out[5] = -mu * s[0] / r ** 3, -mu * s[1] / r ** 3, -mu * s[2] / r ** 3
+
+@njit(cache=True)
+def _rk4(s, dt, mu, k, tmp):
+    # k is a (4, 6) scratch array, tmp a (6,) one; s is advanced in place
+    _acc(s, mu, k[0])
+    for j in range(6):
+        k[0, j] *= dt
+        tmp[j] = s[j] + 0.5 * k[0, j]
+    _acc(tmp, mu, k[1])
+    for j in range(6):
+        k[1, j] *= dt
+        tmp[j] = s[j] + 0.5 * k[1, j]
+    _acc(tmp, mu, k[2])
+    for j in range(6):
+        k[2, j] *= dt
+        tmp[j] = s[j] + k[2, j]
+    _acc(tmp, mu, k[3])
+    for j in range(6):
+        k[3, j] *= dt
+        s[j] = s[j] + (k[0, j] + 2 * k[1, j] + 2 * k[2, j] + k[3, j]) / 6
+
+@njit(cache=True)
+def gravity_path(state0, dt, steps, mu, radius):
+    """(n, 3) positions of one body, as asteroid_trajectory_gravity records them."""
+    out = np.empty((max(steps, 0), 3))
+    s = state0.copy()
+    k = np.empty((4, 6))
+    tmp = np.empty(6)
+    vx, vy, vz = state0[3], state0[4], state0[5]
+    n = 0
+    for _ in range(steps):
+        x, y, z = s[0], s[1], s[2]
+        r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+        if r < radius:
+            # the original final-step correction, with the starting velocity
+            r = radius - r
+            vx += -mu * x / r ** 3 * dt
+            vy += -mu * y / r ** 3 * dt
+            vz += -mu * z / r ** 3 * dt
+            out[n, 0], out[n, 1], out[n, 2] = x + vx * dt, y + vy * dt, z + vz * dt
+            n += 1
+            break
+        _rk4(s, dt, mu, k, tmp)
+        out[n, 0], out[n, 1], out[n, 2] = s[0], s[1], s[2]
+        n += 1
+    return out[:n]
+
+@njit(cache=True)
+def batch_final(states, dt, steps, mu, radius, escape_km, closest):
+    """Final positions, impacted and escaped flags, closest distances and steps taken for N bodies.
+
+    escape_km < 0 disables the escape test; min_r is only filled when closest is set.
+    before and after are the states at the ends of each impacted body's last RK4 step.
+    """
+    n = states.shape[0]
+    pos = np.full((n, 3), np.nan)
+    impacted = np.zeros(n, dtype=np.bool_)
+    escaped = np.zeros(n, dtype=np.bool_)
+    min_r = np.full(n, np.inf)
+    taken = np.zeros(n, dtype=np.int64)
+    before = states.copy()
+    after = np.full((n, 6), np.nan)
+    k = np.empty((4, 6))
+    tmp = np.empty(6)
+    for b in range(n):
+        s = states[b].copy()
+        h = dt[b]
+        if closest:
+            min_r[b] = np.sqrt(s[0] ** 2 + s[1] ** 2 + s[2] ** 2)
+        moved = False
+        for _ in range(steps[b]):
+            x, y, z = s[0], s[1], s[2]
+            r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+            if closest and r < min_r[b]:
+                min_r[b] = r
+            if r < radius:
+                for j in range(6):
+                    after[b, j] = s[j]
+                rr = radius - r
+                x = x + (states[b, 3] + (-mu * x / rr ** 3) * h) * h
+                y = y + (states[b, 4] + (-mu * y / rr ** 3) * h) * h
+                z = z + (states[b, 5] + (-mu * z / rr ** 3) * h) * h
+                s[0], s[1], s[2] = x, y, z
+                impacted[b] = True
+                taken[b] += 1
+                moved = True
+                break
+            if escape_km >= 0:
+                energy = 0.5 * (s[3] ** 2 + s[4] ** 2 + s[5] ** 2) - mu / r
+                if r - radius > escape_km and x * s[3] + y * s[4] + z * s[5] > 0 and energy > 0:
+                    escaped[b] = True
+                    break
+            for j in range(6):
+                before[b, j] = s[j]
+            _rk4(s, h, mu, k, tmp)
+            taken[b] += 1
+            moved = True
+        if moved:
+            pos[b, 0], pos[b, 1], pos[b, 2] = s[0], s[1], s[2]
+            if closest:
+                r = np.sqrt(s[0] ** 2 + s[1] ** 2 + s[2] ** 2)
+                if r < min_r[b]:
+                    min_r[b] = r
+    return pos, impacted, escaped, min_r, taken, before, after
+
+def warm_up():
+    """Load (or compile) every kernel now, e.g. before worker processes fork."""
+    state = np.array([10000.0, 0, 0, -5.0, 0, 0])
+    gravity_path(state, 35.0, 2, 398600.0, 6371.0)
+    batch_final(state[None, :], np.array([35.0]), np.array([2]), 398600.0, 6371.0, -1.0, True)
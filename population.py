@@ -0,0 +1,168 @@
+# population.py
+import os
+from functools import lru_cache
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEG = EARTH_RADIUS_KM * np.pi / 180
+
+POPDATA_PATH = os.environ.get(
+    "POPDATA_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "popdata.tif")
+)
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; every argument may be an array."""
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlon = np.radians(lon2) - np.radians(lon1)
+
+    a = np.sin(dlat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon/2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class PopulationRaster:
+    """Lat/lon population grid read one window at a time from a GeoTIFF.
+
+    Uncompressed rasters are memory-mapped as a whole; tiled or stripped
+    (compressed, COG-style) rasters are memory-mapped as bytes and only the
+    segments overlapping a requested window are decoded. kind is "count"
+    (people per cell) or "density" (people per km²).
+    """
+
+    def __init__(self, path, kind="count"):
+        import tifffile
+
+        self.path = path
+        self.kind = kind
+        self._tif = tifffile.TiffFile(path)
+        self._page = page = self._tif.pages[0]
+        self.shape = page.shape[:2]
+        rows, cols = self.shape
+
+        # Georeferencing from ModelPixelScale/ModelTiepoint, else a global grid
+        tags = page.tags
+        if 33550 in tags and 33922 in tags:
+            scale = tags[33550].value
+            tie = tags[33922].value
+            self.dlon, self.dlat = float(scale[0]), float(scale[1])
+            self.lon0 = float(tie[3]) - float(tie[0]) * self.dlon
+            self.lat0 = float(tie[4]) + float(tie[1]) * self.dlat
+        else:
+            self.dlon, self.dlat = 360 / cols, 180 / rows
+            self.lon0, self.lat0 = -180.0, 90.0
+        self.wraps = abs(cols * self.dlon - 360) < 1e-6
+
+        if page.is_memmappable:
+            self._array = tifffile.memmap(path, mode="r")
+            self._bytes = None
+        else:
+            self._array = None
+            self._bytes = np.memmap(path, dtype=np.uint8, mode="r")
+            self._seg_rows = page.tilelength if page.is_tiled else page.rowsperstrip
+            self._seg_cols = page.tilewidth if page.is_tiled else cols
+            self._segs_across = -(-cols // self._seg_cols)
+
+    @lru_cache(maxsize=256)
+    def _segment(self, index):
+        """Decoded tile/strip number index as a 2-D array."""
+        page = self._page
+        start = page.dataoffsets[index]
+        data = self._bytes[start:start + page.databytecounts[index]].tobytes()
+        seg = page.decode(data, index)[0]
+        return seg.reshape(seg.shape[-3], seg.shape[-2], -1)[..., 0]
+
+    def read(self, row0, row1, col0, col1):
+        """Raster values in rows [row0, row1) and columns [col0, col1)."""
+        if self._array is not None:
+            return np.asarray(self._array[row0:row1, col0:col1])
+
+        out = np.zeros((row1 - row0, col1 - col0), dtype=self._page.dtype)
+        sr, sc = self._seg_rows, self._seg_cols
+        for tr in range(row0 // sr, (row1 - 1) // sr + 1):
+            for tc in range(col0 // sc, (col1 - 1) // sc + 1):
+                seg = self._segment(tr * self._segs_across + tc)
+                r0, c0 = max(row0, tr * sr), max(col0, tc * sc)
+                r1, c1 = min(row1, (tr + 1) * sr), min(col1, (tc + 1) * sc)
+                out[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = seg[r0 - tr * sr:r1 - tr * sr, c0 - tc * sc:c1 - tc * sc]
+        return out
+
+    def cell_area(self, lat_top):
+        """Area in km² of cells whose northern edge is at lat_top."""
+        top = np.radians(lat_top)
+        bottom = np.radians(lat_top - self.dlat)
+        return EARTH_RADIUS_KM ** 2 * np.radians(self.dlon) * np.abs(np.sin(top) - np.sin(bottom))
+
+    def population_within(self, lat, lon, radius_km):
+        """People within radius_km of (lat, lon), reading only the bounding window.
+
+        Cells count when their centre lies within radius_km. Below half a cell
+        side that rule would mostly give 0, so a radius that small instead
+        takes the nearest cell's value scaled by the share of the cell's area
+        the disc covers (πr² / cell area, at most the whole cell).
+        """
+        rows, cols = self.shape
+        dlat_deg = radius_km / KM_PER_DEG
+        row0 = max(int(np.floor((self.lat0 - (lat + dlat_deg)) / self.dlat)), 0)
+        row1 = min(int(np.ceil((self.lat0 - (lat - dlat_deg)) / self.dlat)) + 1, rows)
+        if row0 >= row1:
+            return 0.0
+
+        # Longitude half-width grows towards the poles; take the widest row
+        edge_lat = min(abs(lat) + dlat_deg, 90.0)
+        coslat = np.cos(np.radians(edge_lat))
+        col_c = (lon - self.lon0) / self.dlon
+        if coslat < 1e-6 or dlat_deg / coslat >= 180:
+            spans = [(0, cols)]
+        else:
+            half = dlat_deg / coslat / self.dlon
+            c0, c1 = int(np.floor(col_c - half)), int(np.ceil(col_c + half)) + 1
+            if not self.wraps:
+                spans = [(max(c0, 0), min(c1, cols))]
+            elif c1 - c0 >= cols:
+                spans = [(0, cols)]
+            else:
+                start = c0 % cols
+                end = start + (c1 - c0)
+                spans = [(start, min(end, cols))] + ([(0, end - cols)] if end > cols else [])
+
+        lat_top = self.lat0 - np.arange(row0, row1) * self.dlat
+        lat_c = (lat_top - self.dlat / 2)[:, None]
+        total = 0.0
+        nearest = None
+        for c0, c1 in spans:
+            if c0 >= c1:
+                continue
+            values = self.read(row0, row1, c0, c1).astype(np.float64)
+            values[~np.isfinite(values) | (values < 0)] = 0
+            if self.kind == "density":
+                values *= self.cell_area(lat_top)[:, None]
+            lon_c = self.lon0 + (np.arange(c0, c1) + 0.5) * self.dlon
+            dist = haversine(lat, lon, lat_c, lon_c[None, :])
+            total += values[dist <= radius_km].sum()
+
+            k = np.unravel_index(np.argmin(dist), dist.shape)
+            if nearest is None or dist[k] < nearest[0]:
+                nearest = (dist[k], values[k], lat_top[k[0]])
+
+        # A blast smaller than the cells it falls in takes its share of one cell
+        if nearest is not None and radius_km < np.sqrt(self.cell_area(nearest[2])) / 2:
+            return float(nearest[1] * min(1.0, np.pi * radius_km ** 2 / self.cell_area(nearest[2])))
+        return float(total)
+
+@lru_cache(maxsize=1)
+def get_raster(path=POPDATA_PATH, kind="count"):
+    """Shared PopulationRaster, or None when the raster is not available."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return PopulationRaster(path, kind)
+    except ImportError:
+        return None
+
+def affected_population(lat, lon, radius_km):
+    """People within radius_km of the impact site, or None without a raster."""
+    raster = get_raster()
+    if raster is None:
+        return None
+    return raster.population_within(lat, lon, radius_km)
@@ -0,0 +1,60 @@
+# sessions.py
+"""Latest click per page load, shared by every web worker process.
+
+A newer click on the same page supersedes the simulation an older click
+started, wherever it runs. The registry lives in a SQLite table (by default
+the job database), so any number of pre-forked workers agree on it without
+holding per-process state.
+"""
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+SESSION_TTL = 6 * 3600   # pages idle this long are forgotten (seconds)
+PRUNE_INTERVAL = 60      # minimum seconds between prunes, per process
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clicks (
+    session TEXT PRIMARY KEY,
+    n INTEGER NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+class ClickRegistry:
+    """Click numbers per session id in a SQLite database file shared between processes."""
+
+    def __init__(self, path, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._pruned = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(_SCHEMA)
+            db.execute("CREATE INDEX IF NOT EXISTS clicks_updated ON clicks (updated)")
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3's own context manager commits or rolls back but leaves the connection open
+        with closing(sqlite3.connect(self.path, timeout=30)) as db, db:
+            yield db
+
+    def claim(self, session, n_clicks):
+        """Record n_clicks as the latest click of session."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO clicks (session, n, updated) VALUES (?, ?, ?)",
+                       (session, int(n_clicks), now))
+            if now - self._pruned > PRUNE_INTERVAL:
+                self._pruned = now
+                db.execute("DELETE FROM clicks WHERE updated < ?", (now - self.ttl,))
+
+    def superseded(self, session, n_clicks):
+        """True once a later click of session has been claimed."""
+        with self._connect() as db:
+            row = db.execute("SELECT n FROM clicks WHERE session = ?", (session,)).fetchone()
+        return row is not None and row[0] != int(n_clicks)
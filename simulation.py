@@ -0,0 +1,127 @@
+# simulation.py
+"""One full scenario run for the app: figure (as a dict) plus the result text.
+
+Kept out of app.py so background job workers can run it without Dash.
+"""
+import os
+
+import numpy as np
+
+from physics import impact_physics, STRATEGIES
+from trajectory import SimulationCancelled
+import metrics
+
+# Scenarios estimated to need more integration steps than this run as background jobs
+LONG_STEPS = 20000
+# Animation frames per figure; the closed-form path samples its orbit at 4 points per frame (at least 400)
+FRAME_BUDGET = 120
+# Point-mass gravity has a closed-form orbit, so the app uses it unless told to integrate ("rk4", "adaptive")
+INTEGRATOR = os.environ.get("SIM_INTEGRATOR", "kepler")
+# The page holds the Earth mesh (earth-mesh.js), so figures carry only an empty Earth trace unless set to "inline"
+EARTH_MODE = os.environ.get("SIM_EARTH", "template")
+# Mesh resolution: "low", "medium", "high", or "auto" to follow the scene's scale
+MESH_LOD = os.environ.get("SIM_MESH_LOD", "auto")
+# Bump when the figure or text a scenario produces changes, so cached and job results from older code are not reused
+RESULT_VERSION = 3
+# Everything besides the scenario that shapes a result; part of every result cache key and job id
+RESULT_CONFIG = (RESULT_VERSION, INTEGRATOR, EARTH_MODE, MESH_LOD)
+
+def estimated_steps(xspeed, yspeed, zspeed, distance, angle, z_angle):
+    #Fixed-step count the integrator will use for this scenario; for the closed-form path, the orbit
+    #points it evaluates (a fixed display sample, whatever the distance)
+    if INTEGRATOR == "kepler":
+        return max(4 * FRAME_BUDGET, 400)
+    from trajectory import initial_states
+    speed = np.sqrt(xspeed ** 2 + yspeed ** 2 + zspeed ** 2)
+    return int(initial_states(speed, xspeed, yspeed, zspeed, angle, z_angle, distance)[2][0])
+
+def compute_simulation(xspeed, yspeed, zspeed, distance, size, angle, z_angle, type, rtype, time, cancelled = None, progress = None):
+    #Figure (as a dict) and result text for one scenario
+    #cancelled() returning True aborts the run with SimulationCancelled
+    #progress(steps, frames) is called as the integration and frames complete
+    #Setting the parameters for the visualization function
+    sped = np.sqrt(xspeed ** 2 + yspeed ** 2 + zspeed ** 2)
+    asteroid = {
+        "speed_km_s": sped,
+        "x_sp": xspeed,
+        "y_sp": yspeed,
+        "z_sp": zspeed,
+        "distance_km": distance
+    }
+    
+    if type == "Rocky":
+        dtype = "rocky"
+    elif type == "Metallic":
+        dtype = "metallic"
+    elif type == "Icy":
+        dtype = "icy"
+    else :
+        dtype = ""                
+      
+    if rtype == "Rubble":
+            rubble = True
+    else:
+            rubble = False        
+            
+    #Generate figure using our function (plotting stack loaded on first use)
+    from visualization import plot_simulation_video
+    imp_loc, imp_locgen, affected, stat, fig= plot_simulation_video(
+        asteroid, angle_deg=angle, z_angle_deg=z_angle, body_d=size, dtype = dtype, time = time, rubble = rubble, compact = True, frame_budget = FRAME_BUDGET, integrator = INTEGRATOR,
+        lod = MESH_LOD, earth = EARTH_MODE, cancelled = cancelled, progress = progress
+    )
+    
+    #Mass, energy, impact radius and strategy for the chosen material
+    with metrics.stage("physics"):
+        phys = impact_physics(size, sped, distance, dtype or "default", rubble)
+    energy, tnt, imp_rad = float(phys["energy"]), float(phys["tnt_tons"]), float(phys["impact_radius"])
+    
+    ev = {
+    "1000000000000000000000000" : "the Dinosaur Extinction causing asteroid",
+     "40000000000000000" : "the Tunguska event",
+     "10000000000" : "a Magnitude 2 Earthquake",
+     "100000000000000" : "the Hiroshima Atom Bomb"     
+     }
+    if energy > 1000000000000000000000000:
+    	eve = ev["1000000000000000000000000"]
+    elif energy > 40000000000000000:
+    	eve = ev["40000000000000000"]
+    elif energy > 100000000000000:
+    	eve = ev["100000000000000"]
+    elif energy > 10000000000:
+    	eve = ev["10000000000"] 
+    else :
+    	eve = "a well....... firecracker?"
+    		
+    strat = STRATEGIES[int(phys["strategy"])]
+
+    #Damage rings (radius and, with population data, people inside) from the effects engine
+    rings = ""
+    effects = (fig.layout.meta or {}).get("effects")
+    if effects:
+        from effects import EFFECTS, EFFECT_LABELS
+        exposure = effects["exposure"]
+        rings = " \n Damage Rings : " + "; ".join(
+            f"{EFFECT_LABELS[e]} {effects['radii_km'][e]:,.1f} km" + (f" ({exposure[e]:,.0f} people)" if exposure else "")
+            for e in reversed(EFFECTS)) + "."
+    
+    txt = f"Impact Effects :- \n Kinetic Energy of the Asteroid : {energy:.2e} which is equal to {tnt:.2e} tons of tnt. \n This is more energy than {eve}. \n Impact Radius : {imp_rad:.2f}. \n Impact Location : {imp_locgen} {imp_loc}. \n No. of People instantly killed in the blast radius : {affected}. Final State of the Asteroid : {strat}{rings}"
+    with metrics.stage("serialize"):
+        payload = fig.to_dict()
+    return payload, txt
+
+def compute_corridor(xspeed, yspeed, zspeed, distance, time, levels = 2, workers = None, cancelled = None):
+    #Impact corridor heatmap (as a dict) and summary text over all approach angles
+    #cancelled() is checked after each refinement level
+    from corridor import corridor_stream
+    from visualization import plot_corridor
+    asteroid = {"x_sp": xspeed, "y_sp": yspeed, "z_sp": zspeed, "distance_km": distance}
+    result = None
+    with metrics.stage("corridor"):
+        for result in corridor_stream(asteroid, levels = levels, time = time, workers = workers):
+            if cancelled is not None and cancelled():
+                raise SimulationCancelled()
+    fig = plot_corridor(result)
+    txt = f"Impact Corridor :- \n {result['hit_fraction']:.1%} of approach geometries hit the Earth. \n {result['runs']} trajectories integrated over {result['level']} refinement levels."
+    with metrics.stage("serialize"):
+        payload = fig.to_dict()
+    return payload, txt
@@ -0,0 +1,21 @@
+# tests/conftest.py
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def reference():
+    """One impacting scenario with its known answer (from the closed-form orbit).
+
+    scenario holds the batch/API fields, args the initial_states arguments
+    (speed, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km).
+    """
+    scenario = {"x_sp": -5.0, "y_sp": -5.0, "z_sp": -5.0, "distance_km": 10000.0, "size_m": 500.0,
+                "angle_deg": 45.0, "z_angle_deg": 45.0}
+    args = (75 ** 0.5, -5.0, -5.0, -5.0, 45.0, 45.0, 10000.0)
+    return SimpleNamespace(scenario=scenario, args=args, lat=57.951, lon=45.0, t_impact=1032.893)
@@ -0,0 +1,51 @@
+# tests/test_api.py
+import numpy as np
+import pytest
+
+import api
+
+def test_integrators_agree_and_trajectories_end_on_the_surface(reference):
+    results = {name: api.simulate([reference.scenario], name, points=3) for name in api.INTEGRATORS}
+    for result, trajectories in results.values():
+        assert result["impact"][0]
+        assert result["lat"][0] == pytest.approx(results["kepler"][0]["lat"][0], abs=0.1)
+        assert result["lon"][0] == pytest.approx(results["kepler"][0]["lon"][0], abs=0.1)
+        assert len(trajectories[0]) == 3
+        assert np.linalg.norm(trajectories[0][-1, :3]) == pytest.approx(6371, abs=1)
+
+def test_metrics_label_routes_not_paths(reference):
+    flask = pytest.importorskip("flask")
+    import metrics
+
+    server = flask.Flask(__name__)
+    metrics.install(server)
+    api.install(server)
+    client = server.test_client()
+    for path in ("/api/v1/simulate?" + "&".join(f"{k}={v}" for k, v in reference.scenario.items()),
+                 "/api/probe-1", "/api/probe-2"):
+        client.get(path)
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'path="/api/v1/simulate"' in text
+    assert "probe" not in text
+
+def test_total_trajectory_points_are_capped(reference, monkeypatch):
+    monkeypatch.setattr(api, "MAX_TOTAL_POINTS", 100)
+    assert api.parse_request([reference.scenario] * 10, {"points": 10})[2] == 10
+    with pytest.raises(api.RequestTooLarge):
+        api.parse_request([reference.scenario] * 11, {"points": 10})
+    with pytest.raises(api.RequestTooLarge):
+        api.parse_request([reference.scenario] * (api.MAX_SCENARIOS + 1), {})
+
+    flask = pytest.importorskip("flask")
+    server = flask.Flask(__name__)
+    api.install(server)
+    response = server.test_client().post("/api/v1/simulate", json={"scenarios": [reference.scenario] * 11,
+                                                                    "points": 10})
+    assert response.status_code == 413
+    assert "trajectory points" in response.get_json()["error"]
+
+def test_api_bodies_stay_out_of_the_figure_cache():
+    app = pytest.importorskip("app")
+
+    assert app.api_cache is not app.sim_cache
+    assert app.api_cache.directory != app.sim_cache.directory
@@ -0,0 +1,34 @@
+# tests/test_atlas.py
+import json
+import os
+
+import numpy as np
+import pytest
+
+import atlas
+from trajectory import impact_latlon
+
+@pytest.fixture(scope="module")
+def small_atlas(tmp_path_factory):
+    # one time-step band around the reference scenario (approach angle about 170 deg), so it builds fast
+    out = atlas.build(str(tmp_path_factory.mktemp("atlas")), speeds=(6, 11, 6), distances=(6000, 11000, 6),
+                      approaches=(150, 180, 31), workers=1)
+    return atlas.Atlas(out)
+
+def test_interpolation_matches_exact_integration(small_atlas, reference):
+    found = small_atlas.query(*reference.args)
+    speed, vel, distance, _, pos_dir, approach_dir, dt = atlas._geometry(*reference.args)
+    exact, sites = atlas._exact(speed, vel, distance, pos_dir, approach_dir)
+    lat, lon = impact_latlon(*sites[0], dt[0])
+    assert not found["exact"][0]
+    assert found["impact"][0] and exact["impact"][0]
+    assert found["lat"][0] == pytest.approx(lat, abs=0.1)
+    assert found["lon"][0] == pytest.approx(lon, abs=0.1)
+    assert found["t_impact"][0] == pytest.approx(exact["t_impact"][0], rel=0.01)
+
+def test_other_versions_are_ignored(small_atlas, tmp_path):
+    meta = dict(small_atlas.meta, version=atlas.ATLAS_VERSION - 1)
+    with open(os.path.join(tmp_path, "meta.json"), "w") as fh:
+        json.dump(meta, fh)
+    with pytest.raises(ValueError):
+        atlas.Atlas(str(tmp_path))
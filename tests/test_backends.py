@@ -0,0 +1,21 @@
+# tests/test_backends.py
+"""Parity between the NumPy and Numba RK4 backends (see check_backends.py)."""
+import pytest
+
+import trajectory
+from benchmarks import SCENARIOS, _traj_args
+from check_backends import _run, compare, jittered_states
+
+pytest.importorskip("numba")
+
+@pytest.fixture(autouse=True)
+def _restore_backend():
+    yield
+    trajectory.set_backend("auto")
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+def test_numba_matches_numpy(name):
+    args = _traj_args(SCENARIOS[name])
+    states, dt, steps = jittered_states(args)
+    problems = compare(name, _run("numpy", args, states, dt, steps), _run("numba", args, states, dt, steps))
+    assert not problems, "\n".join(problems)
@@ -0,0 +1,42 @@
+# tests/test_batch.py
+import csv
+import json
+
+import pytest
+
+from batch import main, run_scenario
+
+def _row(scenario):
+    return {"id": "r", **{k: str(v) for k, v in scenario.items()}}
+
+def test_integrators_agree_on_an_impact(reference):
+    results = {name: run_scenario(_row(reference.scenario), name) for name in ("rk4", "kepler", "adaptive")}
+    assert all(r["impact"] is True for r in results.values())
+    for r in results.values():
+        assert r["lat"] == pytest.approx(results["kepler"]["lat"], abs=0.01)
+        assert r["lon"] == pytest.approx(results["kepler"]["lon"], abs=0.01)
+
+def test_rk4_miss(reference):
+    result = run_scenario(_row(dict(reference.scenario, x_sp=-2, y_sp=-2, z_sp=-2, distance_km=20000,
+                                    angle_deg=120, z_angle_deg=120)))
+    assert result["impact"] is False
+
+@pytest.mark.parametrize("out_format", ["jsonl", "csv"])
+def test_rows_without_a_site_write_valid_output(reference, tmp_path, out_format):
+    still = dict(reference.scenario, id="still", x_sp=0, y_sp=0, z_sp=0)
+    broken = dict(reference.scenario, id="broken", size_m="nan")
+    src, dst = tmp_path / "in.jsonl", tmp_path / f"out.{out_format}"
+    src.write_text("".join(json.dumps(row) + "\n" for row in (reference.scenario, still, broken)))
+    main([str(src), str(dst), "--integrator", "rk4"])
+
+    if out_format == "jsonl":
+        def reject(name):
+            raise ValueError(name)
+        rows = [json.loads(line, parse_constant=reject) for line in dst.read_text().splitlines()]
+        empty = None
+    else:
+        rows = list(csv.DictReader(dst.open()))
+        empty = ""
+    assert rows[0]["error"] == "" and rows[0]["lat"] not in (None, "")
+    assert rows[1]["error"] == "" and rows[1]["lat"] == rows[1]["lon"] == empty
+    assert rows[2]["error"] == "ValueError: values must be finite"
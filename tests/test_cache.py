@@ -0,0 +1,83 @@
+# tests/test_cache.py
+import os
+import pickle
+
+import pytest
+
+import cache
+from cache import MISSING, ResultCache, quantize
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable stand-in for time.time inside cache.py."""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+def _pickles(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".pkl"))
+
+def test_quantize_bucket_boundaries():
+    steps = (0.001, 1, 0.1)
+    assert quantize((0.0014999, 2.4999, -0.2499), steps) == (0.001, 2, -0.2)
+    assert quantize((0.0015001, 2.5001, -0.2501), steps) == (0.002, 3, -0.3)
+    # multiples come back without float noise, so equal buckets give equal keys
+    assert quantize((0.1 * 3,), (0.1,)) == (0.3,)
+    assert quantize((0.30000001,), (0.1,)) == quantize((0.29999,), (0.1,))
+
+def test_quantize_leaves_labels_flags_and_unstepped_values():
+    assert quantize(("Rocky", True, 7.4, None), (1, 1, None, 1)) == ("Rocky", True, 7.4, None)
+
+def test_memory_tier_evicts_least_recently_used():
+    store = ResultCache(maxsize=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    assert store.get("a") == 1   # "b" is now the least recently used
+    store.set("c", 3)
+    assert store.get("b") is MISSING
+    assert (store.get("a"), store.get("c")) == (1, 3)
+    assert store.stats()["evictions"] == 1
+
+def test_memory_entries_expire_after_ttl(clock):
+    store = ResultCache(ttl=10)
+    store.set("a", 1)
+    clock[0] += 10
+    assert store.get("a") == 1
+    clock[0] += 0.5
+    assert store.get("a", "gone") == "gone"
+    assert store.stats()["expired"] == 1
+
+def test_disk_tier_reads_back_in_a_fresh_process(tmp_path):
+    ResultCache(directory=str(tmp_path)).set(("key", 1.5), {"figure": [1, 2]})
+    other = ResultCache(directory=str(tmp_path))
+    assert other.get(("key", 1.5)) == {"figure": [1, 2]}
+    assert other.get(("key", 1.5)) == {"figure": [1, 2]}
+    stats = other.stats()
+    assert (stats["disk_hits"], stats["hits"]) == (1, 1)
+    assert os.listdir(tmp_path) == _pickles(tmp_path)   # no temporary files left behind
+
+def test_disk_entries_expire_by_mtime(tmp_path, clock):
+    ResultCache(ttl=10, directory=str(tmp_path)).set("a", 1)
+    (name,) = _pickles(tmp_path)
+    os.utime(tmp_path / name, (clock[0] - 11, clock[0] - 11))
+    assert ResultCache(ttl=10, directory=str(tmp_path)).get("a") is MISSING
+    assert _pickles(tmp_path) == []
+
+def test_failed_disk_write_leaves_no_file(tmp_path):
+    store = ResultCache(directory=str(tmp_path))
+    store.set("a", 1)
+    (name,) = _pickles(tmp_path)
+    before = (tmp_path / name).read_bytes()
+    store.set("a", lambda: None)   # unpicklable: kept in memory only
+    assert callable(store.get("a"))
+    assert os.listdir(tmp_path) == [name]
+    assert (tmp_path / name).read_bytes() == before
+    assert pickle.loads(before) == ("a", 1)
+
+def test_disk_tier_keeps_the_newest_entries(tmp_path):
+    store = ResultCache(directory=str(tmp_path), max_disk_entries=3)
+    for k in range(5):
+        store.set(k, k)
+        path = store._path(k)
+        os.utime(path, (1000 + k, 1000 + k))
+    assert _pickles(tmp_path) == sorted(os.path.basename(store._path(k)) for k in (2, 3, 4))
@@ -0,0 +1,19 @@
+# tests/test_corridor.py
+import numpy as np
+import pytest
+
+from corridor import evaluate_points
+from kepler import asteroid_trajectory_kepler
+from trajectory import impact_latlon
+
+def test_corridor_impacts_match_the_closed_form():
+    points = np.array([[22.5, 30.0], [45.0, 45.0], [60.0, 200.0], [120.0, 120.0]])
+    found = evaluate_points({"x_sp": -5, "y_sp": -5, "z_sp": -5, "distance_km": 10000}, points)
+    assert found["impact"].sum() >= 2
+    for (z_angle, angle), hit, lat, lon in zip(points, found["impact"], found["lat"], found["lon"]):
+        xs, ys, zs, _, t_impact = asteroid_trajectory_kepler(np.sqrt(75), -5, -5, -5, angle, z_angle, 10000, samples=2)
+        assert hit == (t_impact is not None)
+        if hit:
+            ref_lat, ref_lon = impact_latlon(xs[-1], ys[-1], zs[-1])
+            assert lat == pytest.approx(ref_lat, abs=0.01)
+            assert lon == pytest.approx(ref_lon, abs=0.01)
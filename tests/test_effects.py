@@ -0,0 +1,52 @@
+# tests/test_effects.py
+import numpy as np
+import pytest
+
+import effects
+from effects import EFFECTS, LOG_ENERGY, LOG_RADIUS, effect_radii, effects_raster
+from population import haversine
+
+def test_ring_radii_grow_with_energy():
+    radii = effect_radii(np.logspace(8, 27, 2000))
+    assert radii.shape == (2000, len(EFFECTS))
+    assert np.all(np.diff(radii, axis=0) >= 0)
+    assert np.all(radii[-1] > radii[0])
+
+def test_radii_interpolate_the_tables_in_log_log_space():
+    np.testing.assert_allclose(effect_radii(10.0 ** LOG_ENERGY), 10.0 ** LOG_RADIUS.T, rtol=1e-12)
+    mid = (LOG_ENERGY[:-1] + LOG_ENERGY[1:]) / 2
+    np.testing.assert_allclose(np.log10(effect_radii(10.0 ** mid)), (LOG_RADIUS[:, :-1] + LOG_RADIUS[:, 1:]).T / 2,
+                               atol=1e-9)
+
+def test_radii_below_the_tables_are_zero():
+    assert effect_radii(0.0).tolist() == [0.0] * len(EFFECTS)
+    assert effect_radii(10.0 ** (LOG_ENERGY[0] - 1)).tolist() == [0.0] * len(EFFECTS)
+    assert effect_radii(np.array([[1e20, 1e5]])).shape == (1, 2, len(EFFECTS))
+
+@pytest.mark.parametrize("lat, lon", [(10.0, 20.0), (0.0, 179.5), (88.0, -40.0)])
+def test_raster_severity_matches_the_rings(lat, lon):
+    energy = 1e20
+    raster = effects_raster(lat, lon, energy, cells=81)
+    severity = raster["severity"]
+    assert severity.shape == (81, 81) and severity.dtype == np.uint8
+    assert raster["lat"].shape == raster["lon"].shape == (81,)
+    assert raster["lat"].min() >= -90 and raster["lat"].max() <= 90
+
+    radii = effect_radii(energy)
+    assert raster["radii_km"] == pytest.approx(dict(zip(EFFECTS, radii)))
+    dist = haversine(lat, lon, raster["lat"][:, None], raster["lon"][None, :])
+    expected = np.zeros(dist.shape, dtype=np.uint8)
+    for level, radius in enumerate(radii, 1):
+        expected[dist <= radius] = level
+    np.testing.assert_array_equal(severity, expected)
+    # the window covers the widest ring with a margin (away from the poles, where it is clipped)
+    if abs(lat) < 80:
+        assert severity[40, 40] == len(EFFECTS)
+        assert not severity[[0, -1], :].any() and not severity[:, [0, -1]].any()
+
+def test_exposure_needs_a_population_raster(monkeypatch):
+    monkeypatch.setattr(effects, "affected_population", lambda lat, lon, radius: None)
+    assert effects.ring_exposure(10.0, 20.0, 1e20) is None
+    monkeypatch.setattr(effects, "affected_population", lambda lat, lon, radius: radius * 2)
+    counts = effects.ring_exposure(10.0, 20.0, 1e20)
+    assert counts == pytest.approx({name: 2 * r for name, r in zip(EFFECTS, effect_radii(1e20))})
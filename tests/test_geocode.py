@@ -0,0 +1,56 @@
+# tests/test_geocode.py
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import geocode
+from population import haversine
+
+@pytest.fixture(scope="module")
+def geocoder(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("geodata")
+    for name in ("cities.csv", "regions.json"):
+        shutil.copy(os.path.join(geocode.DATA_DIR, name), data_dir / name)
+    return geocode.Geocoder(geocode.ensure_index(str(data_dir)))
+
+def _city(geocoder, lat, lon):
+    index = int(geocoder.nearest_cities([lat], [lon])[0][0])
+    return geocoder.meta["cities"][index], geocoder.meta["countries"][index]
+
+@pytest.mark.parametrize("lat, lon, label", [
+    (48.85, 2.35, "Paris, France (Europe)"),
+    (35.68, 139.69, "Tokyo, Japan (Asia)"),
+    (-33.87, 151.21, "Sydney, Australia (Australia)"),
+    (40.7, -74.0, "New York, United States (North America)"),
+])
+def test_cities_on_land(geocoder, lat, lon, label):
+    assert geocoder.describe(lat, lon) == label
+
+def test_ocean_points_name_the_hemisphere_and_nearest_city(geocoder):
+    assert geocoder.describe(0.0, -30.0).startswith("North Atlantic Ocean, ")
+    assert geocoder.describe(0.0, -30.0).endswith(" km from Fortaleza, Brazil")
+    assert geocoder.describe(-30.0, -20.0).startswith("South Atlantic Ocean, ")
+    assert geocoder.describe(30.0, -150.0).startswith("North Pacific Ocean, ")
+    assert geocoder.describe(43.0, 35.0).startswith("Black Sea, ")
+
+def test_dateline_and_poles(geocoder):
+    east, west = geocoder.describe(0.0, 179.9), geocoder.describe(0.0, -179.9)
+    assert east.startswith("North Pacific Ocean, ") and west.startswith("North Pacific Ocean, ")
+    assert _city(geocoder, 0.0, 179.9) == _city(geocoder, 0.0, -179.9) == ("Tarawa", "Kiribati")
+    assert geocoder.describe(0.0, 180.0) == geocoder.describe(0.0, -180.0)
+    assert geocoder.describe(90.0, 0.0).startswith("Arctic Ocean, ")
+    assert geocoder.describe(-90.0, 0.0).endswith("(Antarctica)")
+
+def test_nearest_cities_match_brute_force(geocoder):
+    rng = np.random.default_rng(17)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, 500)))
+    lon = rng.uniform(-180, 180, 500)
+    index, km = geocoder.nearest_cities(lat, lon)
+    xyz = np.asarray(geocoder.city_xyz)
+    city_lat = np.degrees(np.arcsin(xyz[:, 2]))
+    city_lon = np.degrees(np.arctan2(xyz[:, 1], xyz[:, 0]))
+    dist = haversine(lat[:, None], lon[:, None], city_lat[None, :], city_lon[None, :])
+    np.testing.assert_allclose(km, dist.min(axis=1), atol=1e-3)
+    np.testing.assert_allclose(dist[np.arange(len(lat)), index], dist.min(axis=1), atol=1e-3)
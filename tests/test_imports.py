@@ -0,0 +1,12 @@
+# tests/test_imports.py
+"""Import-time budgets of the compute core (see check_imports.py)."""
+import pytest
+
+from check_imports import BUDGETS_MS, measure
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_import_budget(module):
+    ms, loaded = measure(module)
+    assert not loaded, f"{module} imports {', '.join(loaded)}; those stacks must load lazily"
+    assert ms <= BUDGETS_MS[module], f"{module} takes {ms:.1f} ms to import, budget {BUDGETS_MS[module]} ms"
+
@@ -0,0 +1,69 @@
+# tests/test_jobs.py
+import time
+
+import pytest
+
+import jobs
+
+def _double(x, progress=None):
+    return 2 * x
+
+@pytest.fixture
+def short_heartbeat(monkeypatch):
+    monkeypatch.setattr(jobs, "HEARTBEAT_INTERVAL", 0.1)
+    monkeypatch.setattr(jobs, "HEARTBEAT_TIMEOUT", 0.5)
+
+def _wait_done(manager, jid, timeout=30):
+    deadline = time.monotonic() + timeout
+    while manager.status(jid)["status"] not in ("done", "error") and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return manager.status(jid)
+
+def test_identical_live_jobs_are_shared(tmp_path):
+    manager = jobs.JobManager(str(tmp_path / "jobs.sqlite"), workers=1)
+    first = manager.submit(("same",), _double, 21)
+    assert manager.submit(("same",), _double, 21) == first
+    assert _wait_done(manager, first)["status"] == "done"
+    assert manager.result(first) == (("same",), 42)
+
+def test_abandoned_job_is_resubmitted(tmp_path, short_heartbeat):
+    manager = jobs.JobManager(str(tmp_path / "jobs.sqlite"), workers=1)
+    jid = jobs.job_id(("lost",))
+    # a row left running by a process that died
+    manager.store.create(jid, ("lost",))
+    manager.store.update(jid, status="running")
+    time.sleep(0.6)
+    assert manager.status(jid)["status"] == "error"
+    assert manager.submit(("lost",), _double, 4) == jid
+    assert _wait_done(manager, jid)["status"] == "done"
+    assert manager.result(jid) == (("lost",), 8)
+
+def test_long_scenario_runs_as_a_background_job(tmp_path, monkeypatch, reference):
+    app = pytest.importorskip("app")
+    from cache import ResultCache
+
+    s = reference.scenario
+    steps = app.estimated_steps(s["x_sp"], s["y_sp"], s["z_sp"], s["distance_km"], s["angle_deg"], s["z_angle_deg"])
+    assert steps > 0
+    monkeypatch.setattr(app, "BACKGROUND_STEPS", steps - 1)
+    monkeypatch.setattr(app, "jobs", jobs.JobManager(str(tmp_path / "jobs.sqlite"), workers=1))
+    monkeypatch.setattr(app, "sim_cache", ResultCache(maxsize=4))
+    inputs = (s["x_sp"], s["y_sp"], s["z_sp"], s["distance_km"], s["size_m"], s["angle_deg"], s["z_angle_deg"],
+              "Rocky", "Solid", 0)
+    _, text, jid, poll_disabled = app.run_simulation(1, *inputs)
+    assert jid and not poll_disabled and "background" in text
+
+    deadline = time.monotonic() + 60
+    while True:
+        figure, text, poll_disabled = app.poll_job(1, jid)
+        if poll_disabled or time.monotonic() > deadline:
+            break
+        time.sleep(0.1)
+    assert poll_disabled and "Impact Location" in text
+    assert figure["data"]
+
+    response = app.server.test_client().get(f"/jobs/{jid}/result")
+    assert response.status_code == 200
+    assert response.get_json()["text"] == text
+    # the finished job fills the cache, so the same click is now answered directly
+    assert app.run_simulation(2, *inputs)[2] is None
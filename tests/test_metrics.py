@@ -0,0 +1,71 @@
+# tests/test_metrics.py
+import re
+
+import pytest
+
+import metrics
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_]\w*="[^"]*"(,[a-zA-Z_]\w*="[^"]*")*\})? \S+$')
+
+@pytest.fixture
+def fresh(monkeypatch):
+    """Empty metric registries, so the test sees only what it records."""
+    for name in ("_counters", "_histograms", "_buckets"):
+        monkeypatch.setattr(metrics, name, {})
+    monkeypatch.setattr(metrics, "_gauge_sources", [])
+    monkeypatch.setattr(metrics, "ENABLED", True)
+
+def test_render_is_prometheus_text(fresh):
+    metrics.inc("sim_runs_total", integrator="rk4")
+    metrics.inc("sim_runs_total", 2, integrator="rk4")
+    metrics.inc("sim_runs_total", integrator="kepler")
+    for value in (0.003, 0.2, 0.2, 99):
+        metrics.observe("sim_stage_seconds", value, stage="frames")
+    metrics.add_gauges(lambda: {"sim_cache_size": 3})
+    text = metrics.render()
+    lines = text.splitlines()
+
+    assert text.endswith("\n")
+    types = [line for line in lines if line.startswith("# TYPE ")]
+    assert types == ["# TYPE sim_runs_total counter", "# TYPE sim_stage_seconds histogram",
+                     "# TYPE sim_cache_size gauge"]
+    samples = [line for line in lines if not line.startswith("#")]
+    assert all(SAMPLE.match(line) for line in samples), samples
+    assert 'sim_runs_total{integrator="rk4"} 3' in samples
+    assert 'sim_runs_total{integrator="kepler"} 1' in samples
+    assert "sim_cache_size 3" in samples
+
+    buckets = [line for line in samples if line.startswith("sim_stage_seconds_bucket")]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert len(buckets) == len(metrics.TIME_BUCKETS) + 1
+    assert counts == sorted(counts)   # cumulative
+    assert buckets[-1] == 'sim_stage_seconds_bucket{stage="frames",le="+Inf"} 4'
+    assert 'sim_stage_seconds_bucket{stage="frames",le="0.25"} 3' in samples
+    assert 'sim_stage_seconds_count{stage="frames"} 4' in samples
+    assert float(next(line for line in samples if line.startswith("sim_stage_seconds_sum")).split()[1]) == \
+        pytest.approx(99.403)
+
+def test_stage_times_its_block(fresh):
+    with metrics.stage("physics"):
+        pass
+    assert 'sim_stage_seconds_count{stage="physics"} 1' in metrics.render()
+
+def test_disabled_metrics_are_no_ops(fresh, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    assert metrics.stage("a") is metrics.stage("b")
+    with metrics.stage("physics"):
+        metrics.inc("sim_runs_total")
+        metrics.observe("sim_stage_seconds", 1.0)
+    assert metrics.render() == "\n"
+
+def test_metrics_route_serves_text(fresh):
+    flask = pytest.importorskip("flask")
+
+    server = flask.Flask(__name__)
+    metrics.install(server)
+    server.add_url_rule("/ping", "ping", lambda: "pong")
+    client = server.test_client()
+    client.get("/ping")
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    assert 'sim_http_request_seconds_count{path="other"} 1' in response.get_data(as_text=True)
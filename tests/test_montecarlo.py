@@ -0,0 +1,32 @@
+# tests/test_montecarlo.py
+import numpy as np
+
+from montecarlo import monte_carlo
+
+SIGMA = {"x_sp": 0.05, "y_sp": 0.05, "z_sp": 0.05, "distance_km": 50}
+
+def _run(reference, **kwargs):
+    s = reference.scenario
+    return monte_carlo(s, SIGMA, angle_deg=s["angle_deg"], z_angle_deg=s["z_angle_deg"], **kwargs)
+
+def test_footprint_centres_on_the_nominal_impact(reference):
+    result = _run(reference, n=500, workers=1, seed=1, shard_size=250)
+    assert result["hits"] == 500
+    assert abs(np.mean(result["lat"]) - reference.lat) < 0.5
+    assert abs(np.mean(result["lon"]) - reference.lon) < 0.5
+
+def test_results_do_not_depend_on_the_worker_count(reference):
+    kwargs = dict(n=600, seed=7, shard_size=100, max_points=250)
+    serial, pooled = _run(reference, workers=1, **kwargs), _run(reference, workers=3, **kwargs)
+    assert serial.keys() == pooled.keys()
+    for key, value in serial.items():
+        np.testing.assert_array_equal(pooled[key], value, err_msg=key)
+    assert len(serial["lat"]) == 250
+
+def test_no_clones_give_an_empty_result(reference):
+    result = _run(reference, n=0, workers=1)
+    nonempty = _run(reference, n=10, workers=1, shard_size=10)
+    assert result.keys() == nonempty.keys()
+    assert (result["n"], result["hits"], result["hit_fraction"], result["mean_energy"]) == (0, 0, 0.0, 0.0)
+    assert result["latlon_hist"].shape == nonempty["latlon_hist"].shape and not result["latlon_hist"].any()
+    assert len(result["lat"]) == 0 and result["region_hist"].shape == nonempty["region_hist"].shape
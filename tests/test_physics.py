@@ -0,0 +1,51 @@
+# tests/test_physics.py
+import itertools
+
+import numpy as np
+import pytest
+
+import physics
+from effects import body_sim
+from mitigation import strategy
+
+MATERIALS = ("default", "rocky", "metallic", "icy", "Rocky", "basalt")
+SIZES = (1, 100, 100.0001, 240, 240.0001, 500, 500.0001, 20000)   # radius boundaries 50, 120, 250 m
+DISTANCES = (1000, 200000, 200000.1, 9999999, 10000000, 19999999, 20000000, 1e9)
+SPEEDS = (0, 11.2, 72)
+
+def baseline(size_m, speed_km_s, distance_km, dtype="default", rubble=False):
+    """Energy, impact radius and strategy as the original scalar mitigation.strategy computed them."""
+    radius = size_m / 2
+    rho = {"default": 3000, "rocky": 3300, "metallic": 4200, "icy": 1200}.get(dtype, 3000)
+    if rubble:
+        rho -= 500
+    energy = 0.5 * rho * (4/3) * np.pi * radius**3 * speed_km_s**2 * 1e6
+    far, near = distance_km >= 20000000, distance_km <= 200000
+    if radius <= 50:
+        code = 0 if distance_km >= 10000000 else 1
+    elif radius <= 120:
+        code = 2 if far else 3 if near else 4
+    elif radius <= 250:
+        code = 5 if far else 3 if near else 6
+    else:
+        code = 7 if far else 3 if near else 8
+    return energy, (energy / 1e15)**0.33 * 10, code
+
+def test_vectorized_physics_matches_the_scalar_formulas():
+    grid = list(itertools.product(SIZES, SPEEDS, DISTANCES, MATERIALS, (False, True)))
+    size, speed, distance, material, rubble = (np.array(column) for column in zip(*grid))
+    phys = physics.impact_physics(size, speed, distance, material, rubble)
+    # material names are case-insensitive now (the scalar code treated "Rocky" as default)
+    expected = [baseline(s, v, d, m.lower(), r) for s, v, d, m, r in grid]
+    energy, radius, code = (np.array(column) for column in zip(*expected))
+    np.testing.assert_allclose(phys["energy"], energy, rtol=1e-12)
+    np.testing.assert_allclose(phys["impact_radius"], radius, rtol=1e-12)
+    np.testing.assert_allclose(phys["tnt_tons"], energy / 4.184e9, rtol=1e-12)
+    np.testing.assert_array_equal(phys["strategy"], code)
+
+@pytest.mark.parametrize("size_m, distance_km", list(itertools.product(SIZES, DISTANCES)))
+def test_scalar_wrappers_keep_their_answers(size_m, distance_km):
+    asteroid = {"size_m": size_m, "speed_km_s": 20.0, "distance_km": distance_km}
+    energy, radius, code = baseline(size_m, 20.0, distance_km, "metallic")
+    assert strategy(asteroid, "metallic", rubble=True) == physics.STRATEGIES[code]
+    assert body_sim(asteroid, "metallic") == pytest.approx((energy, radius), rel=1e-12)
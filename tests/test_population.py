@@ -0,0 +1,86 @@
+# tests/test_population.py
+import numpy as np
+import pytest
+
+tifffile = pytest.importorskip("tifffile")
+
+from population import PopulationRaster, haversine
+
+ROWS, COLS = 90, 180  # 2° global grid
+
+LAYOUTS = {
+    "plain": {},
+    "tiled": {"tile": (16, 16), "compression": "zlib"},
+    "strips": {"rowsperstrip": 7, "compression": "zlib"},
+}
+
+# (lat, lon, radius_km): mid-latitude, both sides of the dateline, both poles, and a wide disc
+WINDOWS = [
+    (10.0, 20.0, 500.0),
+    (0.0, 179.5, 800.0),
+    (-30.0, -179.0, 600.0),
+    (88.0, 0.0, 500.0),
+    (-89.0, 100.0, 300.0),
+    (45.0, -60.0, 5000.0),
+]
+
+@pytest.fixture(scope="module")
+def values():
+    return np.random.default_rng(4).uniform(0, 1000, (ROWS, COLS)).astype(np.float32)
+
+@pytest.fixture(scope="module", params=sorted(LAYOUTS))
+def raster(request, tmp_path_factory, values):
+    path = str(tmp_path_factory.mktemp("pop") / f"{request.param}.tif")
+    tifffile.imwrite(path, values, **LAYOUTS[request.param])
+    return PopulationRaster(path)
+
+def brute_force(values, lat, lon, radius_km, areas=None):
+    lat_c = 90 - (np.arange(ROWS) + 0.5) * 180 / ROWS
+    lon_c = -180 + (np.arange(COLS) + 0.5) * 360 / COLS
+    dist = haversine(lat, lon, lat_c[:, None], lon_c[None, :])
+    counts = values.astype(np.float64) * (1 if areas is None else areas[:, None])
+    return counts[dist <= radius_km].sum()
+
+def test_layouts_decode_the_same_values(raster, values):
+    assert raster.wraps
+    np.testing.assert_array_equal(raster.read(0, ROWS, 0, COLS), values)
+    np.testing.assert_array_equal(raster.read(13, 41, 170, 180), values[13:41, 170:180])
+
+@pytest.mark.parametrize("lat, lon, radius_km", WINDOWS)
+def test_window_matches_brute_force(raster, values, lat, lon, radius_km):
+    assert raster.population_within(lat, lon, radius_km) == pytest.approx(
+        brute_force(values, lat, lon, radius_km), rel=1e-9
+    )
+
+def test_density_is_scaled_by_cell_area(tmp_path, values):
+    path = str(tmp_path / "density.tif")
+    tifffile.imwrite(path, values)
+    raster = PopulationRaster(path, kind="density")
+    areas = raster.cell_area(90 - np.arange(ROWS) * 180 / ROWS)
+    assert areas.sum() * COLS == pytest.approx(4 * np.pi * 6371 ** 2)
+    for lat, lon, radius_km in WINDOWS:
+        assert raster.population_within(lat, lon, radius_km) == pytest.approx(
+            brute_force(values, lat, lon, radius_km, areas), rel=1e-9
+        )
+
+def test_georeferenced_regional_raster(tmp_path):
+    # A 1° raster over lat 40..30, lon 10..30 that does not wrap
+    data = np.ones((10, 20), dtype=np.float32)
+    path = str(tmp_path / "region.tif")
+    tifffile.imwrite(path, data, extratags=[
+        (33550, "d", 3, (1.0, 1.0, 0.0)),
+        (33922, "d", 6, (0, 0, 0, 10.0, 40.0, 0.0)),
+    ])
+    raster = PopulationRaster(path)
+    assert not raster.wraps
+    assert (raster.lon0, raster.lat0) == (10.0, 40.0)
+    assert raster.population_within(35.5, 20.5, 10000) == 200
+    assert raster.population_within(35.5, 9.0, 100) == 0
+    assert raster.population_within(-20.0, 20.0, 500) == 0.0
+
+def test_sub_cell_radius_takes_an_area_share(raster, values):
+    # 5 km at (9.3, 20.7) contains no cell centre; it takes πr²/area of its cell
+    row, col = int((90 - 9.3) // 2), int((20.7 + 180) // 2)
+    share = np.pi * 5 ** 2 / raster.cell_area(90 - row * 2.0)
+    assert brute_force(values, 9.3, 20.7, 5.0) == 0
+    assert raster.population_within(9.3, 20.7, 5.0) == pytest.approx(values[row, col] * share)
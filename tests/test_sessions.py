@@ -0,0 +1,58 @@
+# tests/test_sessions.py
+import sqlite3
+
+import pytest
+
+import jobs
+import sessions
+from sessions import ClickRegistry
+
+def test_later_click_supersedes_only_its_own_session(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    worker_a, worker_b = ClickRegistry(path), ClickRegistry(path)   # two web worker processes
+    worker_a.claim("page-1", 1)
+    worker_a.claim("page-2", 1)
+    assert not worker_b.superseded("page-1", 1)
+
+    worker_b.claim("page-1", 2)
+    assert worker_a.superseded("page-1", 1)
+    assert not worker_a.superseded("page-1", 2)
+    assert not worker_a.superseded("page-2", 1)
+    assert not worker_a.superseded("page-3", 7)   # never claimed
+
+def test_idle_sessions_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(sessions, "PRUNE_INTERVAL", 0)
+    clock = [1000.0]
+    monkeypatch.setattr(sessions.time, "time", lambda: clock[0])
+    registry = ClickRegistry(str(tmp_path / "jobs.sqlite"), ttl=60)
+    registry.claim("old", 1)
+    clock[0] += 61
+    registry.claim("new", 1)
+    with sqlite3.connect(registry.path) as db:
+        assert [row[0] for row in db.execute("SELECT session FROM clicks")] == ["new"]
+
+@pytest.mark.parametrize("module", [sessions, jobs])
+def test_connections_are_closed(tmp_path, monkeypatch, module):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(module.sqlite3, "connect", tracking_connect)
+    path = str(tmp_path / "jobs.sqlite")
+    if module is sessions:
+        registry = ClickRegistry(path)
+        registry.claim("page", 1)
+        assert not registry.superseded("page", 1)
+    else:
+        store = jobs.JobStore(path)
+        store.create("j", ("key",))
+        store.update("j", status="done", result=1)
+        assert store.result("j") == (("key",), 1)
+    monkeypatch.undo()
+    assert opened
+    for db in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            db.execute("SELECT 1")
@@ -0,0 +1,63 @@
+# tests/test_trajectory.py
+import numpy as np
+import pytest
+
+from trajectory import EARTH_RADIUS_KM, initial_states, asteroid_trajectory_batch, asteroid_trajectory_adaptive
+from trajectory import impact_latlon
+from kepler import asteroid_trajectory_kepler
+
+# (x_sp, y_sp, z_sp, distance_km, angle_deg, z_angle_deg)
+HITS = [(-5, 0, 0, 20000, 0, 90), (-5, -5, -5, 10000, 30, 22.5), (-3, 1, -2, 5000, 200, 60)]
+MISS = (-2, -2, -2, 20000, 120, 120)
+
+def _args(scenario):
+    vx, vy, vz, distance, angle, z_angle = scenario
+    return (np.sqrt(vx * vx + vy * vy + vz * vz), vx, vy, vz, angle, z_angle, distance)
+
+def _crossing(args):
+    states, dt, steps = initial_states(*args)
+    return asteroid_trajectory_batch(states, dt, steps, record=False, crossing=True)
+
+@pytest.mark.parametrize("scenario", HITS)
+def test_crossing_matches_closed_form(scenario):
+    args = _args(scenario)
+    _, final, impacted, _, sites, t_site = _crossing(args)
+    xs, ys, zs, _, t_impact = asteroid_trajectory_kepler(*args, samples=2)
+    assert impacted[0]
+    assert np.linalg.norm(sites[0]) == pytest.approx(EARTH_RADIUS_KM)
+    assert np.linalg.norm(sites[0] - [xs[-1], ys[-1], zs[-1]]) < 1.0   # km
+    assert t_site[0] == pytest.approx(t_impact, rel=1e-5)
+    # the final position is the legacy correction point, nowhere near the surface
+    assert np.linalg.norm(final[0]) > 10 * EARTH_RADIUS_KM
+
+def test_reference_site(reference):
+    _, _, impacted, _, sites, t_site = _crossing(reference.args)
+    lat, lon = impact_latlon(*sites[0])
+    assert impacted[0]
+    assert (lat, lon) == (pytest.approx(reference.lat, abs=1e-3), pytest.approx(reference.lon, abs=1e-3))
+    assert t_site[0] == pytest.approx(reference.t_impact, abs=1e-2)
+
+def test_crossing_matches_adaptive_event(reference):
+    *_, t_site = _crossing(reference.args)
+    assert t_site[0] == pytest.approx(asteroid_trajectory_adaptive(*reference.args, tol=1e-9)[4], rel=1e-5)
+
+def test_misses_have_no_site():
+    _, _, impacted, _, sites, t_site = _crossing(_args(MISS))
+    assert not impacted[0]
+    assert np.isnan(sites[0]).all() and np.isnan(t_site[0])
+
+def test_single_and_batched_kepler_propagation_agree():
+    from kepler import kepler_impact, propagate, propagate_many
+
+    states = np.vstack([initial_states(*_args(s))[0] for s in HITS + [MISS]])
+    found = kepler_impact(states)
+    chi = np.where(found["impact"], found["chi_impact"], found["chi_perigee"])
+    chi = np.nan_to_num(chi, nan=10.0)
+    pos, t = propagate_many(states, chi, times=True)
+    for k, state in enumerate(states):
+        single_pos, single_t = propagate(state, [0.0, chi[k]])
+        np.testing.assert_allclose(single_pos[0], state[:3])
+        np.testing.assert_allclose(single_pos[1], pos[k])
+        assert single_t[1] == pytest.approx(t[k])
+    np.testing.assert_allclose(t[found["impact"]], found["t_impact"][found["impact"]])
+    np.testing.assert_allclose(np.linalg.norm(pos[found["impact"]], axis=1), EARTH_RADIUS_KM, rtol=1e-9)
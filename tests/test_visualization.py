@@ -0,0 +1,94 @@
+# tests/test_visualization.py
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("plotly")
+
+from visualization import plot_simulation_video
+
+INTEGRATORS = ("rk4", "adaptive", "kepler")
+
+def _asteroid(x_sp, y_sp, z_sp, distance_km):
+    return {"speed_km_s": (x_sp ** 2 + y_sp ** 2 + z_sp ** 2) ** 0.5, "x_sp": x_sp, "y_sp": y_sp, "z_sp": z_sp,
+            "distance_km": distance_km}
+
+def _site(fig):
+    impact = next(t for t in fig.data if t.name == "Impact")
+    return impact.x[0], impact.y[0], impact.z[0]
+
+@pytest.mark.parametrize("scenario, angles", [((-5, 0, 0, 20000), (0, 90)), ((-5, -5, -5, 10000), (45, 45))])
+def test_integrators_agree_on_impacts(scenario, angles):
+    runs = {name: plot_simulation_video(_asteroid(*scenario), *angles, integrator=name, compact=True)
+            for name in INTEGRATORS}
+    for name, (imp_loc, _, _, stat, fig) in runs.items():
+        assert stat == "Impact", name
+        assert fig.layout.meta["effects"] is not None
+        ref = _site(runs["kepler"][4])
+        assert _site(fig) == (pytest.approx(ref[0], abs=5), pytest.approx(ref[1], abs=5), pytest.approx(ref[2], abs=5))
+
+def test_integrators_agree_on_a_miss():
+    for name in INTEGRATORS:
+        stat = plot_simulation_video(_asteroid(-2, -2, -2, 20000), 120, 120, integrator=name, compact=True)[3]
+        assert stat.startswith("Miss"), name
+
+def test_compact_frames_fit_the_budget_and_toggle_at_impact():
+    from visualization import EARTH_RADIUS_KM, _compact_frames
+
+    # a straight fall from 20000 km that ends 100 km inside the Earth
+    x = np.linspace(20000, EARTH_RADIUS_KM - 100, 5000)
+    zeros = np.zeros_like(x)
+    frames = _compact_frames(x, zeros, zeros, 50, overlays=(5,))
+    assert len(frames) == 50
+    assert frames[-1].data[0].x[0] >= EARTH_RADIUS_KM
+    flash = int(np.ceil(50 * 0.9))
+    toggles = {k: f for k, f in enumerate(frames) if len(f.traces) > 1}
+    assert sorted(toggles) == [0, flash, 49]
+    assert all(list(f.traces) == [0, 2, 4, 5] for f in toggles.values())
+    # damage sphere and overlay only on the last frame, impact marker from the flash frame on
+    visible = {k: [t.visible for t in f.data[1:]] for k, f in toggles.items()}
+    assert visible == {0: [False, False, False], flash: [False, True, False], 49: [True, True, True]}
+    assert all(list(f.traces) == [0] for k, f in enumerate(frames) if k not in toggles)
+
+def test_short_paths_keep_their_points():
+    from visualization import _compact_frames
+
+    frames = _compact_frames(np.array([9000.0, 8000.0, 7000.0]), np.zeros(3), np.zeros(3), 50)
+    assert [f.data[0].x[0] for f in frames] == [9000, 8000, 7000]
+
+def test_figure_respects_the_frame_budget(reference):
+    s = reference.scenario
+    fig = plot_simulation_video(_asteroid(s["x_sp"], s["y_sp"], s["z_sp"], s["distance_km"]), s["angle_deg"],
+                                s["z_angle_deg"], integrator="kepler", compact=True, frame_budget=30)[4]
+    assert 0 < len(fig.frames) <= 30
+    assert [fig.data[k].name for k in (0, 2, 4)] == ["Asteroid", "Damage Zone", "Impact"]
+    assert fig.data[2].visible is False and fig.data[4].visible is False
+
+def test_template_earth_is_an_empty_stand_in(reference):
+    from visualization import MESH_LEVELS, earth_mesh
+
+    s = reference.scenario
+    asteroid = _asteroid(s["x_sp"], s["y_sp"], s["z_sp"], s["distance_km"])
+    figs = {mode: plot_simulation_video(asteroid, 45, 45, integrator="kepler", compact=True, earth=mode, lod="low")[4]
+            for mode in ("template", "inline")}
+    earth = {mode: next(t for t in fig.data if t.name == "Earth") for mode, fig in figs.items()}
+    assert earth["template"].meta == {"template": "earth", "lod": "low"}
+    assert earth["template"].z is None and earth["template"].x is None
+    assert "z" not in figs["template"].to_dict()["data"][3]
+    assert earth["inline"].meta is None
+    np.testing.assert_allclose(np.array(earth["inline"].z, dtype=float), earth_mesh("low")[2])
+    assert len(figs["template"].to_json()) < len(figs["inline"].to_json())
+    assert set(MESH_LEVELS) == {"low", "medium", "high"}
+
+def test_earth_template_script_holds_every_level():
+    from visualization import MESH_LEVELS, earth_mesh, earth_template_js
+
+    script = earth_template_js()
+    assert script.startswith("window.earthMeshes = ") and script.endswith(";\n")
+    meshes = json.loads(script[len("window.earthMeshes = "):-2])
+    assert set(meshes) == set(MESH_LEVELS)
+    for level, mesh in meshes.items():
+        for axis, values in zip("xyz", earth_mesh(level)):
+            np.testing.assert_allclose(mesh[axis], values)
+        assert mesh["showscale"] is False
@@ -0,0 +1,391 @@
+# trajectory.py
+"""Trajectory core: NumPy only, so it imports fast in batch and pool workers.
+
+The fixed-step RK4 paths run on a pluggable backend: "numpy" (the code
+below) or "numba" (numba_kernels.py, compiled and cached on disk). The
+SIM_BACKEND environment variable or set_backend() picks one; the default
+"auto" uses Numba when it is installed. Numba is only imported on the first
+integration, never at import time.
+"""
+import importlib.util
+import os
+
+import numpy as np
+
+class SimulationCancelled(Exception):
+    """Raised when a caller's cancelled() check says the run is no longer wanted."""
+
+EARTH_RADIUS_KM = 6371
+MU_EARTH = 6.67430e-20 * 5.972e24   # G * M in km³/s²
+
+BACKENDS = ("auto", "numpy", "numba")
+_backend = {"name": os.environ.get("SIM_BACKEND", "auto"), "kernels": None}
+
+def set_backend(name):
+    """Select the RK4 backend: "numpy", "numba" or "auto" (Numba when installed)."""
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend {name!r}, expected one of {BACKENDS}")
+    _backend.update(name=name, kernels=None)
+
+def get_backend():
+    """Name of the backend the next integration runs on ("numpy" or "numba")."""
+    return "numpy" if _kernels() is None else "numba"
+
+def _kernels():
+    """The numba_kernels module when the numba backend is in use, else None."""
+    name = _backend["name"]
+    if name == "numpy" or (name == "auto" and importlib.util.find_spec("numba") is None):
+        return None
+    if _backend["kernels"] is None:
+        import numba_kernels   # ImportError here means SIM_BACKEND=numba without Numba installed
+        _backend["kernels"] = numba_kernels
+    return _backend["kernels"]
+
+def _acc(state, mu):
+    """State derivative under point-mass gravity for (6,) or (N, 6) states."""
+    x, y, z = state[..., 0], state[..., 1], state[..., 2]
+    r = np.sqrt(x ** 2 + y ** 2 + z ** 2)[..., None]
+    return np.concatenate([state[..., 3:], -mu * state[..., :3] / r ** 3], axis=-1)
+
+def _rk4(state, dt, mu):
+    """One classic RK4 step; dt is a scalar or an (N, 1) column."""
+    k1 = _acc(state, mu) * dt
+    k2 = _acc(state + 0.5 * k1, mu) * dt
+    k3 = _acc(state + 0.5 * k2, mu) * dt
+    k4 = _acc(state + k3, mu) * dt
+    rk4 = (k1 + 2 * k2 + 2 * k3 + k4) / 6
+    return state + rk4
+
+def initial_states(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km):
+    """(N, 6) starting states plus the dt and step count asteroid_trajectory_gravity would use.
+
+    Every argument may be a scalar or an array; they are broadcast together.
+    """
+    speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km = np.broadcast_arrays(
+        *[np.asarray(a, dtype=float) for a in (speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km)]
+    )
+    theta = np.radians(angle_deg)
+    phi = np.radians(z_angle_deg)
+
+    dt = np.select(
+        [(distance_km > 3500) & (distance_km < 6000),
+         (distance_km >= 6000) & (distance_km < 12000),
+         distance_km >= 12000],
+        [40.0, 45.0, 50.0], 35.0
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = distance_km // speed_kms
+        steps = t * 30 // dt
+    steps = np.where(np.isfinite(steps) & (steps > 0), steps, 0).astype(int)
+
+    dis = distance_km + EARTH_RADIUS_KM
+    states = np.stack([
+        dis * np.cos(theta) * np.sin(phi), dis * np.sin(theta) * np.sin(phi), dis * np.cos(phi),
+        x_sp, y_sp, z_sp
+    ], axis=-1).reshape(-1, 6)
+    return states, dt.ravel(), steps.ravel()
+
+def asteroid_trajectory_gravity(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km, steps=0):
+    """Trajectory under Earth's gravity (simplified orbital mechanics)."""
+    kernels = _kernels()
+    if kernels is not None:
+        states, dt, n = initial_states(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km)
+        path = kernels.gravity_path(states[0], float(dt[0]), int(n[0]), MU_EARTH, float(EARTH_RADIUS_KM))
+        return path[:, 0].copy(), path[:, 1].copy(), path[:, 2].copy(), float(dt[0])
+
+    G = 6.67430e-20   # km³/kg/s²
+    M = 5.972e24      # kg
+    mu = G * M
+
+    theta = np.radians(angle_deg)
+    phi = np.radians(z_angle_deg)
+
+    # Adaptive timestep
+    if distance_km > 3500 and distance_km < 6000:
+        dt = 40.0
+    elif distance_km >= 6000 and distance_km < 12000:
+        dt = 45.0
+    elif distance_km >= 12000:
+        dt = 50.0
+    else:
+        dt = 35.0
+    t = distance_km // speed_kms 
+    steps = t * 30 // dt
+
+    # Initial position
+    dis = distance_km + 6371
+    x, y, z = dis * np.cos(theta) * np.sin(phi), dis * np.sin(theta) * np.sin(phi), dis * np.cos(phi)
+    vx, vy, vz = x_sp, y_sp, z_sp
+    
+    xs, ys, zs = [], [], []
+    
+    state = np.array([x, y, z, vx, vy, vz])
+    
+    def acc(state, mu):
+    	x, y, z, vx, vy, vz = state
+    	r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+    	ax, ay, az = -mu*x/r**3, -mu*y/r**3, -mu*z/r**3
+    	return np.array([vx, vy, vz, ax, ay, az])
+    	
+    def rk4(state, dt, mu):
+    	k1 = acc(state, mu) * dt
+    	k2 = acc(state + 0.5 * k1, mu) * dt 
+    	k3 = acc(state + 0.5 * k2, mu) * dt 
+    	k4 = acc(state + k3, mu) * dt
+    	rk4 = (k1 + 2 * k2 + 2 * k3 + k4) / 6
+    	return state + rk4
+ 
+    for i in range(0, int(steps)):
+        r = np.sqrt(x**2 + y**2 + z**2)
+        if r < 6371:
+            r = 6371 - r
+            ax, ay, az = -mu*x/r**3, -mu*y/r**3, -mu*z/r**3
+            vx += ax*dt; vy += ay*dt; vz += az*dt
+            x += vx*dt; y += vy*dt; z += vz*dt
+        	
+            xs.append(x); ys.append(y); zs.append(z)
+
+            break
+            
+        state = rk4(state, dt, mu) 
+        x, y, z = state[:3]           
+            
+        xs.append(x); ys.append(y); zs.append(z)
+
+    return np.array(xs), np.array(ys), np.array(zs), dt
+
+def asteroid_trajectory_batch(states, dt, steps, mu=MU_EARTH, record=True, escape_km=None, closest=False,
+                              elapsed=False, crossing=False):
+    """Advance N bodies in lockstep, one (N, 6) RK4 step at a time.
+
+    Mirrors asteroid_trajectory_gravity body by body (same time step, surface
+    check and final-step correction; equal up to floating-point rounding), but
+    bodies that have impacted, escaped or used up their steps are dropped from
+    the active set and stop costing work.
+    With escape_km set, a body beyond that distance that is receding on an
+    unbound orbit is marked escaped.
+
+    Returns (trajectories, final, impacted, escaped): a list of (n_i, 3)
+    position arrays (None when record=False), the last position of each
+    body (NaN if it never moved) and the two boolean masks. For an impacted
+    body the last position is the final-step correction, flung far past
+    the Earth: it is not where the body hit.
+    With closest=True a fifth array follows: each body's smallest distance
+    from Earth's centre (km) over its integration steps. With elapsed=True
+    the next array is the time (s) each body was advanced, the final-step
+    correction included. With crossing=True the last two arrays are the
+    impact sites, (N, 3) points on the surface where each impacted body's
+    last RK4 step crossed it, and the time (s) of that crossing; both are
+    NaN for bodies that did not impact.
+    """
+    state = np.array(states, dtype=float).reshape(-1, 6)
+    n = len(state)
+    dt = np.broadcast_to(np.asarray(dt, dtype=float), (n,)).copy()
+    steps = np.broadcast_to(np.asarray(steps), (n,)).astype(int)
+    kernels = None if record else _kernels()
+    if kernels is not None:
+        pos, impacted, escaped, min_r, count, before, after = kernels.batch_final(
+            state, dt, steps, mu, float(EARTH_RADIUS_KM), -1.0 if escape_km is None else float(escape_km), closest)
+        return ((None, pos, impacted, escaped) + ((min_r,) if closest else ()) + ((count * dt,) if elapsed else ())
+                + (_impact_sites(before, after, dt, count, impacted) if crossing else ()))
+    vel0 = state[:, 3:].copy()
+    before = state.copy() if crossing else None
+    after = np.full((n, 6), np.nan) if crossing else None
+    pos = np.full((n, 3), np.nan)
+
+    impacted = np.zeros(n, dtype=bool)
+    escaped = np.zeros(n, dtype=bool)
+    count = np.zeros(n, dtype=int)
+    min_r = np.sqrt(np.sum(state[:, :3] ** 2, axis=1)) if closest else None
+    max_steps = int(steps.max(initial=0))
+    history = np.empty((max_steps, n, 3)) if record else None
+
+    active = np.flatnonzero(steps > 0)
+    cur = state[:, :3].copy()
+    for i in range(max_steps):
+        active = active[steps[active] > i]
+        if not active.size:
+            break
+
+        p = cur[active]
+        r = np.sqrt(p[:, 0] ** 2 + p[:, 1] ** 2 + p[:, 2] ** 2)
+        if closest:
+            min_r[active] = np.minimum(min_r[active], r)
+        hit = r < EARTH_RADIUS_KM
+        if hit.any():
+            idx = active[hit]
+            if crossing:
+                after[idx] = state[idx]
+            h = dt[idx, None]
+            rr = (EARTH_RADIUS_KM - r[hit])[:, None]
+            v = vel0[idx] + (-mu * cur[idx] / rr ** 3) * h
+            cur[idx] = cur[idx] + v * h
+            impacted[idx] = True
+            if record:
+                history[i, idx] = cur[idx]
+            count[idx] += 1
+            active = active[~hit]
+
+        if escape_km is not None and active.size:
+            s = state[active]
+            r = np.sqrt(np.sum(s[:, :3] ** 2, axis=1))
+            energy = 0.5 * np.sum(s[:, 3:] ** 2, axis=1) - mu / r
+            gone = (r - EARTH_RADIUS_KM > escape_km) & (np.sum(s[:, :3] * s[:, 3:], axis=1) > 0) & (energy > 0)
+            escaped[active[gone]] = True
+            active = active[~gone]
+
+        if not active.size:
+            continue
+        if crossing:
+            before[active] = state[active]
+        state[active] = _rk4(state[active], dt[active, None], mu)
+        cur[active] = state[active, :3]
+        if record:
+            history[i, active] = cur[active]
+        count[active] += 1
+
+    moved = count > 0
+    pos[moved] = cur[moved]
+    trajectories = [history[:count[k], k] for k in range(n)] if record else None
+    if closest:
+        min_r[moved] = np.minimum(min_r[moved], np.sqrt(np.sum(pos[moved] ** 2, axis=1)))
+    return ((trajectories, pos, impacted, escaped) + ((min_r,) if closest else ()) + ((count * dt,) if elapsed else ())
+            + (_impact_sites(before, after, dt, count, impacted) if crossing else ()))
+
+def _impact_sites(before, after, dt, count, impacted):
+    """Surface points (N, 3) and times (N,) where impacted bodies crossed r = EARTH_RADIUS_KM, else NaN.
+
+    before and after are the (N, 6) states at the ends of each body's last
+    RK4 step; count is the steps taken, the final-step correction included.
+    """
+    sites = np.full((len(dt), 3), np.nan)
+    times = np.full(len(dt), np.nan)
+    stepped = np.flatnonzero(impacted & (count > 1))
+    if stepped.size:
+        s, sites[stepped] = _surface_crossing(before[stepped], after[stepped], dt[stepped], EARTH_RADIUS_KM)
+        times[stepped] = (count[stepped] - 2 + s) * dt[stepped]
+    # Bodies that started inside the Earth hit where they started
+    start = np.flatnonzero(impacted & (count <= 1))
+    sites[start] = before[start, :3]
+    times[start] = 0.0
+    sites[impacted] *= EARTH_RADIUS_KM / np.sqrt(np.sum(sites[impacted] ** 2, axis=1))[:, None]
+    return sites, times
+
+def impact_latlon(x, y, z, dt=0, time=0):
+    """Latitude/longitude (deg) of positions projected onto the surface; arrays welcome."""
+    r = np.sqrt(x**2 + y**2 + z**2)
+    lat = np.degrees(np.arcsin(z / r))
+    lon = np.degrees(np.arctan2(y, x))
+
+    delta = 0.0042 * dt * time
+    return lat - delta, lon - delta
+
+# Dormand-Prince 5(4) tableau
+_DP_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1, 1])
+_DP_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84],
+]
+_DP_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+_DP_E = _DP_B - np.array([5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+
+def _surface_crossing(y0, y1, h, radius):
+    """Fraction of the step at which |r| = radius, by Illinois root-finding on a cubic Hermite position.
+
+    y0 and y1 are the (6,) or (N, 6) states at the ends of steps of length h
+    (scalar or (N,)); returns the fractions and the (3,) or (N, 3) positions.
+    """
+    h = np.asarray(h, dtype=float)[..., None]
+    p0, v0, p1, v1 = y0[..., :3], y0[..., 3:] * h, y1[..., :3], y1[..., 3:] * h
+
+    def g(s):
+        s1 = s[..., None]
+        s2, s3 = s1 * s1, s1 * s1 * s1
+        p = (2*s3 - 3*s2 + 1) * p0 + (s3 - 2*s2 + s1) * v0 + (-2*s3 + 3*s2) * p1 + (s3 - s2) * v1
+        return np.sqrt(np.sum(p * p, axis=-1)) - radius, p
+
+    a, b = np.zeros(p0.shape[:-1]), np.ones(p0.shape[:-1])
+    ga, gb = g(a)[0], g(b)[0]
+    s, p = b.copy(), np.array(p1, dtype=float)
+    side = np.zeros(a.shape, dtype=int)
+    todo = np.ones(a.shape, dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):   # converged entries are masked out
+        for _ in range(60):
+            s_new = (a * gb - b * ga) / (gb - ga)
+            gs, p_new = g(s_new)
+            s = np.where(todo, s_new, s)
+            p = np.where(todo[..., None], p_new, p)
+            todo &= (np.abs(gs) >= 1e-9) & (b - a >= 1e-12)
+            if not todo.any():
+                break
+            up, down = todo & (gs > 0), todo & ~(gs > 0)
+            gb = np.where(up & (side == 1), gb / 2, gb)
+            ga = np.where(down & (side == -1), ga / 2, ga)
+            a, ga = np.where(up, s_new, a), np.where(up, gs, ga)
+            b, gb = np.where(down, s_new, b), np.where(down, gs, gb)
+            side = np.where(up, 1, np.where(down, -1, side))
+    return s[()], p
+
+def asteroid_trajectory_adaptive(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km,
+                                 tol=1e-6, t_max=None, max_steps=100000):
+    """Trajectory under Earth's gravity with an error-controlled Dormand-Prince 5(4) integrator.
+
+    Steps grow far from Earth and shrink near it; tol is the relative (and
+    absolute, in km and km/s) error allowed per step, so a looser tol trades
+    accuracy for fewer steps. Crossing r = 6371 km is located by root-finding
+    inside the step, so the last point is the exact impact position.
+    t_max defaults to the same time span the fixed-step integrator covers.
+
+    Returns (xs, ys, zs, ts, t_impact) with t_impact None for a miss.
+    """
+    mu = MU_EARTH
+    states, _, _ = initial_states(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km)
+    y = states[0]
+    if t_max is None:
+        t_max = 30 * distance_km / speed_kms if speed_kms else 0.0
+
+    ts, points = [0.0], [y[:3].copy()]
+    t_impact = None
+    t = 0.0
+    r = np.sqrt(y[:3] @ y[:3])
+    h = min(t_max, 0.01 * r / max(np.sqrt(y[3:] @ y[3:]), 1e-9))
+    k = np.empty((7, 6))
+    k[0] = _acc(y, mu)
+
+    for _ in range(max_steps):
+        if t >= t_max or h <= 0:
+            break
+        h = min(h, t_max - t)
+        for i in range(1, 7):
+            k[i] = _acc(y + h * (np.dot(_DP_A[i], k[:i]) if i > 1 else _DP_A[1][0] * k[0]), mu)
+        y_new = y + h * (_DP_B @ k)
+        err_vec = h * (_DP_E @ k)
+        scale = tol + tol * np.maximum(np.abs(y), np.abs(y_new))
+        err = np.sqrt(np.mean((err_vec / scale) ** 2))
+
+        if err > 1:
+            h *= max(0.2, 0.9 * err ** -0.2)
+            continue
+
+        r_new = np.sqrt(y_new[:3] @ y_new[:3])
+        if r_new <= EARTH_RADIUS_KM:
+            s, p = _surface_crossing(y, y_new, h, EARTH_RADIUS_KM)
+            t_impact = t + s * h
+            ts.append(t_impact)
+            points.append(p * (EARTH_RADIUS_KM / np.sqrt(p @ p)))
+            break
+
+        t += h
+        y = y_new
+        k[0] = k[6]
+        ts.append(t)
+        points.append(y[:3].copy())
+        h *= min(5.0, 0.9 * max(err, 1e-10) ** -0.2)
+
+    points = np.array(points)
+    return points[:, 0], points[:, 1], points[:, 2], np.array(ts), t_impact
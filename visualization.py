@@ -1,117 +1,204 @@
 # visualization.py
+import json
+from time import perf_counter
+
+from functools import lru_cache
+
 import numpy as np
-import plotly.graph_objects as go
-from PIL import Image
-import tifffile as tiffy
-import requests
-
-from effects import body_sim
-
-def asteroid_trajectory_gravity(speed_kms, x_sp, y_sp, z_sp, angle_deg, z_angle_deg, distance_km, steps=0):
-    """Trajectory under Earth's gravity (simplified orbital mechanics)."""
-    G = 6.67430e-20   # km³/kg/s²
-    M = 5.972e24      # kg
-    mu = G * M
-
-    theta = np.radians(angle_deg)
-    phi = np.radians(z_angle_deg)
-
-    # Adaptive timestep
-    if distance_km > 3500 and distance_km < 6000:
-        dt = 40.0
-    elif distance_km >= 6000 and distance_km < 12000:
-        dt = 45.0
-    elif distance_km >= 12000:
-        dt = 50.0
-    else:
-        dt = 35.0
-    t = distance_km // speed_kms 
-    steps = t * 30 // dt
-
-    # Initial position
-    dis = distance_km + 6371
-    x, y, z = dis * np.cos(theta) * np.sin(phi), dis * np.sin(theta) * np.sin(phi), dis * np.cos(phi)
-    vx, vy, vz = x_sp, y_sp, z_sp
-    
-    xs, ys, zs = [], [], []
-    
-    state = np.array([x, y, z, vx, vy, vz])
-    
-    def acc(state, mu):
-    	x, y, z, vx, vy, vz = state
-    	r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
-    	ax, ay, az = -mu*x/r**3, -mu*y/r**3, -mu*z/r**3
-    	return np.array([vx, vy, vz, ax, ay, az])
-    	
-    def rk4(state, dt, mu):
-    	k1 = acc(state, mu) * dt
-    	k2 = acc(state + 0.5 * k1, mu) * dt 
-    	k3 = acc(state + 0.5 * k2, mu) * dt 
-    	k4 = acc(state + k3, mu) * dt
-    	rk4 = (k1 + 2 * k2 + 2 * k3 + k4) / 6
-    	return state + rk4
- 
-    for i in range(0, int(steps)):
-        r = np.sqrt(x**2 + y**2 + z**2)
-        if r < 6371:
-            r = 6371 - r
-            ax, ay, az = -mu*x/r**3, -mu*y/r**3, -mu*z/r**3
-            vx += ax*dt; vy += ay*dt; vz += az*dt
-            x += vx*dt; y += vy*dt; z += vz*dt
-        	
-            xs.append(x); ys.append(y); zs.append(z)
-
-            break
-            
-        state = rk4(state, dt, mu) 
-        x, y, z = state[:3]           
-            
-        xs.append(x); ys.append(y); zs.append(z)
 
-    return np.array(xs), np.array(ys), np.array(zs), dt
+from trajectory import (
+    EARTH_RADIUS_KM, SimulationCancelled, initial_states, impact_latlon,
+    asteroid_trajectory_gravity, asteroid_trajectory_batch, asteroid_trajectory_adaptive
+)
+from kepler import asteroid_trajectory_kepler
+from physics import kinetic_energy
+from effects import EFFECTS, effect_radii, effects_raster, ring_exposure
+from geocode import describe as describe_place
+import metrics
 
-def plot_simulation_video(asteroid, angle_deg=45, z_angle_deg=45, steps=300, body_d=500, dtype = None, time = 0, rubble=False, return_fig=True):
-    #3D asteroid impact simulation with animation
-    earth_radius = 6371	
-    
-    u, v = np.mgrid[0:2*np.pi:60j, 0:np.pi:30j]
-    x_e = earth_radius * np.cos(u) * np.sin(v)
-    y_e = earth_radius * np.sin(u) * np.sin(v)
-    z_e = earth_radius * np.cos(v)    
-
-    x_traj, y_traj, z_traj, dt = asteroid_trajectory_gravity(
-        asteroid["speed_km_s"], asteroid["x_sp"], asteroid["y_sp"], asteroid["z_sp"],
-        angle_deg, z_angle_deg, asteroid["distance_km"]
+# plotly is imported inside the plotting functions, so importing this module
+# for the trajectory names above stays cheap
+
+def _resample_path(x_traj, y_traj, z_traj, count):
+    """At most count points spaced evenly along the path's arc length, up to the surface."""
+    pts = np.column_stack([x_traj, y_traj, z_traj])
+    inside = np.flatnonzero(np.sqrt(np.sum(pts ** 2, axis=1)) <= EARTH_RADIUS_KM)
+    pts = pts[:inside[0]] if inside.size else pts
+    if len(pts) <= count:
+        return pts[:, 0], pts[:, 1], pts[:, 2]
+
+    s = np.concatenate([[0], np.cumsum(np.sqrt(np.sum(np.diff(pts, axis=0) ** 2, axis=1)))])
+    targets = np.linspace(0, s[-1], count)
+    return tuple(np.round(np.interp(targets, s, pts[:, k]), 1) for k in range(3))
+
+# Mesh resolutions: Earth (longitude, latitude) samples; the damage sphere uses a third of them
+MESH_LEVELS = {"low": (30, 15), "medium": (60, 30), "high": (120, 60)}
+EARTH_COLORSCALE = [
+    [0, "rgb(220, 220, 255)"],
+    [0.22, "rgb(210, 200, 195)"],
+    [0.4, "rgb(180, 180, 255)"],
+    [0.85, "rgb(125, 210, 150)"],
+    [1, "rgb(200, 200, 255)"]
+]
+
+@lru_cache(maxsize=None)
+def _unit_sphere(n_u, n_v):
+    u, v = np.mgrid[0:2*np.pi:complex(n_u), 0:np.pi:complex(n_v)]
+    return np.cos(u) * np.sin(v), np.sin(u) * np.sin(v), np.cos(v)
+
+@lru_cache(maxsize=None)
+def earth_mesh(level="medium"):
+    """Earth surface grid (x, y, z) in km at a MESH_LEVELS resolution; built once per process."""
+    return tuple(np.round(EARTH_RADIUS_KM * c, 1) for c in _unit_sphere(*MESH_LEVELS[level]))
+
+def damage_mesh(level, radius_km, centre):
+    """Sphere grid (x, y, z) of radius_km around centre, from the cached unit sphere."""
+    n_u, n_v = MESH_LEVELS[level]
+    return tuple(np.round(radius_km * c + o, 1) for c, o in zip(_unit_sphere(max(n_u // 3, 8), max(n_v // 3, 4)), centre))
+
+def mesh_level(size_km, extent_km):
+    """MESH_LEVELS key for an object of size_km in a scene extent_km across: finer as it fills more of the view."""
+    share = size_km / max(extent_km, 1e-9)
+    return "high" if share >= 0.5 else "medium" if share >= 0.1 else "low"
+
+def earth_template_js():
+    """Script defining window.earthMeshes: the Earth trace at every level, for figures built with earth="template"."""
+    meshes = {level: dict(zip("xyz", (c.tolist() for c in earth_mesh(level))), colorscale=EARTH_COLORSCALE,
+                          opacity=1, showscale=False) for level in MESH_LEVELS}
+    return "window.earthMeshes = " + json.dumps(meshes, separators=(",", ":")) + ";\n"
+
+def _effects_overlay(x, y, z, energy, cells=41, lift=1.002):
+    """Surface draping the severity raster over the globe around the scene point (x, y, z)."""
+    import plotly.graph_objects as go
+
+    lat = np.degrees(np.arcsin(np.clip(z / np.sqrt(x**2 + y**2 + z**2), -1, 1)))
+    lon = np.degrees(np.arctan2(y, x))
+    raster = effects_raster(lat, lon, energy, cells=cells)
+    la, lo = np.radians(raster["lat"])[:, None], np.radians(raster["lon"])[None, :]
+    severity = raster["severity"].astype(float)
+    off = severity == 0
+    rad = EARTH_RADIUS_KM * lift
+    coords = [np.where(off, np.nan, np.round(rad * c, 1)) for c in
+              (np.cos(la) * np.cos(lo), np.cos(la) * np.sin(lo), np.sin(la) * np.ones_like(lo))]
+    colors = ["rgb(255, 230, 120)", "rgb(255, 160, 60)", "rgb(230, 60, 40)", "rgb(90, 20, 20)"]
+    colorscale = [[i / len(EFFECTS) + d, c] for i, c in enumerate(colors) for d in (0, 1 / len(EFFECTS))]
+    return go.Surface(
+        x=coords[0], y=coords[1], z=coords[2], surfacecolor=severity - 0.5, cmin=0, cmax=len(EFFECTS),
+        colorscale=colorscale, showscale=False, opacity=0.6, name="Damage Rings", hoverinfo="name",
+        visible=False
     )
-    impact_x, impact_y, impact_z = x_traj[-1], y_traj[-1], z_traj[-1]
+
+def _compact_frames(x_traj, y_traj, z_traj, frame_budget, overlays=()):
+    """Frames that only patch the moving marker (trace 0) and toggle the damage sphere (2), impact marker (4) and overlays."""
+    import plotly.graph_objects as go
+
+    xs, ys, zs = _resample_path(x_traj, y_traj, z_traj, frame_budget)
+    count = len(xs)
+    flash = int(np.ceil(count * 0.9))
+    frames = []
+    for k in range(count):
+        data = [go.Scatter3d(x=[xs[k]], y=[ys[k]], z=[zs[k]])]
+        traces = [0]
+        if k == 0 or k == flash or k == count - 1:
+            data += [go.Surface(visible=k == count - 1), go.Scatter3d(visible=k >= flash)]
+            data += [go.Surface(visible=k == count - 1) for _ in overlays]
+            traces += [2, 4, *overlays]
+        frames.append(go.Frame(data=data, traces=traces, name=str(k)))
+    return frames
+
+def figure_payload_stats(fig):
+    """Serialized size and frame count of a figure, plus its build time when recorded."""
+    meta = fig.layout.meta or {}
+    return dict(bytes=len(fig.to_json()), frames=len(fig.frames), build_s=meta.get("build_s"))
+
+def plot_simulation_video(asteroid, angle_deg=45, z_angle_deg=45, steps=300, body_d=500, dtype = None, time = 0, rubble=False, return_fig=True,
+                          integrator="rk4", tol=1e-6, compact=False, frame_budget=120, cancelled=None,
+                          progress=None, lod="auto", earth="inline"):
+    #3D asteroid impact simulation with animation
+    #integrator="adaptive" uses the error-controlled integrator with tolerance tol,
+    #integrator="kepler" the closed-form conic sampled at display resolution
+    #compact=True sends trace patches only, with at most frame_budget frames
+    #cancelled() is polled between stages; True raises SimulationCancelled
+    #progress(steps, frames) reports steps integrated and frames built so far
+    #lod picks the mesh resolution ("low", "medium", "high"); "auto" goes by how much of the scene each mesh fills
+    #earth="template" sends an empty Earth trace for the page to fill from window.earthMeshes (earth_template_js)
+    import plotly.graph_objects as go
+
+    build_start = perf_counter()
+
+    with metrics.stage("integrate"):
+        if integrator == "kepler":
+            x_traj, y_traj, z_traj, ts, _ = asteroid_trajectory_kepler(
+                asteroid["speed_km_s"], asteroid["x_sp"], asteroid["y_sp"], asteroid["z_sp"],
+                angle_deg, z_angle_deg, asteroid["distance_km"], samples=max(4 * frame_budget, 400)
+            )
+            dt = float(initial_states(asteroid["speed_km_s"], asteroid["x_sp"], asteroid["y_sp"], asteroid["z_sp"],
+                                      angle_deg, z_angle_deg, asteroid["distance_km"])[1][0])
+        elif integrator == "adaptive":
+            x_traj, y_traj, z_traj, ts, _ = asteroid_trajectory_adaptive(
+                asteroid["speed_km_s"], asteroid["x_sp"], asteroid["y_sp"], asteroid["z_sp"],
+                angle_deg, z_angle_deg, asteroid["distance_km"], tol=tol
+            )
+            dt = ts[-1] / max(len(ts) - 1, 1)
+        else:
+            x_traj, y_traj, z_traj, dt = asteroid_trajectory_gravity(
+                asteroid["speed_km_s"], asteroid["x_sp"], asteroid["y_sp"], asteroid["z_sp"],
+                angle_deg, z_angle_deg, asteroid["distance_km"]
+            )
+    metrics.inc("sim_steps_integrated_total", len(x_traj), integrator=integrator)
+    if cancelled is not None and cancelled():
+        raise SimulationCancelled()
+    if progress is not None:
+        progress(len(x_traj), 0)
+    # Hit or miss and the impact site. The rk4 path ends on the legacy correction point, flung far
+    # past the Earth, so it is kept for the animation only; the site is where the last step crossed the surface
+    end = np.array([x_traj[-1], y_traj[-1], z_traj[-1]])
+    if integrator in ("kepler", "adaptive"):
+        impacted = bool(np.sqrt(end @ end) <= 6371 + 1e-6)
+        site = end
+    else:
+        states, dts, n_steps = initial_states(asteroid["speed_km_s"], asteroid["x_sp"], asteroid["y_sp"], asteroid["z_sp"],
+                                              angle_deg, z_angle_deg, asteroid["distance_km"])
+        _, _, hit, _, sites, _ = asteroid_trajectory_batch(states, dts, n_steps, record=False, crossing=True)
+        impacted = bool(hit[0])
+        site = sites[0] if impacted else end
+    impact_x, impact_y, impact_z = site
 
     init_r = np.sqrt(x_traj[0]**2 + y_traj[0]**2 + z_traj[0]**2)
 
+    # Damage rings from the effects tables; the sphere marks the 5 psi overpressure ring
+    energy = float(kinetic_energy(body_d, asteroid["speed_km_s"], dtype or "default", rubble))
+    radii = dict(zip(EFFECTS, (float(r) for r in effect_radii(energy))))
+    damage_r = radii["overpressure"]
+
     fig = go.Figure()
     
-    # Initial asteroid
+    # Initial asteroid (the moving marker in compact mode, so no fixed label)
     fig.add_trace(go.Scatter3d(
         x=[x_traj[0]], y=[y_traj[0]], z=[z_traj[0]],
-        mode="markers+text",
+        mode="markers" if compact else "markers+text",
         marker=dict(size = (body_d / init_r) * 30, color="red"),
-        text=[f"({x_traj[0]:.0f},{y_traj[0]:.0f},{z_traj[0]:.0f})"],
+        text=None if compact else [f"({x_traj[0]:.0f},{y_traj[0]:.0f},{z_traj[0]:.0f})"],
         textposition="top center",
         name="Asteroid"
     ))
     
     # Path line
+    path = _resample_path(x_traj, y_traj, z_traj, 4 * frame_budget) if compact else (x_traj, y_traj, z_traj)
     fig.add_trace(go.Scatter3d(
-        x=x_traj, y=y_traj, z=z_traj,
+        x=path[0], y=path[1], z=path[2],
         mode="lines",
         line=dict(color="green", width=4),
         name="Trajectory Path"
     ))
 
+    # Mesh resolutions from the scene's size: the view spans the path and the Earth
+    extent = 2 * max(init_r, 6371)
+    earth_level = lod if lod in MESH_LEVELS else mesh_level(2 * 6371, extent)
+    damage_level = lod if lod in MESH_LEVELS else mesh_level(2 * damage_r, extent)
+
     # Damage sphere at impact (hidden until impact frame)
-    u_d, v_d = np.mgrid[0:2*np.pi:20j, 0:np.pi:10j]
-    x_d = body_d * np.cos(u_d) * np.sin(v_d) + impact_x
-    y_d = body_d * np.sin(u_d) * np.sin(v_d) + impact_y
-    z_d = body_d * np.cos(v_d) + impact_z
+    x_d, y_d, z_d = damage_mesh(damage_level, damage_r, (impact_x, impact_y, impact_z))
 
     damage_sphere = go.Surface(
         x=x_d, y=y_d, z=z_d,
@@ -120,18 +207,14 @@ def plot_simulation_video(asteroid, angle_deg=45, z_angle_deg=45, steps=300, bod
     )
     fig.add_trace(damage_sphere)
     
-        # Earth
-    color = [
-    	[0, "rgb(220, 220, 255)"],
-    	[0.22, "rgb(210, 200, 195)"],	
-    	[0.4, "rgb(180, 180, 255)"],
-    	[0.85, "rgb(125, 210, 150)"],
-    	[1, "rgb(200, 200, 255)"]
-    	]
-    	    
-    fig.add_trace(go.Surface(x=x_e, y=y_e, z=z_e, opacity = 1,
-                             colorscale = color, showscale=False, name='Earth'))
-                             
+    # Earth (an empty stand-in in template mode, filled in by the page)
+    if earth == "template":
+        fig.add_trace(go.Surface(name="Earth", meta=dict(template="earth", lod=earth_level)))
+    else:
+        x_e, y_e, z_e = earth_mesh(earth_level)
+        fig.add_trace(go.Surface(x=x_e, y=y_e, z=z_e, opacity = 1,
+                                 colorscale = EARTH_COLORSCALE, showscale=False, name='Earth'))
+
     impact_marker = go.Scatter3d(
             x=[impact_x], y=[impact_y], z=[impact_z],
             mode="markers+text",
@@ -142,8 +225,21 @@ def plot_simulation_video(asteroid, angle_deg=45, z_angle_deg=45, steps=300, bod
         )
        
     # Animation frames
+    frames_start = perf_counter()
     frames = []
-    for i in range(len(x_traj)):
+    if compact:
+        impact_marker.visible = False
+        fig.add_trace(impact_marker)
+        overlays = ()
+        if impacted:
+            fig.add_trace(_effects_overlay(impact_x, impact_y, impact_z, energy))
+            overlays = (len(fig.data) - 1,)
+        frames = _compact_frames(x_traj, y_traj, z_traj, frame_budget, overlays)
+    for i in range(0 if compact else len(x_traj)):
+        if cancelled is not None and i % 200 == 0 and cancelled():
+            raise SimulationCancelled()
+        if progress is not None and i % 200 == 0:
+            progress(len(x_traj), len(frames))
         #Simulation stopper
         r = np.sqrt(x_traj[i]**2 + y_traj[i]**2 + z_traj[i]**2)
         if r <= 6371:
@@ -173,6 +269,10 @@ def plot_simulation_video(asteroid, angle_deg=45, z_angle_deg=45, steps=300, bod
         
 		
     fig.frames = frames
+    metrics.observe("sim_stage_seconds", perf_counter() - frames_start, stage="frames")
+    metrics.inc("sim_frames_built_total", len(frames))
+    if progress is not None:
+        progress(len(x_traj), len(frames))
     
     # Layout with auto-play
     fig.update_layout(
@@ -203,44 +303,17 @@ def plot_simulation_video(asteroid, angle_deg=45, z_angle_deg=45, steps=300, bod
     )
     
     
-    #pop_data = tiffy.imread("/storage/emulated/0/Download/__pycache__/testsim/testsim2/popdata.tif")
-    
-    x, y, z = x_traj[-1], y_traj[-1], z_traj[-1]
-    r = np.sqrt(x**2 + y**2 + z**2)
-    scale = 6371 / r
-    
-    x, y, z = x * scale, y * scale, z * scale 
-    imp_lat = np.degrees(np.arcsin(z / 6371))
-    imp_lon = np.degrees(np.atan2(y, x))
-    
-    delta = 0.0042 * dt * time
-    imp_lat = imp_lat - delta
-    imp_lon = imp_lon - delta    
-    
-    #lat_arr = np.linspace(-90, 90, pop_data.shape[0])
-#    lon_arr = np.linspace(-180, 180, pop_data.shape[1])
-#    lat_grid, lon_grid = np.meshgrid(lat_arr, lon_arr, indexing = "ij")
-#    
-#    def haversine(lat1, lon1, lat2, lon2):
-#    	lat1_rad = np.radians(lat1)
-#    	lat2_rad = np.radians(lat2)
-#    	lon1_rad = np.radians(lon1)
-#    	lon2_rad = np.radians(lon2)
-#    	
-#    	dlat = lat2_rad - lat1_rad
-#    	dlon = lon2_rad - lon1_rad
-#    	
-#    	a = np.sin(dlat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon/2)**2
-#    	c = 2 * np.arcsin(np.sqrt(a))
-#    	return 6371 * c
-#    	
-#    def pop_within_rad(imp_lat, imp_lon, lat_grid, lon_grid, pop_data, imp_rad):
-#    	distances = haversine(imp_lat, imp_lon, lat_grid, lon_grid)
-#    	masking = distances <= imp_rad
-#    	return np.sum(pop_data[masking])
-#    
-#    affected = pop_within_rad(imp_lat, imp_lon, lat_grid, lon_grid, pop_data, imp_rad)
-    affected = "Unknown (Working on it!)"
+    r = np.sqrt(site @ site)
+    imp_lat, imp_lon = impact_latlon(impact_x, impact_y, impact_z, dt, time)
+
+    # People inside each damage ring, read from the population raster window
+    exposure = None
+    if impacted:
+        with metrics.stage("population"):
+            exposure = ring_exposure(imp_lat, imp_lon, energy)
+        affected = "Unknown (no population data)" if exposure is None else f"{exposure['overpressure']:,.0f}"
+    else:
+        affected = 0
     im = abs(imp_lon)
     iml = abs(imp_lat)
     imp_loc = f"{im}"
@@ -251,10 +324,12 @@ def plot_simulation_video(asteroid, angle_deg=45, z_angle_deg=45, steps=300, bod
     imp_loc += "°S " if imp_lat < 0 else ""
     imp_loc += "°N " if imp_lat > 0 else ""
     imp_loc += "° " if imp_lat == 0 else ""
-    imp_locgen = ""
+    # Place name from the offline geocoding index
+    imp_locgen = describe_place(imp_lat, imp_lon) if impacted else ""
+    imp_locgen = f"{imp_locgen}," if imp_locgen else ""
     stat = ""
     
-    if r <= 6371:
+    if impacted:
     	stat = "Impact"
     else:
     	if r - 6371 < 3000:
@@ -262,9 +337,59 @@ def plot_simulation_video(asteroid, angle_deg=45, z_angle_deg=45, steps=300, bod
     	else:
     		stat = "Miss. Phew!"
 
+    fig.layout.meta = dict(build_s=round(perf_counter() - build_start, 4), frames=len(frames),
+                           earth=earth, lod=dict(earth=earth_level, damage=damage_level),
+                           effects=dict(radii_km=radii, exposure=exposure) if impacted else None)
     if return_fig:
         return imp_loc, imp_locgen, affected, stat, fig
     #else:
 #        fig.show(renderer="browser")
 
 	
+
+def plot_corridor(result, kind="heatmap", speed_index=0):
+    """Figure of a corridor.corridor_stream result.
+
+    kind="heatmap": hits in red over the (angle, z_angle) lattice, misses
+    coloured by closest approach altitude. kind="globe": impact points on an
+    orthographic globe, coloured by z_angle. With a speed axis, speed_index
+    picks the slice.
+    """
+    import plotly.graph_objects as go
+
+    axes = result["axes"]
+    pick = (lambda a: a[speed_index]) if "speed_kms" in axes else (lambda a: a)
+    impact, lat, lon = pick(result["impact"]), pick(result["lat"]), pick(result["lon"])
+    altitude = pick(result["min_altitude_km"])
+    x, y = axes["angle_deg"], axes["z_angle_deg"]
+    title = "Impact corridor"
+    if "speed_kms" in axes:
+        title += f" at {axes['speed_kms'][speed_index]:.2f} km/s"
+
+    fig = go.Figure()
+    if kind == "globe":
+        zz = np.broadcast_to(y[:, None], impact.shape)[impact]
+        xx = np.broadcast_to(x[None, :], impact.shape)[impact]
+        fig.add_trace(go.Scattergeo(
+            lat=lat[impact], lon=lon[impact], mode="markers",
+            marker=dict(size=4, color=zz, colorscale="Plasma", colorbar=dict(title="Z angle")),
+            customdata=np.column_stack([xx, zz]),
+            hovertemplate="XY %{customdata[0]:.1f}°, Z %{customdata[1]:.1f}°<br>%{lat:.2f}, %{lon:.2f}<extra></extra>",
+            name="Impacts"
+        ))
+        fig.update_geos(projection_type="orthographic", showocean=True, oceancolor="#0B3D91",
+                        showland=True, landcolor="#2E8B57")
+    else:
+        fig.add_trace(go.Heatmap(
+            x=x, y=y, z=np.where(impact, np.nan, altitude), colorscale="Viridis",
+            colorbar=dict(title="Closest approach (km)"), name="Miss",
+            hovertemplate="XY %{x:.1f}°, Z %{y:.1f}°<br>closest %{z:.0f} km<extra></extra>"
+        ))
+        fig.add_trace(go.Heatmap(
+            x=x, y=y, z=np.where(impact, 1.0, np.nan), colorscale=[[0, "red"], [1, "red"]],
+            showscale=False, customdata=np.dstack([lat, lon]), name="Impact",
+            hovertemplate="XY %{x:.1f}°, Z %{y:.1f}°<br>impact %{customdata[0]:.2f}, %{customdata[1]:.2f}<extra></extra>"
+        ))
+        fig.update_layout(xaxis_title="XY angle (deg)", yaxis_title="Z angle (deg)")
+    fig.update_layout(title=f"{title} ({impact.mean():.0%} of geometries hit)")
+    return fig
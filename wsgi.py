@@ -0,0 +1,15 @@
+# wsgi.py
+"""Production entry point: the Flask server behind the Dash app, debug off.
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Importing this module loads the shared read-only assets, so with
+preload_app the master process does it once and every forked worker
+shares the pages.
+"""
+from app import app, server, preload_assets
+
+app.enable_dev_tools(debug=False)
+preload_assets()
+
+__all__ = ["app", "server"]